@@ -10,78 +10,158 @@
 - 均线=玄铁重剑，MACD/KDJ仅作可选参考
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 import os
 import sys
 
 warnings.filterwarnings('ignore')
 
-# 导入数据源适配层和公共技术指标
+# 导入公共技术指标；数据源适配层（baostock 等）在首次获取数据时才导入
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from data_source import DataSource
 from technical import (
     calculate_ma, calculate_macd, calculate_kdj, calculate_volume_ma,
     detect_highs_lows, analyze_ma_alignment, calculate_pendulum, _safe_ma,
 )
 
+# 本分析器实际用到的原始列，其余（换手率、涨跌幅、数据源等）取回后即丢弃
+_DAILY_COLUMNS = ('日期', '开盘', '收盘', '最高', '最低', '成交量', '成交额')
+_WEEKLY_COLUMNS = ('日期', '收盘')
+
+
+def _ma_slope(df, col, period=5):
+    """最新均线值相对 period 根之前的变化率(%)，数据不足或 NaN 时为 0"""
+    if col not in df.columns or len(df) <= period:
+        return 0.0
+    ma = df[col].to_numpy(dtype=np.float64)
+    base = ma[-1 - period]
+    if np.isnan(base) or np.isnan(ma[-1]) or base == 0:
+        return 0.0
+    return float((ma[-1] - base) / base * 100)
+
+
+def _keep_columns(df, columns):
+    """只保留需要的列（返回新 DataFrame，不改动数据源缓存中的对象）"""
+    if df is None or df.empty:
+        return df
+    return df.drop(columns=[c for c in df.columns if c not in columns])
+
+
+# 交易机会模板：固定字段预先定义，生成时只填入价格/目标/理由等数值相关字段
+def _opp_template(opp_type, strategy, reason, confidence, profit_potential):
+    return {
+        'type': opp_type, 'strategy': strategy, 'price': None, 'target': None,
+        'reason': reason, 'confidence': confidence, 'profit_potential': profit_potential,
+    }
+
+
+_OPP_TREND_VWAP_BUY = _opp_template(
+    '买入', '📈 顺大势+回踩VWAP买入',
+    '大势看多(强度{}/10) + 日内价格低于VWAP({:+.1f}%)，钟摆回摆买入', '中', '+1.0-2.0%')
+_OPP_TREND_VWAP_SELL = _opp_template(
+    '卖出', '📉 逆小势+偏离VWAP卖出',
+    '大势看多但日内偏高(VWAP+{:.1f}%)，逆小势做T卖出，等回踩再买', '中', '+0.5-1.5%')
+_OPP_WEAK_REBOUND_SELL = _opp_template(
+    '卖出', '⚠️ 趋势偏弱+反弹卖出',
+    '大势偏空(强度{}/10) + 日内反弹至VWAP上方，卖出避险', '高', '避免损失')
+_OPP_RANGE_BUY = _opp_template(
+    '买入', '🔄 震荡区间低买',
+    '震荡市 + 日内价格低于VWAP({:+.1f}%)，区间低买', '中', '+0.5-1.0%')
+_OPP_RANGE_SELL = _opp_template(
+    '卖出', '🔄 震荡区间高卖',
+    '震荡市 + 日内价格高于VWAP(+{:.1f}%)，区间高卖', '中', '+0.5-1.0%')
+_OPP_MA20_REVERT_SELL = _opp_template(
+    '卖出', '🔔 偏离MA20过大，均值回归卖出',
+    '价格偏离MA20达{:+.1f}%，绳子偏紧，有回归MA20压力', '中', None)
+_OPP_MA20_REVERT_BUY = _opp_template(
+    '买入', '🔔 回踩MA20附近，均值回归买入',
+    '大势看多但价格回踩至MA20附近({:+.1f}%)，钟摆回摆，买入时机', '高', None)
+_OPP_SUPPORT_BUY = _opp_template(
+    '买入', '🛡️ 触及{}支撑买入', '价格触及{}(¥{:.2f})支撑位', '低', '+1.0-2.0%')
+_OPP_RESISTANCE_SELL = _opp_template(
+    '卖出', '⚡ 触及{}压力卖出', '价格触及{}(¥{:.2f})压力位', '中', '+1.0-2.0%')
+_OPP_VOLUME_BREAKOUT_BUY = _opp_template(
+    '买入', '🚀 趋势看多+放量突破',
+    '大势看多+放量{:.1f}倍+价格在VWAP上方，强势做T', '高', '+2.0-3.0%')
+_OPP_VOLUME_DROP_SELL = _opp_template(
+    '卖出', '⚠️ 放量下跌避险',
+    '放量{:.1f}倍+价格在VWAP下方，风险信号', '高', '避免损失')
+_OPP_MORNING_DIP_BUY = _opp_template(
+    '买入', '🌅 大势看多+早盘急跌抄底',
+    '大势看多但早盘恐慌杀跌，钟摆过度向下，回归机会', '中', '+2.0-4.0%')
+_OPP_AFTERNOON_LOCK_SELL = _opp_template(
+    '卖出', '🌆 午后大涨锁利',
+    '午后大涨，钟摆过度向上，锁定利润', '高', '锁定当日利润')
+_OPP_DAILY_MA20_BUY = _opp_template(
+    '买入', '趋势看多+接近MA20',
+    '日线趋势向上，价格接近MA20(偏离{:+.1f}%)', '中', '+2.0-3.0%')
+
 
 class IntradayT0Analyzer:
     """日内T+0做T分析器 — 基于趋势+均线+钟摆模型"""
 
-    def __init__(self, stock_code):
+    def __init__(self, stock_code, include_optional=False):
         self.stock_code = stock_code
+        self.include_optional = include_optional  # 是否计算/展示 MACD、KDJ 等可选参考指标
         self.df_daily = None   # 日K线数据
         self.df_weekly = None  # 周K线数据
         self.df_minute = None  # 分时数据
+        self._latest = {}      # 最新一根日K（dict）
+        self._prev = {}        # 前一根日K（dict）
         self.data = {}
         self.market_data = {}
 
     def fetch_data(self):
-        """获取股票数据（使用 baostock，扩展至300+天，支持MA120/MA250）"""
+        """获取股票数据（日K/周K/分时/大盘并发获取，扩展至300+天，支持MA120/MA250）"""
         try:
+            from data_source import DataSource
+
             print(f"📊 正在获取 {self.stock_code} 的数据...")
 
-            # 1. 获取日K线数据（300+天，计算MA120/MA250）
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=400)
+            # 日K线300+天（计算MA120/MA250），周K判断周级别趋势，分时取今日5分钟
+            # 日期用字符串传入，保证 DataSource 内存缓存键在当日内稳定
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            start_date = (now - timedelta(days=400)).strftime('%Y-%m-%d')
+            end_date = today
+
+            # 四个请求均为网络 I/O，线程池并发后总耗时≈最慢的单个请求
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                daily_future = executor.submit(
+                    DataSource.get_stock_hist,
+                    stock_code=self.stock_code, start_date=start_date, end_date=end_date,
+                    adjust='qfq', period='daily',
+                )
+                weekly_future = executor.submit(
+                    DataSource.get_stock_hist,
+                    stock_code=self.stock_code, start_date=start_date, end_date=end_date,
+                    adjust='qfq', period='weekly',
+                )
+                minute_future = executor.submit(
+                    DataSource.get_stock_hist_minute,
+                    stock_code=self.stock_code, start_date=today, end_date=today,
+                    adjust='qfq', period='5',
+                )
+                market_future = executor.submit(DataSource.get_stock_hist, '000001', period='daily')
 
-            self.df_daily = DataSource.get_stock_hist(
-                stock_code=self.stock_code,
-                start_date=start_date,
-                end_date=end_date,
-                adjust='qfq',
-                period='daily'
-            )
+            # 1. 日K线数据
+            self.df_daily = _keep_columns(daily_future.result(), _DAILY_COLUMNS)
 
             if self.df_daily is None or self.df_daily.empty:
                 print(f"❌ 无法获取日K线数据")
                 return False
 
-            # 2. 获取周K线数据（判断周级别趋势）
+            # 2. 周K线数据
             try:
-                self.df_weekly = DataSource.get_stock_hist(
-                    stock_code=self.stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust='qfq',
-                    period='weekly'
-                )
+                self.df_weekly = _keep_columns(weekly_future.result(), _WEEKLY_COLUMNS)
             except:
                 self.df_weekly = None
 
-            # 3. 获取实时分时数据（今日5分钟数据）
+            # 3. 实时分时数据
             try:
-                today = datetime.now().strftime('%Y-%m-%d')
-                self.df_minute = DataSource.get_stock_hist_minute(
-                    stock_code=self.stock_code,
-                    start_date=today,
-                    end_date=today,
-                    adjust='qfq',
-                    period='5'
-                )
+                self.df_minute = minute_future.result()
 
                 if self.df_minute is not None and not self.df_minute.empty:
                     print(f"✅ 获取到 {len(self.df_minute)} 条分时数据")
@@ -92,13 +172,17 @@ class IntradayT0Analyzer:
                 print(f"⚠️ 分时数据获取失败: {e}")
                 self.df_minute = None
 
+            # 计算技术指标（同时缓存最近两根日K）
+            self.calculate_indicators()
+
             # 4. 基本信息
-            latest_daily = self.df_daily.iloc[-1]
+            latest_daily = self._latest
+            prev_close = self._prev['收盘']
 
             self.data = {
                 'name': f'股票{self.stock_code}',
                 'current_price': latest_daily['收盘'],
-                'change_pct': ((latest_daily['收盘'] - self.df_daily.iloc[-2]['收盘']) / self.df_daily.iloc[-2]['收盘']) * 100,
+                'change_pct': ((latest_daily['收盘'] - prev_close) / prev_close) * 100,
                 'high': latest_daily['最高'],
                 'low': latest_daily['最低'],
                 'open': latest_daily['开盘'],
@@ -107,21 +191,22 @@ class IntradayT0Analyzer:
 
             # 如果有分时数据，更新为最新价格
             if self.df_minute is not None and not self.df_minute.empty:
-                latest_minute = self.df_minute.iloc[-1]
-                self.data['current_price'] = latest_minute['收盘']
-                self.data['high'] = self.df_minute['最高'].max()
-                self.data['low'] = self.df_minute['最低'].min()
-                self.data['open'] = self.df_minute.iloc[0]['开盘']
+                minute_close = self.df_minute['收盘'].to_numpy(copy=False)
+                self.data['current_price'] = minute_close[-1]
+                self.data['high'] = np.nanmax(self.df_minute['最高'].to_numpy(copy=False))
+                self.data['low'] = np.nanmin(self.df_minute['最低'].to_numpy(copy=False))
+                self.data['open'] = self.df_minute['开盘'].to_numpy(copy=False)[0]
                 self.data['change_pct'] = ((self.data['current_price'] - self.data['open']) / self.data['open']) * 100
 
             # baostock 数据中已包含股票代码，名称暂时保持默认
             pass
 
-            # 计算技术指标
-            self.calculate_indicators()
-
-            # 获取市场数据
-            self.fetch_market_data()
+            # 市场数据（上证指数已随上面的线程池一起获取）
+            try:
+                sz_df = market_future.result()
+            except:
+                sz_df = None
+            self.fetch_market_data(sz_df)
 
             return True
 
@@ -131,10 +216,12 @@ class IntradayT0Analyzer:
             traceback.print_exc()
             return False
 
-    def fetch_market_data(self):
-        """获取市场数据（使用 baostock）"""
+    def fetch_market_data(self, sz_df=None):
+        """整理市场数据；未传入上证指数数据时自行获取"""
         try:
-            sz_df = DataSource.get_stock_hist('000001', period='daily')
+            if sz_df is None:
+                from data_source import DataSource
+                sz_df = DataSource.get_stock_hist('000001', period='daily')
             if sz_df is not None and not sz_df.empty and len(sz_df) >= 2:
                 latest_sz = sz_df.iloc[-1]
                 prev_sz = sz_df.iloc[-2]
@@ -149,30 +236,42 @@ class IntradayT0Analyzer:
         """计算技术指标 — 使用公共模块"""
         df = self.df_daily
 
-        # 日线指标（均线、MACD、KDJ、成交量均线）
-        calculate_ma(df)
-        calculate_macd(df)
-        calculate_kdj(df)
+        # 日线指标（均线、成交量均线）；只用到最新斜率，不生成整列斜率
+        calculate_ma(df, slope_period=None)
         calculate_volume_ma(df)
+        # MACD/KDJ 仅作可选参考，按需计算
+        if self.include_optional:
+            calculate_macd(df)
+            calculate_kdj(df)
 
         # 周线均线
         if self.df_weekly is not None and not self.df_weekly.empty:
-            calculate_ma(self.df_weekly, windows=[5, 10, 20])
+            calculate_ma(self.df_weekly, windows=[5, 10, 20], slope_period=None)
             for w in [5, 10, 20]:
                 if f'MA{w}' in self.df_weekly.columns:
                     self.df_weekly[f'W_MA{w}'] = self.df_weekly[f'MA{w}']
 
         # 分时指标
         if self.df_minute is not None and not self.df_minute.empty and len(self.df_minute) >= 5:
+            amount = self.df_minute['成交额'].to_numpy(dtype=np.float64)
+            volume = self.df_minute['成交量'].to_numpy(dtype=np.float64)
+
             # 分时均价线（VWAP）— 做T的核心参考线
-            self.df_minute['VWAP'] = (self.df_minute['成交额'].cumsum() / self.df_minute['成交量'].cumsum())
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.df_minute['VWAP'] = np.cumsum(amount) / np.cumsum(volume)
+
+            # 分时量能（5根均量，前4根不足窗口为 NaN）
+            vol_ma = np.full(len(volume), np.nan)
+            vol_ma[4:] = np.convolve(volume, np.ones(5), mode='valid') / 5
+            self.df_minute['VOL_MA'] = vol_ma
 
-            # 分时量能
-            self.df_minute['VOL_MA'] = self.df_minute['成交量'].rolling(window=5).mean()
+        # 最近两根日K转为普通 dict 缓存，分析/报告中反复取值不再构造 Series
+        self._latest = df.iloc[-1].to_dict()
+        self._prev = df.iloc[-2].to_dict()
 
     def analyze_multi_timeframe_trend(self):
         """多级别趋势分析 — 核心分析方法"""
-        latest = self.df_daily.iloc[-1]
+        latest = self._latest
         price = self.data['current_price']
         result = {}
 
@@ -189,12 +288,8 @@ class IntradayT0Analyzer:
         ma250 = ma_vals['MA250']
 
         # 均线方向（斜率）
-        ma20_slope = latest.get('MA20_slope', 0)
-        if np.isnan(ma20_slope):
-            ma20_slope = 0
-        ma60_slope = latest.get('MA60_slope', 0)
-        if np.isnan(ma60_slope):
-            ma60_slope = 0
+        ma20_slope = _ma_slope(self.df_daily, 'MA20')
+        ma60_slope = _ma_slope(self.df_daily, 'MA60')
 
         if ma20_slope > 1:
             ma20_dir = '↑ 加速上升'
@@ -232,21 +327,21 @@ class IntradayT0Analyzer:
         weekly_trend = '数据不足'
         weekly_score = 0
         if self.df_weekly is not None and not self.df_weekly.empty and len(self.df_weekly) >= 10:
-            wl = self.df_weekly.iloc[-1]
-            w_ma5 = wl.get('W_MA5', np.nan)
-            w_ma10 = wl.get('W_MA10', np.nan)
-            w_ma20 = wl.get('W_MA20', np.nan)
-            if not any(np.isnan(x) for x in [w_ma5, w_ma10, w_ma20] if isinstance(x, float)):
-                if w_ma5 > w_ma10 > w_ma20:
+            wl = self.df_weekly.iloc[-1].to_dict()
+            # None/缺列统一视为 NaN；steps = [MA10-MA5, MA20-MA10]，全 <0 即 MA5>MA10>MA20
+            weekly_mas = np.array([wl.get('W_MA5'), wl.get('W_MA10'), wl.get('W_MA20')], dtype=np.float64)
+            if not np.isnan(weekly_mas).any():
+                steps = np.diff(weekly_mas)
+                if (steps < 0).all():
                     weekly_trend = '↑ 多头排列'
                     weekly_score = 2
-                elif w_ma5 > w_ma10:
+                elif steps[0] < 0:
                     weekly_trend = '↗ 偏多'
                     weekly_score = 1
-                elif w_ma5 < w_ma10 < w_ma20:
+                elif (steps > 0).all():
                     weekly_trend = '↓ 空头排列'
                     weekly_score = -2
-                elif w_ma5 < w_ma10:
+                elif steps[0] > 0:
                     weekly_trend = '↘ 偏空'
                     weekly_score = -1
                 else:
@@ -311,7 +406,7 @@ class IntradayT0Analyzer:
     def analyze_pendulum_position(self):
         """钟摆位置分析（使用公共模块）"""
         price = self.data['current_price']
-        latest = self.df_daily.iloc[-1]
+        latest = self._latest
         ma_values = {
             'MA20': _safe_ma(latest, 'MA20'),
             'MA60': _safe_ma(latest, 'MA60'),
@@ -320,21 +415,25 @@ class IntradayT0Analyzer:
         }
         return calculate_pendulum(price, ma_values)
 
-    def analyze_intraday_t0(self):
-        """日内T+0策略分析 — 以「顺大势逆小势」为核心"""
+    def analyze_intraday_t0(self, now=None):
+        """日内T+0策略分析 — 以「顺大势逆小势」为核心（now 为分析时刻，默认当前时间）"""
+        if now is None:
+            now = datetime.now()
         # 多级别趋势
         trend = self.analyze_multi_timeframe_trend()
         # 钟摆位置
         pendulum = self.analyze_pendulum_position()
 
         current_price = self.data['current_price']
-        latest_daily = self.df_daily.iloc[-1]
+        latest_daily = self._latest
+        prev_high = self._prev['最高']
+        prev_low = self._prev['最低']
 
         result = {
             'trend': trend,
             'pendulum': pendulum,
             'has_intraday': False,
-            'current_time': datetime.now().strftime('%H:%M'),
+            'current_time': now.strftime('%H:%M'),
             'trading_opportunities': [],
             'key_levels': {},
             'strategy': {},
@@ -379,17 +478,22 @@ class IntradayT0Analyzer:
             supports.append(('MA20', ma20))
         if not np.isnan(ma60) if isinstance(ma60, float) else ma60 is not None:
             supports.append(('MA60', ma60))
-        supports.append(('昨日低点', self.df_daily.iloc[-2]['最低']))
+        supports.append(('昨日低点', prev_low))
 
         # 压力位
         resistances = []
-        resistances.append(('昨日高点', self.df_daily.iloc[-2]['最高']))
-        if self.data['high'] > self.df_daily.iloc[-2]['最高']:
+        resistances.append(('昨日高点', prev_high))
+        if self.data['high'] > prev_high:
             resistances.append(('今日高点', self.data['high']))
 
         # 找到最近的支撑和压力
-        nearest_support = min(supports, key=lambda x: abs(current_price - x[1]) if x[1] < current_price else float('inf'))
-        nearest_resistance = min(resistances, key=lambda x: abs(x[1] - current_price) if x[1] > current_price else float('inf'))
+        # 价位数组化：下方最近的支撑 / 上方最近的压力（都不存在时取第一个）
+        support_vals = np.array([v for _, v in supports], dtype=np.float64)
+        resistance_vals = np.array([v for _, v in resistances], dtype=np.float64)
+        support_gap = np.where(support_vals < current_price, current_price - support_vals, np.inf)
+        resistance_gap = np.where(resistance_vals > current_price, resistance_vals - current_price, np.inf)
+        nearest_support = supports[int(support_gap.argmin())]
+        nearest_resistance = resistances[int(resistance_gap.argmin())]
 
         result['key_levels'] = {
             'supports': supports,
@@ -403,10 +507,8 @@ class IntradayT0Analyzer:
         # === 日内分时分析 ===
         if self.df_minute is not None and not self.df_minute.empty and len(self.df_minute) >= 5:
             result['has_intraday'] = True
-            latest_minute = self.df_minute.iloc[-1]
-
             # VWAP — 日内价值中枢
-            vwap = latest_minute['VWAP']
+            vwap = self.df_minute['VWAP'].to_numpy(copy=False)[-1]
 
             # 日内波动幅度
             intraday_range = ((self.data['high'] - self.data['low']) / self.data['open']) * 100
@@ -415,8 +517,9 @@ class IntradayT0Analyzer:
             dev_vwap = (current_price - vwap) / vwap * 100
 
             # 量能分析
-            current_vol = latest_minute['成交量']
-            avg_vol = latest_minute['VOL_MA'] if not np.isnan(latest_minute['VOL_MA']) else current_vol
+            current_vol = self.df_minute['成交量'].to_numpy(copy=False)[-1]
+            vol_ma_last = self.df_minute['VOL_MA'].to_numpy(copy=False)[-1]
+            avg_vol = vol_ma_last if not np.isnan(vol_ma_last) else current_vol
             vol_ratio = current_vol / avg_vol if avg_vol > 0 else 1
 
             result['intraday'] = {
@@ -428,6 +531,11 @@ class IntradayT0Analyzer:
 
             # === 生成交易机会（基于趋势+均线+钟摆）===
             opportunities = []
+            # 大势看空不给出任何买入机会（其余买入分支本身已限定看多/震荡）
+            skip_buys = (major_trend == '看空')
+            # 多个机会共用的价格字符串只格式化一次
+            price_str = format(current_price, '.2f')
+            vwap_str = format(vwap, '.2f')
 
             # ============================================================
             # 核心策略1: 顺大势+回踩VWAP做T
@@ -435,171 +543,133 @@ class IntradayT0Analyzer:
             if major_trend == '看多':
                 if dev_vwap < -0.3:
                     # 大势看多 + 日内价格在VWAP下方 = 买入做T
-                    conf = '高' if strength >= 7 else '中'
-                    opportunities.append({
-                        'type': '买入',
-                        'strategy': '📈 顺大势+回踩VWAP买入',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{vwap * 1.003:.2f}",
-                        'reason': f'大势看多(强度{strength}/10) + 日内价格低于VWAP({dev_vwap:+.1f}%)，钟摆回摆买入',
-                        'confidence': conf,
-                        'profit_potential': '+1.0-2.0%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_TREND_VWAP_BUY,
+                        price=price_str,
+                        target=format(vwap * 1.003, '.2f'),
+                        reason=_OPP_TREND_VWAP_BUY['reason'].format(strength, dev_vwap),
+                        confidence='高' if strength >= 7 else '中',
+                    ))
                 elif dev_vwap > 0.5:
                     # 大势看多 + 日内价格在VWAP上方偏高 = 卖出做T（逆小势）
-                    opportunities.append({
-                        'type': '卖出',
-                        'strategy': '📉 逆小势+偏离VWAP卖出',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{vwap:.2f}",
-                        'reason': f'大势看多但日内偏高(VWAP+{dev_vwap:.1f}%)，逆小势做T卖出，等回踩再买',
-                        'confidence': '中',
-                        'profit_potential': '+0.5-1.5%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_TREND_VWAP_SELL,
+                        price=price_str,
+                        target=vwap_str,
+                        reason=_OPP_TREND_VWAP_SELL['reason'].format(dev_vwap),
+                    ))
 
             elif major_trend == '看空':
                 if dev_vwap > 0.3:
-                    opportunities.append({
-                        'type': '卖出',
-                        'strategy': '⚠️ 趋势偏弱+反弹卖出',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{vwap * 0.997:.2f}",
-                        'reason': f'大势偏空(强度{strength}/10) + 日内反弹至VWAP上方，卖出避险',
-                        'confidence': '高',
-                        'profit_potential': '避免损失'
-                    })
+                    opportunities.append(dict(
+                        _OPP_WEAK_REBOUND_SELL,
+                        price=price_str,
+                        target=format(vwap * 0.997, '.2f'),
+                        reason=_OPP_WEAK_REBOUND_SELL['reason'].format(strength),
+                    ))
 
             elif major_trend == '震荡':
                 if dev_vwap < -0.5:
-                    opportunities.append({
-                        'type': '买入',
-                        'strategy': '🔄 震荡区间低买',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{vwap:.2f}",
-                        'reason': f'震荡市 + 日内价格低于VWAP({dev_vwap:+.1f}%)，区间低买',
-                        'confidence': '中',
-                        'profit_potential': '+0.5-1.0%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_RANGE_BUY,
+                        price=price_str,
+                        target=vwap_str,
+                        reason=_OPP_RANGE_BUY['reason'].format(dev_vwap),
+                    ))
                 elif dev_vwap > 0.5:
-                    opportunities.append({
-                        'type': '卖出',
-                        'strategy': '🔄 震荡区间高卖',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{vwap:.2f}",
-                        'reason': f'震荡市 + 日内价格高于VWAP(+{dev_vwap:.1f}%)，区间高卖',
-                        'confidence': '中',
-                        'profit_potential': '+0.5-1.0%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_RANGE_SELL,
+                        price=price_str,
+                        target=vwap_str,
+                        reason=_OPP_RANGE_SELL['reason'].format(dev_vwap),
+                    ))
 
             # ============================================================
             # 核心策略2: 均线偏离度均值回归
             # ============================================================
             if dev_ma20 is not None:
+                revert_profit = f'+{abs(dev_ma20) * 0.3:.1f}-{abs(dev_ma20) * 0.5:.1f}%'
                 if dev_ma20 > 8 and major_trend != '看空':
-                    opportunities.append({
-                        'type': '卖出',
-                        'strategy': '🔔 偏离MA20过大，均值回归卖出',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{ma20 * 1.03:.2f}" if not np.isnan(ma20) else '均线附近',
-                        'reason': f'价格偏离MA20达{dev_ma20:+.1f}%，绳子偏紧，有回归MA20压力',
-                        'confidence': '高' if dev_ma20 > 10 else '中',
-                        'profit_potential': f'+{abs(dev_ma20)*0.3:.1f}-{abs(dev_ma20)*0.5:.1f}%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_MA20_REVERT_SELL,
+                        price=price_str,
+                        target=format(ma20 * 1.03, '.2f') if not np.isnan(ma20) else '均线附近',
+                        reason=_OPP_MA20_REVERT_SELL['reason'].format(dev_ma20),
+                        confidence='高' if dev_ma20 > 10 else '中',
+                        profit_potential=revert_profit,
+                    ))
                 elif dev_ma20 < -5 and major_trend == '看多':
-                    opportunities.append({
-                        'type': '买入',
-                        'strategy': '🔔 回踩MA20附近，均值回归买入',
-                        'price': f"{current_price:.2f}",
-                        'target': f"{ma20:.2f}" if not np.isnan(ma20) else '均线附近',
-                        'reason': f'大势看多但价格回踩至MA20附近({dev_ma20:+.1f}%)，钟摆回摆，买入时机',
-                        'confidence': '高',
-                        'profit_potential': f'+{abs(dev_ma20)*0.3:.1f}-{abs(dev_ma20)*0.5:.1f}%'
-                    })
+                    opportunities.append(dict(
+                        _OPP_MA20_REVERT_BUY,
+                        price=price_str,
+                        target=format(ma20, '.2f') if not np.isnan(ma20) else '均线附近',
+                        reason=_OPP_MA20_REVERT_BUY['reason'].format(dev_ma20),
+                        profit_potential=revert_profit,
+                    ))
 
             # ============================================================
             # 辅助策略: 支撑/压力位
             # ============================================================
-            for name, level in supports:
-                if current_price <= level * 1.005 and current_price >= level * 0.995:
-                    opportunities.append({
-                        'type': '买入',
-                        'strategy': f'🛡️ 触及{name}支撑买入',
-                        'price': f"{level:.2f}",
-                        'target': f"{(level + nearest_resistance[1]) / 2:.2f}",
-                        'reason': f'价格触及{name}(¥{level:.2f})支撑位',
-                        'confidence': '中' if major_trend == '看多' else '低',
-                        'profit_potential': '+1.0-2.0%'
-                    })
-                    break
-
-            for name, level in resistances:
-                if current_price >= level * 0.995:
-                    opportunities.append({
-                        'type': '卖出',
-                        'strategy': f'⚡ 触及{name}压力卖出',
-                        'price': f"{level:.2f}",
-                        'target': f"{(nearest_support[1] + level) / 2:.2f}",
-                        'reason': f'价格触及{name}(¥{level:.2f})压力位',
-                        'confidence': '中',
-                        'profit_potential': '+1.0-2.0%'
-                    })
-                    break
+            # 复用关键价位数组，按列表顺序取第一个触及的价位
+            if not skip_buys:
+                touched = (current_price <= support_vals * 1.005) & (current_price >= support_vals * 0.995)
+                if touched.any():
+                    name, level = supports[int(touched.argmax())]
+                    opportunities.append(dict(
+                        _OPP_SUPPORT_BUY,
+                        strategy=_OPP_SUPPORT_BUY['strategy'].format(name),
+                        price=format(level, '.2f'),
+                        target=format((level + nearest_resistance[1]) / 2, '.2f'),
+                        reason=_OPP_SUPPORT_BUY['reason'].format(name, level),
+                        confidence='中' if major_trend == '看多' else '低',
+                    ))
+
+            touched = current_price >= resistance_vals * 0.995
+            if touched.any():
+                name, level = resistances[int(touched.argmax())]
+                opportunities.append(dict(
+                    _OPP_RESISTANCE_SELL,
+                    strategy=_OPP_RESISTANCE_SELL['strategy'].format(name),
+                    price=format(level, '.2f'),
+                    target=format((nearest_support[1] + level) / 2, '.2f'),
+                    reason=_OPP_RESISTANCE_SELL['reason'].format(name, level),
+                ))
 
             # ============================================================
             # 辅助策略: 放量突破（需趋势配合）
             # ============================================================
-            if vol_ratio > 2.0 and current_price > vwap and major_trend == '看多':
-                opportunities.append({
-                    'type': '买入',
-                    'strategy': '🚀 趋势看多+放量突破',
-                    'price': f"{current_price:.2f}",
-                    'target': f"{current_price * 1.025:.2f}",
-                    'reason': f'大势看多+放量{vol_ratio:.1f}倍+价格在VWAP上方，强势做T',
-                    'confidence': '高',
-                    'profit_potential': '+2.0-3.0%'
-                })
-            elif vol_ratio > 2.0 and current_price < vwap and major_trend != '看多':
-                opportunities.append({
-                    'type': '卖出',
-                    'strategy': '⚠️ 放量下跌避险',
-                    'price': f"{current_price:.2f}",
-                    'target': '观望',
-                    'reason': f'放量{vol_ratio:.1f}倍+价格在VWAP下方，风险信号',
-                    'confidence': '高',
-                    'profit_potential': '避免损失'
-                })
+            if vol_ratio > 2.0:
+                if current_price > vwap and major_trend == '看多':
+                    opportunities.append(dict(
+                        _OPP_VOLUME_BREAKOUT_BUY,
+                        price=price_str,
+                        target=format(current_price * 1.025, '.2f'),
+                        reason=_OPP_VOLUME_BREAKOUT_BUY['reason'].format(vol_ratio),
+                    ))
+                elif current_price < vwap and major_trend != '看多':
+                    opportunities.append(dict(
+                        _OPP_VOLUME_DROP_SELL,
+                        price=price_str,
+                        target='观望',
+                        reason=_OPP_VOLUME_DROP_SELL['reason'].format(vol_ratio),
+                    ))
 
             # ============================================================
             # 辅助策略: 时间窗口
             # ============================================================
-            current_hour = int(datetime.now().strftime('%H'))
+            current_hour = now.hour
             if 9 <= current_hour < 11 and self.data['change_pct'] < -2 and major_trend == '看多':
-                opportunities.append({
-                    'type': '买入',
-                    'strategy': '🌅 大势看多+早盘急跌抄底',
-                    'price': f"{self.data['low']:.2f}",
-                    'target': f"{vwap:.2f}",
-                    'reason': '大势看多但早盘恐慌杀跌，钟摆过度向下，回归机会',
-                    'confidence': '中',
-                    'profit_potential': '+2.0-4.0%'
-                })
+                opportunities.append(dict(
+                    _OPP_MORNING_DIP_BUY,
+                    price=format(self.data['low'], '.2f'),
+                    target=vwap_str,
+                ))
             elif 14 <= current_hour < 15 and self.data['change_pct'] > 3:
-                opportunities.append({
-                    'type': '卖出',
-                    'strategy': '🌆 午后大涨锁利',
-                    'price': f"{current_price:.2f}",
-                    'target': f"{vwap:.2f}",
-                    'reason': '午后大涨，钟摆过度向上，锁定利润',
-                    'confidence': '高',
-                    'profit_potential': '锁定当日利润'
-                })
-
-            # 趋势弱势时降低买入置信度
-            if major_trend == '看空':
-                for opp in opportunities:
-                    if opp['type'] == '买入':
-                        opp['confidence'] = '很低'
-                        opp['reason'] += ' ⚠️大势偏空，做T买入风险极高'
+                opportunities.append(dict(
+                    _OPP_AFTERNOON_LOCK_SELL,
+                    price=price_str,
+                    target=vwap_str,
+                ))
 
             result['trading_opportunities'] = opportunities
 
@@ -631,153 +701,183 @@ class IntradayT0Analyzer:
         else:
             # 无分时数据，基于日线给简单建议
             if major_trend == '看多' and dev_ma20 is not None and dev_ma20 < 3:
-                result['trading_opportunities'].append({
-                    'type': '买入',
-                    'strategy': '趋势看多+接近MA20',
-                    'price': f"{ma20:.2f}" if not np.isnan(ma20) else f"{current_price:.2f}",
-                    'target': f"{current_price * 1.02:.2f}",
-                    'reason': f'日线趋势向上，价格接近MA20(偏离{dev_ma20:+.1f}%)',
-                    'confidence': '中',
-                    'profit_potential': '+2.0-3.0%'
-                })
+                result['trading_opportunities'].append(dict(
+                    _OPP_DAILY_MA20_BUY,
+                    price=format(ma20 if not np.isnan(ma20) else current_price, '.2f'),
+                    target=format(current_price * 1.02, '.2f'),
+                    reason=_OPP_DAILY_MA20_BUY['reason'].format(dev_ma20),
+                ))
 
         return result
 
     def print_t0_report(self):
         """打印T+0分析报告"""
-        result = self.analyze_intraday_t0()
+        now = datetime.now()
+        result = self.analyze_intraday_t0(now)
         trend = result['trend']
         pendulum = result['pendulum']
+        # 报告先收集到 lines，最后一次性写出
+        lines = []
 
-        print("\n" + "=" * 70)
-        print(f"🔥 {self.data['name']}({self.stock_code}) T+0做T分析")
-        print("=" * 70)
+        lines.append("\n" + "=" * 70)
+        lines.append(f"🔥 {self.data['name']}({self.stock_code}) T+0做T分析")
+        lines.append("=" * 70)
 
         # 实时状态
-        print("\n━━━ 实时状态 ━━━")
+        lines.append("\n━━━ 实时状态 ━━━")
         emoji = "📈" if self.data['change_pct'] > 0 else "📉"
-        print(f"当前价: ¥{self.data['current_price']:.2f} ({emoji} {self.data['change_pct']:+.2f}%)")
-        print(f"今日区间: ¥{self.data['low']:.2f} - ¥{self.data['high']:.2f}")
-        print(f"分析时间: {result['current_time']}")
+        lines.append(f"当前价: ¥{self.data['current_price']:.2f} ({emoji} {self.data['change_pct']:+.2f}%)")
+        lines.append(f"今日区间: ¥{self.data['low']:.2f} - ¥{self.data['high']:.2f}")
+        lines.append(f"分析时间: {result['current_time']}")
 
         if '上证指数' in self.market_data:
             sz = self.market_data['上证指数']
             emoji = "📈" if sz['change_pct'] > 0 else "📉"
-            print(f"大盘: 上证指数 {sz['price']:.2f} ({emoji} {sz['change_pct']:+.2f}%)")
+            lines.append(f"大盘: 上证指数 {sz['price']:.2f} ({emoji} {sz['change_pct']:+.2f}%)")
 
         # ━━━ 核心：多级别趋势分析 ━━━
-        print("\n━━━ 多级别趋势分析（核心）━━━")
+        lines.append("\n━━━ 多级别趋势分析（核心）━━━")
         d = trend['daily']
-        print(f"周线趋势: {trend['weekly']['trend']}")
-        print(f"日线趋势: {d['direction']} | {d['alignment']}")
-        print(f"MA20方向: {d['ma20_dir']} (斜率{d['ma20_slope']:+.2f}%)")
+        lines.append(f"周线趋势: {trend['weekly']['trend']}")
+        lines.append(f"日线趋势: {d['direction']} | {d['alignment']}")
+        lines.append(f"MA20方向: {d['ma20_dir']} (斜率{d['ma20_slope']:+.2f}%)")
         h_mark = '✅' if d['highs_rising'] else '❌'
         l_mark = '✅' if d['lows_rising'] else '❌'
-        print(f"趋势定义: 近高递增{h_mark} 近低递增{l_mark} → {d['trend_def']}")
-        print(f"趋势强度: {'█' * trend['strength']}{'░' * (10 - trend['strength'])} {trend['strength']}/10")
+        lines.append(f"趋势定义: 近高递增{h_mark} 近低递增{l_mark} → {d['trend_def']}")
+        lines.append(f"趋势强度: {'█' * trend['strength']}{'░' * (10 - trend['strength'])} {trend['strength']}/10")
 
         # ━━━ 核心：钟摆位置 ━━━
-        print("\n━━━ 钟摆位置（均线偏离度）━━━")
+        lines.append("\n━━━ 钟摆位置（均线偏离度）━━━")
         for ma_name in ['MA20', 'MA60', 'MA120', 'MA250']:
             p = pendulum.get(ma_name, {})
             if p.get('value') is not None and p.get('deviation') is not None:
-                print(f"偏离{ma_name}: {p['deviation']:+.1f}% (¥{p['value']:.2f}) → {p['phase']}")
-        print(f"综合判断: {pendulum['overall']}")
+                lines.append(f"偏离{ma_name}: {p['deviation']:+.1f}% (¥{p['value']:.2f}) → {p['phase']}")
+        lines.append(f"综合判断: {pendulum['overall']}")
 
         # ━━━ 顺大势逆小势 ━━━
-        print("\n━━━ 顺大势逆小势 ━━━")
+        lines.append("\n━━━ 顺大势逆小势 ━━━")
         t0d = result['t0_direction']
-        print(f"大势方向: {t0d['major_trend']}（趋势强度 {t0d['strength']}/10）")
+        lines.append(f"大势方向: {t0d['major_trend']}（趋势强度 {t0d['strength']}/10）")
 
         if result.get('intraday'):
             intra = result['intraday']
             vwap_emoji = '上方' if intra['dev_vwap'] > 0 else '下方'
-            print(f"小势状态: 日内价格在VWAP{vwap_emoji}({intra['dev_vwap']:+.1f}%)")
-        print(f"做T建议: {t0d['bias']}")
+            lines.append(f"小势状态: 日内价格在VWAP{vwap_emoji}({intra['dev_vwap']:+.1f}%)")
+        lines.append(f"做T建议: {t0d['bias']}")
 
         # ━━━ 关键价位 ━━━
-        print("\n━━━ 关键价位（基于均线）━━━")
+        lines.append("\n━━━ 关键价位（基于均线）━━━")
         levels = result['key_levels']
         if result.get('intraday'):
-            print(f"📍 日内VWAP: ¥{result['intraday']['vwap']:.2f}（日内价值中枢）")
-        print(f"📍 当前价: ¥{levels['current']:.2f}")
+            lines.append(f"📍 日内VWAP: ¥{result['intraday']['vwap']:.2f}（日内价值中枢）")
+        lines.append(f"📍 当前价: ¥{levels['current']:.2f}")
         for name, val in levels['supports']:
-            print(f"📍 支撑-{name}: ¥{val:.2f}")
+            lines.append(f"📍 支撑-{name}: ¥{val:.2f}")
         for name, val in levels['resistances']:
-            print(f"📍 压力-{name}: ¥{val:.2f}")
+            lines.append(f"📍 压力-{name}: ¥{val:.2f}")
 
         # T+0策略
         if result['strategy']:
-            print(f"\n━━━ T+0策略 ━━━")
+            lines.append(f"\n━━━ T+0策略 ━━━")
             s = result['strategy']
-            print(f"策略类型: {s.get('type', '分析中')}")
-            print(f"策略说明: {s.get('desc', '')}")
-            print(f"操作建议: {s.get('method', '')}")
+            lines.append(f"策略类型: {s.get('type', '分析中')}")
+            lines.append(f"策略说明: {s.get('desc', '')}")
+            lines.append(f"操作建议: {s.get('method', '')}")
 
         # 交易机会
-        print(f"\n━━━ 交易机会 ━━━")
+        lines.append(f"\n━━━ 交易机会 ━━━")
         if result['trading_opportunities']:
             for i, opp in enumerate(result['trading_opportunities'], 1):
-                print(f"\n💡 机会 {i}: {opp['strategy']}")
-                print(f"   类型: {'🟢 ' + opp['type'] if opp['type'] == '买入' else '🔴 ' + opp['type']}")
-                print(f"   价格: ¥{opp['price']}")
-                print(f"   目标: ¥{opp['target']}")
-                print(f"   理由: {opp['reason']}")
-                print(f"   置信度: {opp['confidence']}")
-                print(f"   收益预期: {opp['profit_potential']}")
+                lines.append(f"\n💡 机会 {i}: {opp['strategy']}")
+                lines.append(f"   类型: {'🟢 ' + opp['type'] if opp['type'] == '买入' else '🔴 ' + opp['type']}")
+                lines.append(f"   价格: ¥{opp['price']}")
+                lines.append(f"   目标: ¥{opp['target']}")
+                lines.append(f"   理由: {opp['reason']}")
+                lines.append(f"   置信度: {opp['confidence']}")
+                lines.append(f"   收益预期: {opp['profit_potential']}")
         else:
-            print("⚪️ 当前无明确交易机会，建议观望")
+            lines.append("⚪️ 当前无明确交易机会，建议观望")
 
         # ━━━ 可选参考：传统指标 ━━━
-        print(f"\n━━━ 可选参考：传统指标（仅供参考）━━━")
-        latest = self.df_daily.iloc[-1]
-        prev = self.df_daily.iloc[-2]
-        macd_bull = latest['DIF'] > latest['DEA']
-        macd_status = '多头' if macd_bull else '空头'
-        if macd_bull and prev['DIF'] <= prev['DEA']:
-            macd_status = '🔥金叉'
-        elif not macd_bull and prev['DIF'] >= prev['DEA']:
-            macd_status = '💀死叉'
-        print(f"MACD(8,17,9): {macd_status} (DIF:{latest['DIF']:.3f} DEA:{latest['DEA']:.3f})")
-        print(f"KDJ(6,3,3): K={latest['K']:.1f} D={latest['D']:.1f} J={latest['J']:.1f}")
-        print(f"（注：MACD本质是均线偏离度的衍生，KDJ本质是偏离度的另一种计算，均线分析已覆盖）")
+        if self.include_optional:
+            lines.append(f"\n━━━ 可选参考：传统指标（仅供参考）━━━")
+            latest = self._latest
+            prev = self._prev
+            macd_bull = latest['DIF'] > latest['DEA']
+            macd_status = '多头' if macd_bull else '空头'
+            if macd_bull and prev['DIF'] <= prev['DEA']:
+                macd_status = '🔥金叉'
+            elif not macd_bull and prev['DIF'] >= prev['DEA']:
+                macd_status = '💀死叉'
+            lines.append(f"MACD(8,17,9): {macd_status} (DIF:{latest['DIF']:.3f} DEA:{latest['DEA']:.3f})")
+            lines.append(f"KDJ(6,3,3): K={latest['K']:.1f} D={latest['D']:.1f} J={latest['J']:.1f}")
+            lines.append(f"（注：MACD本质是均线偏离度的衍生，KDJ本质是偏离度的另一种计算，均线分析已覆盖）")
 
         # 风险提示
-        print(f"\n━━━ 风险提示 ━━━")
-        print("⚠️ T+0交易风险提示:")
-        print("   1. 严格止损：单次亏损不超过-1%")
-        print("   2. 分批操作：建议用1/4-1/3仓位做T")
-        print("   3. 顺大势：只在趋势向上的股票做T买入")
-        print("   4. 逆小势：利用日内回调买入，日内冲高卖出")
-        print("   5. 控制频率：建议每日1-3次，避免过度交易")
+        lines.append(f"\n━━━ 风险提示 ━━━")
+        lines.append("⚠️ T+0交易风险提示:")
+        lines.append("   1. 严格止损：单次亏损不超过-1%")
+        lines.append("   2. 分批操作：建议用1/4-1/3仓位做T")
+        lines.append("   3. 顺大势：只在趋势向上的股票做T买入")
+        lines.append("   4. 逆小势：利用日内回调买入，日内冲高卖出")
+        lines.append("   5. 控制频率：建议每日1-3次，避免过度交易")
 
         if self.market_data.get('上证指数', {}).get('change_pct', 0) < -1.5:
-            print("\n⛔️ 大盘弱势，不建议T+0交易！")
+            lines.append("\n⛔️ 大盘弱势，不建议T+0交易！")
 
         # 内功提醒
-        print(f"\n━━━ 内功提醒 ━━━")
-        print("⚠️ 技术分析只能看到「狗」（价格），看不到「人」（价值）")
-        print("   请确认您了解该股票趋势向上的基本面原因：")
-        print("   - 业绩是否在增长？行业景气度如何？")
-        print("   - 是真实的价值提升，还是资金炒作？")
-        print("   - 有没有潜在风险（财务造假、政策打压等）？")
-        print("   记住：内功为本（基本面），招式为辅（技术面）")
+        lines.append(f"\n━━━ 内功提醒 ━━━")
+        lines.append("⚠️ 技术分析只能看到「狗」（价格），看不到「人」（价值）")
+        lines.append("   请确认您了解该股票趋势向上的基本面原因：")
+        lines.append("   - 业绩是否在增长？行业景气度如何？")
+        lines.append("   - 是真实的价值提升，还是资金炒作？")
+        lines.append("   - 有没有潜在风险（财务造假、政策打压等）？")
+        lines.append("   记住：内功为本（基本面），招式为辅（技术面）")
+
+        lines.append("\n" + "=" * 70)
+        lines.append(f"⏰ 报告时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append("=" * 70 + "\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
+def main_batch(stock_codes, max_workers=4, include_optional=False):
+    """批量做T分析：同一进程内并发获取数据（复用导入与数据源缓存），按输入顺序输出报告"""
+    analyzers = [IntradayT0Analyzer(code, include_optional) for code in stock_codes]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda a: a.fetch_data(), analyzers))
+
+    failed = []
+    for analyzer, ok in zip(analyzers, results):
+        if ok:
+            analyzer.print_t0_report()
+        else:
+            failed.append(analyzer.stock_code)
 
-        print("\n" + "=" * 70)
-        print(f"⏰ 报告时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 70 + "\n")
+    if failed:
+        print(f"\n❌ 以下股票分析失败: {', '.join(failed)}")
+    return not failed
 
 
 def main():
     import sys
 
-    if len(sys.argv) < 2:
-        print("使用方法: python3 analyze_intraday_t0.py <股票代码>")
+    include_optional = '--with-macd-kdj' in sys.argv[1:]
+    stock_codes = [a for a in sys.argv[1:] if not a.startswith('--')]
+
+    if not stock_codes:
+        print("使用方法: python3 analyze_intraday_t0.py <股票代码> [股票代码 ...] [--with-macd-kdj]")
         print("示例: python3 analyze_intraday_t0.py 600519")
+        print("批量: python3 analyze_intraday_t0.py 600519 000001 300750")
+        print("附带 MACD/KDJ 参考: python3 analyze_intraday_t0.py 600519 --with-macd-kdj")
         sys.exit(1)
 
-    stock_code = sys.argv[1]
-    analyzer = IntradayT0Analyzer(stock_code)
+    if len(stock_codes) > 1:
+        if not main_batch(stock_codes, include_optional=include_optional):
+            sys.exit(1)
+        return
+
+    stock_code = stock_codes[0]
+    analyzer = IntradayT0Analyzer(stock_code, include_optional)
 
     if analyzer.fetch_data():
         analyzer.print_t0_report()
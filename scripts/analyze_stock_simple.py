@@ -12,80 +12,224 @@
 
 import pandas as pd
 import numpy as np
+from math import isnan
 from datetime import datetime, timedelta
-import warnings
-import time
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-warnings.filterwarnings('ignore')
-
-# 导入基本面分析模块、数据源适配层和公共技术指标
+# 导入数据源适配层和公共技术指标（基本面分析模块依赖 akshare，在 _get_fundamental_analyzer() 中按需导入）
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from fundamental_analyzer import FundamentalAnalyzer
 from data_source import DataSource
+from technical_stream import IndicatorStream
 from technical import (
-    calculate_all_indicators, detect_highs_lows,
+    MA_WINDOWS, calculate_all_indicators_fused, calculate_swing_points, update_swing_points, detect_highs_lows,
     analyze_ma_alignment, calculate_pendulum, calculate_trend_strength,
-    detect_topping_signals,
+    detect_topping_signals, compute_analysis_snapshot,
+)
+
+
+# 均线排列查表：键为排列强度（正=多头，负=空头），值为 (描述, 关键信号)
+# 强度 = 短→长依次满足的多头(空头)比较个数：MA5>10 → 1，再 MA10>20 → 2，再 MA20>60 → 3
+_MA_TREND_TABLE = {
+    3: ('完美多头排列', '⭐ 均线完美多头排列（MA5>10>20>60）'),
+    2: ('多头排列', '⭐ 均线多头排列（MA5>10>20）'),
+    1: ('短期偏多', None),
+    0: ('震荡缠绕', None),
+    -1: ('短期偏空', None),
+    -2: ('偏空排列', None),
+    -3: ('空头排列', '⛔ 均线空头排列（MA5<10<20<60）'),
+}
+
+
+# 钟摆/趋势强度评分规则表：每张表内按顺序取第一条命中的规则
+# 规则为 (条件, 买入分, 卖出分, 描述模板, 关键信号模板)，条件与模板字段均取自分析快照
+_SHORT_PENDULUM_RULES = (
+    (lambda s: s.dev_ma5 <= 1 and s.dev_ma10 <= 2, 1, 0,   # 短期均线收敛，安全
+     '短期均线收敛(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)', None),
+    (lambda s: s.dev_ma5 > 5 and s.dev_ma10 > 4, 0, 1,     # 短期过热
+     '短期过热(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)', None),
+    (lambda s: s.dev_ma5 < -3 and s.dev_ma10 < -2, 1, 0,   # 短期超跌
+     '短期超跌(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)', None),
+)
+_MA20_PENDULUM_RULES = (
+    (lambda s: -3 <= s.dev_ma20 <= 3, 2, 0, 'MA20中枢附近({dev_ma20:+.1f}%)', None),  # 中枢附近，适合买入
+    (lambda s: s.dev_ma20 > 8, 0, 2, 'MA20偏离过大({dev_ma20:+.1f}%)',
+     '⚠️ 价格偏离MA20达{dev_ma20:+.1f}%，回归压力增大'),
+    (lambda s: s.dev_ma20 > 5, 0, 1, 'MA20偏高({dev_ma20:+.1f}%)', None),
+    (lambda s: s.dev_ma20 < -8, 2, 0, 'MA20过度偏低({dev_ma20:+.1f}%)',
+     '⭐ 价格偏离MA20达{dev_ma20:+.1f}%，反弹动力增大'),
+    (lambda s: s.dev_ma20 < -5, 1, 0, 'MA20偏低({dev_ma20:+.1f}%)', None),
+)
+_MA60_PENDULUM_RULES = (
+    (lambda s: s.dev_ma60 > 15, 0, 2, 'MA60偏离大({dev_ma60:+.1f}%)',
+     '⛔ 价格偏离MA60达{dev_ma60:+.1f}%，绳子很紧'),
+    (lambda s: s.dev_ma60 > 8, 0, 1, 'MA60偏高({dev_ma60:+.1f}%)', None),
+    (lambda s: -3 <= s.dev_ma60 <= 5, 1, 0, 'MA60附近({dev_ma60:+.1f}%)', None),
+    (lambda s: s.dev_ma60 < -10, 2, 0, 'MA60偏离大({dev_ma60:+.1f}%)', None),
+    (lambda s: s.dev_ma60 < -5, 1, 0, 'MA60偏低({dev_ma60:+.1f}%)', None),
 )
+_MA20_SLOPE_RULES = (
+    (lambda s: s.ma20_slope > 2, 2, 0, 'MA20加速上行({ma20_slope:+.1f}%)', None),
+    (lambda s: s.ma20_slope > 0, 1, 0, 'MA20上行({ma20_slope:+.1f}%)', None),
+    (lambda s: s.ma20_slope < -2, 0, 2, 'MA20加速下行({ma20_slope:+.1f}%)', None),
+    (lambda s: s.ma20_slope < 0, 0, 1, 'MA20下行({ma20_slope:+.1f}%)', None),
+)
+_CHANGE_20D_RULES = (
+    (lambda s: s.change_20d > 10, 2, 0, '20日强势(+{change_20d:.1f}%)', None),
+    (lambda s: s.change_20d > 3, 1, 0, '20日偏强(+{change_20d:.1f}%)', None),
+    (lambda s: s.change_20d < -10, 0, 2, '20日弱势({change_20d:+.1f}%)', None),
+    (lambda s: s.change_20d < -3, 0, 1, '20日偏弱({change_20d:+.1f}%)', None),
+)
+
+
+# 已获取数据的基本面分析器，按股票代码复用（批量/常驻模式下同一代码不重复拉取财报）
+# 与 DataSource 内存缓存相同：按最近访问排序，超出上限淘汰最久未访问的，过期后重新获取
+_fundamental_analyzers = OrderedDict()  # stock_code -> (analyzer, expires_at)
+_fundamental_lock = threading.Lock()  # 批量模式下各线程共用
+_FUNDAMENTAL_TTL = 6 * 3600  # 财报数据日内基本不变，常驻进程跨日运行时仍会刷新
+_FUNDAMENTAL_MAXSIZE = 256
+
+# 常驻模式下大盘环境的有效期（秒），过期后在下一只股票前重新获取
+_MARKET_CONTEXT_TTL = 300
+
+
+def _get_fundamental_analyzer(stock_code, stock_name=None):
+    """取（必要时创建并获取数据）指定股票的基本面分析器；akshare 依赖在此按需导入"""
+    with _fundamental_lock:
+        cached = _fundamental_analyzers.get(stock_code)
+        if cached is not None:
+            if time.time() < cached[1]:
+                _fundamental_analyzers.move_to_end(stock_code)
+                return cached[0]
+            del _fundamental_analyzers[stock_code]
+
+    # 财报获取是网络请求，不持锁
+    from fundamental_analyzer import FundamentalAnalyzer
+    fa = FundamentalAnalyzer(stock_code, stock_name)
+    fa.fetch_all_data()
+
+    with _fundamental_lock:
+        _fundamental_analyzers[stock_code] = (fa, time.time() + _FUNDAMENTAL_TTL)
+        _fundamental_analyzers.move_to_end(stock_code)
+        while len(_fundamental_analyzers) > _FUNDAMENTAL_MAXSIZE:
+            _fundamental_analyzers.popitem(last=False)
+    return fa
+
+
+def fetch_market_context(sz_df=None):
+    """
+    获取大盘环境（上证指数最新价与涨跌幅），返回 market_data dict
+
+    批量分析时在开始前获取一次，注入各 SimpleStockAnalyzer 共享，避免每只股票重复请求指数。
+    未传入 sz_df 时自行获取（使用 baostock）；获取失败返回空 dict。
+    """
+    market_data = {}
+    try:
+        if sz_df is None:
+            sz_df = DataSource.get_stock_hist('000001', period='daily')
+        if sz_df is not None and not sz_df.empty and len(sz_df) >= 2:
+            sz_close = sz_df['收盘']
+            latest_close = sz_close.iat[-1]
+            prev_close = sz_close.iat[-2]
+            market_data['上证指数'] = {
+                'price': latest_close,
+                'change_pct': ((latest_close - prev_close) / prev_close) * 100
+            }
+    except:
+        pass
+
+    # 行业数据暂时无法从 baostock 获取，跳过
+    # 可以考虑从其他数据源补充，或者不显示行业数据
+    return market_data
+
+
+def _apply_rules(rules, snap, details, key_signals):
+    """按顺序匹配规则表，命中第一条即停止；追加描述/关键信号，返回 (买入分, 卖出分)"""
+    for cond, buy, sell, label, key in rules:
+        if cond(snap):
+            values = vars(snap)
+            details.append(label.format_map(values))
+            if key:
+                key_signals.append(key.format_map(values))
+            return buy, sell
+    return 0, 0
 
 
 class SimpleStockAnalyzer:
     """股票综合分析器 — 基于趋势+均线+钟摆模型"""
 
-    def __init__(self, stock_code):
+    def __init__(self, stock_code, quiet=False, market_data=None):
         self.stock_code = stock_code
+        self.quiet = quiet  # 批量精简模式：不打印获取进度
+        self._shared_market_data = market_data  # 批量共享的大盘环境（见 fetch_market_context）
         self.df = None
         self.df_weekly = None
+        self.cols = {}  # 日线各列的 numpy 数组（分析热路径使用，DataFrame 仅用于展示）
         self.data = {}
         self.market_data = {}
+        self._indicators_done = False  # 指标是否已按当前数据计算
+        self._analysis = None          # analyze() 结果缓存，数据刷新时清空
+        self._stream = None            # update_last_bar 的逐根指标状态（截至倒数第二根K线）
+        self._fa = None                # 基本面分析器（fetch_data 中与行情并发获取，失败为 None）
 
     def fetch_data(self):
         """获取股票数据（使用 baostock，扩展至400天，支持MA120/MA250）"""
         try:
-            print(f"📊 正在获取 {self.stock_code} 的数据...")
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=400)
+            if not self.quiet:
+                print(f"📊 正在获取 {self.stock_code} 的数据...")
+
+            # 重新获取数据后，指标与分析结果都需重算
+            self._indicators_done = False
+            self._analysis = None
+            self._stream = None
+
+            # 日期用字符串传入，保证 DataSource 内存缓存键在当日内稳定
+            now = datetime.now()
+            end_date = now.strftime('%Y-%m-%d')
+            start_date = (now - timedelta(days=400)).strftime('%Y-%m-%d')
+
+            # 日K/周K/上证指数/基本面均为网络 I/O，线程池并发后总耗时≈最慢的单个请求
+            # （baostock 会话由 DataSource 内部加锁保护）
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                daily_future = executor.submit(
+                    DataSource.get_stock_hist,
+                    stock_code=self.stock_code, start_date=start_date, end_date=end_date,
+                    adjust='qfq', period='daily',
+                )
+                weekly_future = executor.submit(
+                    DataSource.get_stock_hist,
+                    stock_code=self.stock_code, start_date=start_date, end_date=end_date,
+                    adjust='qfq', period='weekly',
+                )
+                market_future = None
+                if self._shared_market_data is None:
+                    market_future = executor.submit(DataSource.get_stock_hist, '000001', period='daily')
+                fundamental_future = executor.submit(
+                    _get_fundamental_analyzer, self.stock_code, f'股票{self.stock_code}',
+                )
 
-            # 使用 baostock 获取日K线
-            self.df = DataSource.get_stock_hist(
-                stock_code=self.stock_code,
-                start_date=start_date,
-                end_date=end_date,
-                adjust='qfq',
-                period='daily'
-            )
+            # 日K线
+            self.df = daily_future.result()
 
             if self.df is None or self.df.empty:
                 print(f"❌ 无法获取股票 {self.stock_code} 的历史数据")
                 return False
 
-            # 获取周K线
+            # 周K线（失败不影响日线分析）
             try:
-                self.df_weekly = DataSource.get_stock_hist(
-                    stock_code=self.stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust='qfq',
-                    period='weekly'
-                )
+                self.df_weekly = weekly_future.result()
             except:
                 self.df_weekly = None
 
-            latest = self.df.iloc[-1]
-
-            self.data = {
-                'name': f'股票{self.stock_code}',
-                'current_price': latest['收盘'],
-                'change_pct': ((latest['收盘'] - self.df.iloc[-2]['收盘']) / self.df.iloc[-2]['收盘']) * 100,
-                'high': latest['最高'],
-                'low': latest['最低'],
-                'open': latest['开盘'],
-                'volume': latest['成交量'],
-                'turnover': latest['换手率'] if '换手率' in latest else 0
-            }
+            # 计算技术指标（同时生成列数组 self.cols）
+            self.calculate_indicators()
+
+            self.data = {'name': f'股票{self.stock_code}'}
+            self._refresh_quote()
 
             # baostock 数据中已包含股票代码，可从中提取名称
             # 但为了兼容性，仍保留从 code 列提取（如果有）
@@ -94,8 +238,21 @@ class SimpleStockAnalyzer:
                 # 名称需要单独查询，暂时保持默认
                 pass
 
-            self.calculate_indicators()
-            self.fetch_market_data()
+            # 市场数据（批量共享的大盘环境，或随上面的线程池一起获取的上证指数）
+            if self._shared_market_data is not None:
+                self.market_data = dict(self._shared_market_data)
+            else:
+                try:
+                    sz_df = market_future.result()
+                except:
+                    sz_df = None
+                self.fetch_market_data(sz_df)
+
+            # 基本面（失败时 analyze() 仅展示技术面）
+            try:
+                self._fa = fundamental_future.result()
+            except Exception:
+                self._fa = None
 
             return True
 
@@ -105,30 +262,31 @@ class SimpleStockAnalyzer:
             traceback.print_exc()
             return False
 
-    def fetch_market_data(self):
-        """获取市场数据（使用 baostock）"""
-        try:
-            # 获取上证指数
-            try:
-                sz_df = DataSource.get_stock_hist('000001', period='daily')
-                if sz_df is not None and not sz_df.empty and len(sz_df) >= 2:
-                    latest_sz = sz_df.iloc[-1]
-                    prev_sz = sz_df.iloc[-2]
-                    self.market_data['上证指数'] = {
-                        'price': latest_sz['收盘'],
-                        'change_pct': ((latest_sz['收盘'] - prev_sz['收盘']) / prev_sz['收盘']) * 100
-                    }
-            except:
-                pass
-
-            # 行业数据暂时无法从 baostock 获取，跳过
-            # 可以考虑从其他数据源补充，或者不显示行业数据
-        except:
-            pass
+    def _refresh_quote(self):
+        """由最后两根日K更新当前价格/涨跌幅等行情字段"""
+        cols = self.cols
+        close = cols['收盘']
+        self.data.update({
+            'current_price': close[-1],
+            'change_pct': ((close[-1] - close[-2]) / close[-2]) * 100,
+            'high': cols['最高'][-1],
+            'low': cols['最低'][-1],
+            'open': cols['开盘'][-1],
+            'volume': cols['成交量'][-1],
+            'turnover': cols['换手率'][-1] if '换手率' in cols else 0
+        })
+
+    def fetch_market_data(self, sz_df=None):
+        """整理市场数据；未传入上证指数数据时自行获取（使用 baostock）"""
+        self.market_data.update(fetch_market_context(sz_df))
 
     def calculate_indicators(self):
-        """计算技术指标 — 使用公共模块"""
-        calculate_all_indicators(self.df)
+        """计算技术指标 — 使用公共模块（每次数据刷新只计算一次）"""
+        if self._indicators_done:
+            return
+        self.df = calculate_all_indicators_fused(self.df)
+        # 局部高低点一次性标记，供高低点递增/见顶背离检测直接截取
+        calculate_swing_points(self.df)
 
         # 周线均线
         if self.df_weekly is not None and not self.df_weekly.empty:
@@ -139,12 +297,104 @@ class SimpleStockAnalyzer:
                 if f'MA{w}' in self.df_weekly.columns:
                     self.df_weekly[f'W_MA{w}'] = self.df_weekly[f'MA{w}']
 
+        # 指标算完后一次性取出各列数组，后续分析按下标取值，不再做行 Series 访问
+        self.cols = {c: self.df[c].to_numpy() for c in self.df.columns}
+        self._indicators_done = True
+
+    def update_last_bar(self, bar):
+        """
+        用最新行情增量更新最后一根日K及其指标（盘中刷新，无需重新获取/全量计算）
+
+        参数:
+            bar: dict，至少含 '收盘'，可选 '开盘'/'最高'/'最低'/'成交量'/'成交额'/'日期'。
+                 未给出日期或日期与最后一根相同 → 替换最后一根（未给出的字段保持原值）；
+                 日期不同 → 追加为新K线（未给出的价格取 '收盘'，成交量取 0）。
+
+        指标由截至倒数第二根K线的逐根推送状态（technical_stream.IndicatorStream）对最后一根
+        求值，不随历史长度增长；参数与全量计算共用 technical 的默认值，结果逐位一致。
+        K线不足最长均线窗口时长期均线列可能随新K线出现，直接全量重算。
+
+        返回:
+            bool: 是否已更新（数据不足两根K线或尚未计算指标时返回 False）
+        """
+        if self.df is None or len(self.df) < 2 or not self._indicators_done:
+            return False
+
+        date = bar.get('日期')
+        new_bar = date is not None and str(date) != str(self.df['日期'].iat[-1])
+        if new_bar:
+            price = bar['收盘']
+            row = {'日期': date, '开盘': price, '最高': price, '最低': price, '成交量': 0}
+            row.update(bar)
+        else:
+            row = {k: v for k, v in bar.items() if k != '日期'}
+        for col in row:
+            # 整数列（如成交量）先转 float，避免写入小数时的隐式类型提升
+            if col in self.df.columns and self.df[col].dtype.kind in 'iu':
+                self.df[col] = self.df[col].astype(np.float64)
+
+        if len(self.df) + new_bar <= MA_WINDOWS[-1]:
+            self._write_last_bar(row, new_bar)
+            self._indicators_done = False
+            self._stream = None
+            self.calculate_indicators()
+        else:
+            if self._stream is None:
+                # 首次增量更新：用倒数第二根K线及之前的数据建立推送状态
+                self._stream = IndicatorStream.from_history(*(self.cols[c][:-1] for c in self._STREAM_INPUTS))
+            if new_bar:
+                # 新K线：原最后一根已定型，推入状态
+                self._stream.push(*(self.cols[c][-1] for c in self._STREAM_INPUTS))
+            self._write_last_bar(row, new_bar)
+
+            # 只求最后一根K线的指标
+            df = self.df
+            updates = self._stream.peek(*(df[c].iat[-1] for c in self._STREAM_INPUTS))
+            if '涨跌幅' in df.columns:
+                prev_close = np.float64(df['收盘'].iat[-2])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    updates['涨跌幅'] = (df['收盘'].iat[-1] - prev_close) / prev_close * 100
+            updates = {c: v for c, v in updates.items() if c in df.columns}
+            self._set_last_values(updates)
+            update_swing_points(df)
+            if new_bar:
+                self.cols = {c: df[c].to_numpy() for c in df.columns}
+            else:
+                for c in (*row, *updates, 'SWING_HIGH', 'SWING_LOW'):
+                    if c in df.columns:
+                        self.cols[c] = df[c].to_numpy()
+
+        self._refresh_quote()
+        self._analysis = None
+        return True
+
+    # IndicatorStream.push/peek 的输入列
+    _STREAM_INPUTS = ('收盘', '最高', '最低', '成交量')
+
+    def _write_last_bar(self, row, new_bar):
+        """写入最后一根K线：新K线按位置追加（不依赖索引标签），否则按位置覆盖已有列"""
+        if new_bar:
+            # 局部高低点标记列先补 False，保持 bool 类型（最后2根按口径恒为 False）
+            row = {**{c: False for c in ('SWING_HIGH', 'SWING_LOW') if c in self.df.columns}, **row}
+            self.df = pd.concat([self.df, pd.DataFrame([row])], ignore_index=True)
+        else:
+            self._set_last_values({c: v for c, v in row.items() if c in self.df.columns})
+
+    def _set_last_values(self, values):
+        """按位置逐列写入最后一行（逐列 iat 比多列 iloc 赋值快一个数量级）"""
+        df = self.df
+        last = len(df) - 1
+        for col, value in values.items():
+            df.iat[last, df.columns.get_loc(col)] = value
+
     def analyze(self):
-        """综合分析 — 以趋势+均线+钟摆为核心"""
-        latest = self.df.iloc[-1]
-        prev = self.df.iloc[-2]
-        prev2 = self.df.iloc[-3] if len(self.df) >= 3 else prev
+        """综合分析 — 以趋势+均线+钟摆为核心（结果缓存，重复调用直接返回）"""
+        if self._analysis is not None:
+            return self._analysis
+
         current_price = self.data['current_price']
+        # 均线/偏离度/量能/MACD/KDJ 等标量一次性取出
+        snap = compute_analysis_snapshot(self.cols, current_price)
 
         signals = {
             'buy': 0, 'sell': 0,
@@ -159,40 +409,26 @@ class SimpleStockAnalyzer:
         trend_sell = 0
         trend_details = []
 
-        ma5 = latest['MA5']
-        ma10 = latest['MA10']
-        ma20 = latest['MA20']
-        ma60 = latest.get('MA60', np.nan)
-        ma120 = latest.get('MA120', np.nan)
-
-        # 均线排列
-        has_ma60 = not (isinstance(ma60, float) and np.isnan(ma60))
-        if has_ma60 and ma5 > ma10 > ma20 > ma60:
-            trend_buy += 3
-            trend_details.append('完美多头排列')
-            signals['key_signals'].append('⭐ 均线完美多头排列（MA5>10>20>60）')
-        elif ma5 > ma10 > ma20:
-            trend_buy += 2
-            trend_details.append('多头排列')
-            signals['key_signals'].append('⭐ 均线多头排列（MA5>10>20）')
-        elif ma5 > ma10:
-            trend_buy += 1
-            trend_details.append('短期偏多')
-        elif has_ma60 and ma5 < ma10 < ma20 < ma60:
-            trend_sell += 3
-            trend_details.append('空头排列')
-            signals['key_signals'].append('⛔ 均线空头排列（MA5<10<20<60）')
-        elif ma5 < ma10 < ma20:
-            trend_sell += 2
-            trend_details.append('偏空排列')
-        elif ma5 < ma10:
-            trend_sell += 1
-            trend_details.append('短期偏空')
-        else:
-            trend_details.append('震荡缠绕')
+        ma5 = snap.ma5
+        ma10 = snap.ma10
+        ma20 = snap.ma20
+        ma60 = snap.ma60
+        ma120 = snap.ma120
+
+        # 均线排列：比较结果按位组合成排列强度后查表（NaN 比较为 False，缺失均线自然不计入）
+        has_ma60 = not isnan(ma60)
+        bull = (ma5 > ma10) * (1 + (ma10 > ma20) * (1 + (ma20 > ma60)))
+        bear = (ma5 < ma10) * (1 + (ma10 < ma20) * (1 + (ma20 < ma60)))
+        alignment = bull - bear  # MA5>10 与 MA5<10 互斥，二者至多一个非零
+        desc, key_signal = _MA_TREND_TABLE[alignment]
+        trend_buy += max(alignment, 0)
+        trend_sell += max(-alignment, 0)
+        trend_details.append(desc)
+        if key_signal:
+            signals['key_signals'].append(key_signal)
 
         # 高低点递增/递减（使用公共模块）
-        hl = detect_highs_lows(self.df)
+        hl = detect_highs_lows(self.cols)
 
         if hl['highs_rising']:
             trend_buy += 1
@@ -208,7 +444,7 @@ class SimpleStockAnalyzer:
             trend_details.append('低点递减')
 
         # 价格与MA120的关系
-        has_ma120 = not (isinstance(ma120, float) and np.isnan(ma120))
+        has_ma120 = not isnan(ma120)
         if has_ma120 and current_price > ma120:
             trend_buy += 1
             trend_details.append('价格>MA120')
@@ -227,60 +463,20 @@ class SimpleStockAnalyzer:
         pendulum_sell = 0
         pendulum_details = []
 
-        dev_ma5 = (current_price - ma5) / ma5 * 100 if not np.isnan(ma5) else 0
-        dev_ma10 = (current_price - ma10) / ma10 * 100 if not np.isnan(ma10) else 0
-        dev_ma20 = (current_price - ma20) / ma20 * 100 if not np.isnan(ma20) else 0
-        dev_ma60 = (current_price - ma60) / ma60 * 100 if has_ma60 else 0
-        dev_ma120 = (current_price - ma120) / ma120 * 100 if has_ma120 else 0
-
-        # --- 短期钟摆（MA5/MA10联合判断）---
-        if dev_ma5 <= 1 and dev_ma10 <= 2:
-            pendulum_buy += 1  # 短期均线收敛，安全
-            pendulum_details.append(f'短期均线收敛(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)')
-        elif dev_ma5 > 5 and dev_ma10 > 4:
-            pendulum_sell += 1  # 短期过热
-            pendulum_details.append(f'短期过热(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)')
-        elif dev_ma5 < -3 and dev_ma10 < -2:
-            pendulum_buy += 1  # 短期超跌
-            pendulum_details.append(f'短期超跌(MA5:{dev_ma5:+.1f}%/MA10:{dev_ma10:+.1f}%)')
-
-        # --- 中期钟摆（MA20）---
-        if -3 <= dev_ma20 <= 3:
-            pendulum_buy += 2  # 中枢附近，适合买入
-            pendulum_details.append(f'MA20中枢附近({dev_ma20:+.1f}%)')
-        elif dev_ma20 > 8:
-            pendulum_sell += 2  # 过度偏高
-            pendulum_details.append(f'MA20偏离过大({dev_ma20:+.1f}%)')
-            signals['key_signals'].append(f'⚠️ 价格偏离MA20达{dev_ma20:+.1f}%，回归压力增大')
-        elif dev_ma20 > 5:
-            pendulum_sell += 1
-            pendulum_details.append(f'MA20偏高({dev_ma20:+.1f}%)')
-        elif dev_ma20 < -8:
-            pendulum_buy += 2  # 过度偏低
-            pendulum_details.append(f'MA20过度偏低({dev_ma20:+.1f}%)')
-            signals['key_signals'].append(f'⭐ 价格偏离MA20达{dev_ma20:+.1f}%，反弹动力增大')
-        elif dev_ma20 < -5:
-            pendulum_buy += 1
-            pendulum_details.append(f'MA20偏低({dev_ma20:+.1f}%)')
-
-        # --- 季度钟摆（MA60）---
+        dev_ma5 = snap.dev_ma5
+        dev_ma10 = snap.dev_ma10
+        dev_ma20 = snap.dev_ma20
+        dev_ma60 = snap.dev_ma60
+        dev_ma120 = snap.dev_ma120
+
+        # 短期钟摆（MA5/MA10联合判断）→ 中期钟摆（MA20）→ 季度钟摆（MA60，需有MA60）
+        pendulum_rules = (_SHORT_PENDULUM_RULES, _MA20_PENDULUM_RULES)
         if has_ma60:
-            if dev_ma60 > 15:
-                pendulum_sell += 2
-                pendulum_details.append(f'MA60偏离大({dev_ma60:+.1f}%)')
-                signals['key_signals'].append(f'⛔ 价格偏离MA60达{dev_ma60:+.1f}%，绳子很紧')
-            elif dev_ma60 > 8:
-                pendulum_sell += 1
-                pendulum_details.append(f'MA60偏高({dev_ma60:+.1f}%)')
-            elif -3 <= dev_ma60 <= 5:
-                pendulum_buy += 1
-                pendulum_details.append(f'MA60附近({dev_ma60:+.1f}%)')
-            elif dev_ma60 < -10:
-                pendulum_buy += 2
-                pendulum_details.append(f'MA60偏离大({dev_ma60:+.1f}%)')
-            elif dev_ma60 < -5:
-                pendulum_buy += 1
-                pendulum_details.append(f'MA60偏低({dev_ma60:+.1f}%)')
+            pendulum_rules += (_MA60_PENDULUM_RULES,)
+        for rules in pendulum_rules:
+            buy, sell = _apply_rules(rules, snap, pendulum_details, signals['key_signals'])
+            pendulum_buy += buy
+            pendulum_sell += sell
 
         signals['buy'] += min(5, pendulum_buy)
         signals['sell'] += min(5, pendulum_sell)
@@ -295,39 +491,13 @@ class SimpleStockAnalyzer:
         strength_sell = 0
         strength_details = []
 
-        # MA20斜率
-        ma20_slope = latest.get('MA20_slope', 0)
-        if isinstance(ma20_slope, float) and np.isnan(ma20_slope):
-            ma20_slope = 0
-
-        if ma20_slope > 2:
-            strength_buy += 2
-            strength_details.append(f'MA20加速上行({ma20_slope:+.1f}%)')
-        elif ma20_slope > 0:
-            strength_buy += 1
-            strength_details.append(f'MA20上行({ma20_slope:+.1f}%)')
-        elif ma20_slope < -2:
-            strength_sell += 2
-            strength_details.append(f'MA20加速下行({ma20_slope:+.1f}%)')
-        elif ma20_slope < 0:
-            strength_sell += 1
-            strength_details.append(f'MA20下行({ma20_slope:+.1f}%)')
-
-        # 近20日涨幅（相对强度）
-        price_20d_ago = self.df.iloc[-20]['收盘'] if len(self.df) >= 20 else current_price
-        change_20d = (current_price - price_20d_ago) / price_20d_ago * 100
-        if change_20d > 10:
-            strength_buy += 2
-            strength_details.append(f'20日强势(+{change_20d:.1f}%)')
-        elif change_20d > 3:
-            strength_buy += 1
-            strength_details.append(f'20日偏强(+{change_20d:.1f}%)')
-        elif change_20d < -10:
-            strength_sell += 2
-            strength_details.append(f'20日弱势({change_20d:+.1f}%)')
-        elif change_20d < -3:
-            strength_sell += 1
-            strength_details.append(f'20日偏弱({change_20d:+.1f}%)')
+        # MA20斜率 + 近20日涨幅（相对强度）
+        ma20_slope = snap.ma20_slope
+        change_20d = snap.change_20d
+        for rules in (_MA20_SLOPE_RULES, _CHANGE_20D_RULES):
+            buy, sell = _apply_rules(rules, snap, strength_details, signals['key_signals'])
+            strength_buy += buy
+            strength_sell += sell
 
         signals['buy'] += min(4, strength_buy)
         signals['sell'] += min(4, strength_sell)
@@ -342,8 +512,8 @@ class SimpleStockAnalyzer:
         vol_sell = 0
         vol_details = []
 
-        vol_ratio = latest['成交量'] / latest['VOL_MA5'] if latest['VOL_MA5'] > 0 else 1
-        vol_ratio_20 = latest['成交量'] / latest['VOL_MA20'] if 'VOL_MA20' in latest and latest['VOL_MA20'] > 0 else 1
+        vol_ratio = snap.volume / snap.vol_ma5 if snap.vol_ma5 > 0 else 1
+        vol_ratio_20 = snap.volume / snap.vol_ma20 if snap.vol_ma20 > 0 else 1
 
         if vol_ratio > 1.5 and self.data['change_pct'] > 0:
             vol_buy += 2
@@ -381,9 +551,9 @@ class SimpleStockAnalyzer:
         legacy_details = []
 
         # MACD
-        macd_bull = latest['DIF'] > latest['DEA']
-        macd_golden = macd_bull and prev['DIF'] <= prev['DEA']
-        macd_death = not macd_bull and prev['DIF'] >= prev['DEA']
+        macd_bull = snap.dif > snap.dea
+        macd_golden = macd_bull and snap.prev_dif <= snap.prev_dea
+        macd_death = not macd_bull and snap.prev_dif >= snap.prev_dea
 
         if macd_golden:
             legacy_buy += 1
@@ -397,11 +567,11 @@ class SimpleStockAnalyzer:
             legacy_details.append('MACD空头')
 
         # KDJ
-        j_value = latest['J']
-        k_value = latest['K']
-        d_value = latest['D']
-        kdj_golden = k_value > d_value and prev['K'] <= prev['D']
-        kdj_death = k_value < d_value and prev['K'] >= prev['D']
+        j_value = snap.j
+        k_value = snap.k
+        d_value = snap.d
+        kdj_golden = k_value > d_value and snap.prev_k <= snap.prev_d
+        kdj_death = k_value < d_value and snap.prev_k >= snap.prev_d
 
         if kdj_golden and j_value < 30:
             legacy_buy += 1
@@ -418,13 +588,18 @@ class SimpleStockAnalyzer:
         signals['sell'] += min(2, legacy_sell)
 
         legacy_status = '✅' if legacy_buy > legacy_sell else ('❌' if legacy_sell > legacy_buy else '⚠️')
-        signals['indicators']['传统指标(参考)'] = f'{legacy_status} {"/".join(legacy_details)} (DIF:{latest["DIF"]:.3f} K:{k_value:.0f} J:{j_value:.0f})'
+        signals['indicators']['传统指标(参考)'] = f'{legacy_status} {"/".join(legacy_details)} (DIF:{snap.dif:.3f} K:{k_value:.0f} J:{j_value:.0f})'
 
         # ============================================================
         # 核心维度: 见顶/出货检测
         # 场景：MA20向上但短期连续下跌，判断行情是否结束
+        # 已处明确下跌趋势（趋势卖出分≥3）或K线不足20根时，见顶判断无意义/不可靠，直接跳过
         # ============================================================
-        topping = detect_topping_signals(self.df, current_price)
+        topping_skipped = trend_sell >= 3 or len(self.cols['收盘']) < 20
+        if topping_skipped:
+            topping = {'score': 0, 'signals': [], 'level': '不适用', 'is_topping': False, 'details': {}}
+        else:
+            topping = detect_topping_signals(self.cols, current_price)
         topping_score = topping['score']
 
         if topping_score >= 70:
@@ -440,7 +615,10 @@ class SimpleStockAnalyzer:
         for sig in topping['signals']:
             signals['key_signals'].append(f'  → {sig}')
 
-        signals['indicators']['见顶检测'] = f"{'🔴 危险' if topping_score >= 70 else '🟠 警惕' if topping_score >= 50 else '🟡 注意' if topping_score >= 30 else '✅ 安全'}（{topping_score}分）"
+        if topping_skipped:
+            signals['indicators']['见顶检测'] = '⚪️ 不适用（已处下跌趋势或数据不足）'
+        else:
+            signals['indicators']['见顶检测'] = f"{'🔴 危险' if topping_score >= 70 else '🟠 警惕' if topping_score >= 50 else '🟡 注意' if topping_score >= 30 else '✅ 安全'}（{topping_score}分）"
 
         # ============================================================
         # 市场环境调整
@@ -482,8 +660,9 @@ class SimpleStockAnalyzer:
         fundamental_result = None
         fundamental_score = 0
         try:
-            fa = FundamentalAnalyzer(self.stock_code, self.data.get('name'))
-            fa.fetch_all_data()
+            fa = self._fa
+            if fa is None:
+                raise RuntimeError('基本面数据获取失败')
             fundamental_result = fa.get_fundamental_score()
             fundamental_score = fundamental_result['total']
             self._fundamental_report = fa.get_report_text()
@@ -497,10 +676,10 @@ class SimpleStockAnalyzer:
         sell_score = tech_sell + max(0, 50 - fundamental_score)  # 基本面差时增加卖出分
 
         # 价格建议
-        support = ma20 if not np.isnan(ma20) else latest['MA10']
+        support = ma20 if not isnan(ma20) else ma10
         if has_ma60 and ma60 < support:
             support = ma60
-        resistance = max(latest['MA5'], self.data['high'])
+        resistance = max(ma5, self.data['high'])
 
         buy_price_low = support * 0.99
         buy_price_high = current_price * 0.995
@@ -590,7 +769,7 @@ class SimpleStockAnalyzer:
             position = '10-20%'
             advice = '⚠️ 技术面向好但基本面偏弱，控制仓位'
 
-        return {
+        self._analysis = {
             'action': action,
             'confidence': confidence,
             'position': position,
@@ -635,153 +814,263 @@ class SimpleStockAnalyzer:
                 'ma120': ma120 if has_ma120 else None,
             }
         }
+        return self._analysis
 
     def print_report(self):
         """打印分析报告"""
         result = self.analyze()
         trend = result['trend_info']
+        lines = []  # 报告逐行收集，最后一次性写出
 
-        print("\n" + "=" * 70)
-        print(f"📊 {self.data['name']}({self.stock_code}) 分析报告")
-        print("=" * 70)
+        lines.append("\n" + "=" * 70)
+        lines.append(f"📊 {self.data['name']}({self.stock_code}) 分析报告")
+        lines.append("=" * 70)
 
         # 市场环境
-        print("\n━━━ 市场环境 ━━━")
+        lines.append("\n━━━ 市场环境 ━━━")
         if '上证指数' in self.market_data:
             sz = self.market_data['上证指数']
             emoji = "📈" if sz['change_pct'] > 0 else "📉"
-            print(f"大盘: 上证指数 {sz['price']:.2f} ({emoji} {sz['change_pct']:+.2f}%)")
+            lines.append(f"大盘: 上证指数 {sz['price']:.2f} ({emoji} {sz['change_pct']:+.2f}%)")
         else:
-            print("大盘: 数据获取中...")
+            lines.append("大盘: 数据获取中...")
 
         if '行业' in self.market_data:
             industry = self.market_data['行业']
             emoji = "📈" if industry['change_pct'] > 0 else "📉"
-            print(f"板块: {industry['name']} ({emoji} {industry['change_pct']:+.2f}%)")
+            lines.append(f"板块: {industry['name']} ({emoji} {industry['change_pct']:+.2f}%)")
 
         # 当前价格
-        print("\n━━━ 当前状态 ━━━")
+        lines.append("\n━━━ 当前状态 ━━━")
         emoji = "📈" if self.data['change_pct'] > 0 else "📉"
-        print(f"当前价: ¥{self.data['current_price']:.2f} ({emoji} {self.data['change_pct']:+.2f}%)")
-        print(f"今日区间: ¥{self.data['low']:.2f} - ¥{self.data['high']:.2f}")
+        lines.append(f"当前价: ¥{self.data['current_price']:.2f} ({emoji} {self.data['change_pct']:+.2f}%)")
+        lines.append(f"今日区间: ¥{self.data['low']:.2f} - ¥{self.data['high']:.2f}")
 
         # 多级别趋势
-        print("\n━━━ 多级别趋势（核心）━━━")
-        print(f"趋势方向: {result['signals']['indicators']['趋势方向']}")
-        print(f"趋势强度: {result['signals']['indicators']['趋势强度']}")
+        lines.append("\n━━━ 多级别趋势（核心）━━━")
+        lines.append(f"趋势方向: {result['signals']['indicators']['趋势方向']}")
+        lines.append(f"趋势强度: {result['signals']['indicators']['趋势强度']}")
 
         # 均线值
         prices = result['prices']
-        ma_str = f"MA20:¥{prices['ma20']:.2f}" if prices['ma20'] and not np.isnan(prices['ma20']) else ""
+        ma_str = f"MA20:¥{prices['ma20']:.2f}" if prices['ma20'] and not isnan(prices['ma20']) else ""
         if prices.get('ma60'):
             ma_str += f" MA60:¥{prices['ma60']:.2f}"
         if prices.get('ma120'):
             ma_str += f" MA120:¥{prices['ma120']:.2f}"
         if ma_str:
-            print(f"均线值: {ma_str}")
+            lines.append(f"均线值: {ma_str}")
 
         # 钟摆位置
-        print("\n━━━ 多级别钟摆位置（均线偏离度）━━━")
-        print(f"{result['signals']['indicators']['钟摆位置']}")
+        lines.append("\n━━━ 多级别钟摆位置（均线偏离度）━━━")
+        lines.append(f"{result['signals']['indicators']['钟摆位置']}")
         dev_short = f"短期: MA5:{trend['dev_ma5']:+.1f}% MA10:{trend['dev_ma10']:+.1f}%"
         dev_mid = f"中期: MA20:{trend['dev_ma20']:+.1f}%"
         if trend['dev_ma60'] != 0:
             dev_mid += f" MA60:{trend['dev_ma60']:+.1f}%"
         if trend['dev_ma120'] != 0:
             dev_mid += f" MA120:{trend['dev_ma120']:+.1f}%"
-        print(f"偏离度 {dev_short}")
-        print(f"偏离度 {dev_mid}")
+        lines.append(f"偏离度 {dev_short}")
+        lines.append(f"偏离度 {dev_mid}")
 
         # 量价关系
-        print("\n━━━ 量价关系 ━━━")
-        print(f"{result['signals']['indicators']['量价关系']}")
+        lines.append("\n━━━ 量价关系 ━━━")
+        lines.append(f"{result['signals']['indicators']['量价关系']}")
 
         # 见顶/出货检测
-        print("\n━━━ 见顶/出货检测（MA20向上但短期转弱时的关键判断）━━━")
-        print(f"{result['signals']['indicators']['见顶检测']}")
+        lines.append("\n━━━ 见顶/出货检测（MA20向上但短期转弱时的关键判断）━━━")
+        lines.append(f"{result['signals']['indicators']['见顶检测']}")
 
         # 传统指标（可选参考）
-        print("\n━━━ 可选参考：传统指标 ━━━")
-        print(f"{result['signals']['indicators']['传统指标(参考)']}")
-        print(f"（MACD本质是均线偏离度衍生，KDJ是偏离度的另一种计算）")
+        lines.append("\n━━━ 可选参考：传统指标 ━━━")
+        lines.append(f"{result['signals']['indicators']['传统指标(参考)']}")
+        lines.append(f"（MACD本质是均线偏离度衍生，KDJ是偏离度的另一种计算）")
 
         # 关键信号
         if result['signals'].get('key_signals'):
-            print("\n━━━ 关键信号 ━━━")
+            lines.append("\n━━━ 关键信号 ━━━")
             for sig in result['signals']['key_signals']:
-                print(sig)
+                lines.append(sig)
 
         # 基本面分析（内功）
         if hasattr(self, '_fundamental_report'):
-            print(self._fundamental_report)
+            lines.append(self._fundamental_report)
 
         # 综合评分
         max_score = result.get('max_score', 100)
-        print("\n━━━ 综合评分 ━━━")
+        lines.append("\n━━━ 综合评分 ━━━")
         tech_buy = result.get('tech_buy', 0)
         tech_sell = result.get('tech_sell', 0)
         fund_score = result.get('fundamental_score', 0)
-        print(f"技术面(招式): 买入 {tech_buy}/50 | 卖出 {tech_sell}/50")
-        print(f"基本面(内功): {fund_score}/50")
-        print(f"综合买入评分: {result['buy_score']}/{max_score}")
-        print(f"综合卖出评分: {result['sell_score']}/{max_score}")
-        print(f"评分构成: 基本面50%(盈利15+成长10+健康10+估值10+资金5) + 技术面50%(趋势15+钟摆12.5+强度10+量价7.5+指标5)")
+        lines.append(f"技术面(招式): 买入 {tech_buy}/50 | 卖出 {tech_sell}/50")
+        lines.append(f"基本面(内功): {fund_score}/50")
+        lines.append(f"综合买入评分: {result['buy_score']}/{max_score}")
+        lines.append(f"综合卖出评分: {result['sell_score']}/{max_score}")
+        lines.append(f"评分构成: 基本面50%(盈利15+成长10+健康10+估值10+资金5) + 技术面50%(趋势15+钟摆12.5+强度10+量价7.5+指标5)")
         if result['market_adj'] != 0:
-            print(f"市场调整: {result['market_adj']:+d} 分")
+            lines.append(f"市场调整: {result['market_adj']:+d} 分")
 
         if result['signals']['market_desc']:
             for desc in result['signals']['market_desc']:
-                print(f"  {desc}")
+                lines.append(f"  {desc}")
 
         # 操作建议
-        print("\n━━━ 操作建议 ━━━")
-        print(f"{result['action']}")
-        print(f"置信度: {result['confidence']}")
-        print(f"建议: {result['advice']}")
+        lines.append("\n━━━ 操作建议 ━━━")
+        lines.append(f"{result['action']}")
+        lines.append(f"置信度: {result['confidence']}")
+        lines.append(f"建议: {result['advice']}")
 
-        print()
+        lines.append('')
         if '买入' in result['action']:
-            print(f"💰 买入价: ¥{prices['buy_low']:.2f} - ¥{prices['buy_high']:.2f}")
-            print(f"🎯 目标价: ¥{prices['sell']:.2f} (预期收益 +{((prices['sell']/prices['current'])-1)*100:.1f}%)")
-            print(f"⛔️ 止损价: ¥{prices['stop_loss']:.2f} (最大亏损 -3%)")
-            print(f"📊 建议仓位: {result['position']}")
-            print(f"📍 关键支撑: ¥{prices['support']:.2f}")
+            lines.append(f"💰 买入价: ¥{prices['buy_low']:.2f} - ¥{prices['buy_high']:.2f}")
+            lines.append(f"🎯 目标价: ¥{prices['sell']:.2f} (预期收益 +{((prices['sell']/prices['current'])-1)*100:.1f}%)")
+            lines.append(f"⛔️ 止损价: ¥{prices['stop_loss']:.2f} (最大亏损 -3%)")
+            lines.append(f"📊 建议仓位: {result['position']}")
+            lines.append(f"📍 关键支撑: ¥{prices['support']:.2f}")
         elif '卖出' in result['action']:
-            print(f"💰 卖出价: ¥{prices['current']:.2f} 以上")
-            print(f"⛔️ 止损价: ¥{prices['stop_loss']:.2f}")
-            print(f"📊 建议减仓: {result['position']}")
-            print(f"📍 关键压力: ¥{prices['resistance']:.2f}")
+            lines.append(f"💰 卖出价: ¥{prices['current']:.2f} 以上")
+            lines.append(f"⛔️ 止损价: ¥{prices['stop_loss']:.2f}")
+            lines.append(f"📊 建议减仓: {result['position']}")
+            lines.append(f"📍 关键压力: ¥{prices['resistance']:.2f}")
         else:
-            print(f"💰 观望价位:")
-            print(f"   买入参考: ¥{prices['buy_low']:.2f} 附近（接近均线支撑）")
-            print(f"   卖出参考: ¥{prices['sell']:.2f} 以上")
-            print(f"📍 支撑位: ¥{prices['support']:.2f}")
-            print(f"📍 压力位: ¥{prices['resistance']:.2f}")
+            lines.append(f"💰 观望价位:")
+            lines.append(f"   买入参考: ¥{prices['buy_low']:.2f} 附近（接近均线支撑）")
+            lines.append(f"   卖出参考: ¥{prices['sell']:.2f} 以上")
+            lines.append(f"📍 支撑位: ¥{prices['support']:.2f}")
+            lines.append(f"📍 压力位: ¥{prices['resistance']:.2f}")
 
         # 内功提醒
-        print("\n━━━ 投资流程提醒 ━━━")
-        print("📋 本报告已融合基本面（内功）+ 技术面（招式）综合分析")
-        print("   投资流程：1.量化筛选 → 2.定性验证（管理层/文化/行业前景）→ 3.交易决策")
-        print("   定性因素（管理层诚信、公司文化、行业竞争格局）仍需您自行判断")
+        lines.append("\n━━━ 投资流程提醒 ━━━")
+        lines.append("📋 本报告已融合基本面（内功）+ 技术面（招式）综合分析")
+        lines.append("   投资流程：1.量化筛选 → 2.定性验证（管理层/文化/行业前景）→ 3.交易决策")
+        lines.append("   定性因素（管理层诚信、公司文化、行业竞争格局）仍需您自行判断")
 
         if result['market_adj'] < -2:
-            print("\n⚠️ 风险提示: 市场环境不佳，建议降低仓位或观望")
+            lines.append("\n⚠️ 风险提示: 市场环境不佳，建议降低仓位或观望")
+
+        lines.append("\n" + "=" * 70)
+        lines.append(f"⏰ 分析时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"📅 数据日期: {self.df['日期'].iat[-1]}")
+        lines.append("=" * 70 + "\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
+def _analyze_one(stock_code, quiet=False, market_data=None):
+    """批量模式的单只股票任务：获取数据；精简模式下顺带完成分析，只返回摘要 dict"""
+    analyzer = SimpleStockAnalyzer(stock_code, quiet=quiet, market_data=market_data)
+    if not analyzer.fetch_data():
+        return None
+    if not quiet:
+        return analyzer
+
+    result = analyzer.analyze()
+    return {
+        'code': stock_code,
+        'name': analyzer.data['name'],
+        'price': analyzer.data['current_price'],
+        'change_pct': analyzer.data['change_pct'],
+        'buy_score': result['buy_score'],
+        'sell_score': result['sell_score'],
+        'fundamental_score': result['fundamental_score'],
+        'action': result['action'],
+    }
+
+
+_SUMMARY_HEADER = f"\n{'代码':<8}{'名称':<12}{'现价':>9}{'涨跌幅':>9}{'买入分':>7}{'卖出分':>7}{'基本面':>7}  建议"
+
+
+def _format_summary_row(row):
+    """精简模式下单只股票的摘要行"""
+    return (f"{row['code']:<8}{row['name']:<12}{row['price']:>9.2f}{row['change_pct']:>+8.2f}%"
+            f"{row['buy_score']:>8}{row['sell_score']:>8}{row['fundamental_score']:>8}  {row['action']}")
+
+
+def main_batch(stock_codes, max_workers=4, quiet=False):
+    """批量分析：同一进程内并发获取数据（复用数据源缓存与 baostock 会话），按输入顺序输出"""
+    # 大盘环境只获取一次，各股票共享
+    market_data = fetch_market_context()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda code: _analyze_one(code, quiet, market_data), stock_codes))
+
+    failed = [code for code, res in zip(stock_codes, results) if res is None]
+    done = [res for res in results if res is not None]
+
+    if quiet:
+        print(_SUMMARY_HEADER)
+        for row in done:
+            print(_format_summary_row(row))
+    else:
+        for analyzer in done:
+            analyzer.print_report()
+
+    if failed:
+        print(f"\n❌ 以下股票分析失败: {', '.join(failed)}")
+    return not failed
+
+
+def main_stream(lines, quiet=False):
+    """常驻模式：逐行读取股票代码并立即输出结果
+
+    进程只启动一次，pandas/numba 导入与编译、baostock 登录、大盘环境和基本面数据
+    在后续股票间复用，每只股票的开销只剩数据获取与计算。空行和 # 开头的行忽略。
+    大盘环境超过 _MARKET_CONTEXT_TTL 后重新获取。
+    """
+    market_data = fetch_market_context()
+    market_expires_at = time.time() + _MARKET_CONTEXT_TTL
+    if quiet:
+        print(_SUMMARY_HEADER, flush=True)
+
+    failed = []
+    for line in lines:
+        code = line.strip()
+        if not code or code.startswith('#'):
+            continue
+        if time.time() >= market_expires_at:
+            market_data = fetch_market_context()
+            market_expires_at = time.time() + _MARKET_CONTEXT_TTL
+        res = _analyze_one(code, quiet, market_data)
+        if res is None:
+            failed.append(code)
+            print(f"❌ {code} 分析失败", flush=True)
+        elif quiet:
+            print(_format_summary_row(res), flush=True)
+        else:
+            res.print_report()
+            sys.stdout.flush()
 
-        print("\n" + "=" * 70)
-        print(f"⏰ 分析时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📅 数据日期: {self.df.iloc[-1]['日期']}")
-        print("=" * 70 + "\n")
+    if failed:
+        print(f"\n❌ 以下股票分析失败: {', '.join(failed)}")
+    return not failed
 
 
 def main():
     import sys
 
-    if len(sys.argv) < 2:
-        print("使用方法: python3 analyze_stock_simple.py <股票代码>")
+    quiet = '--quiet' in sys.argv[1:]
+    if '--no-cache' in sys.argv[1:]:
+        DataSource.disable_disk_cache()
+    stock_codes = [a for a in sys.argv[1:] if not a.startswith('--')]
+
+    if not stock_codes:
+        print("使用方法: python3 analyze_stock_simple.py <股票代码> [股票代码 ...] | - [--quiet] [--no-cache]")
         print("示例: python3 analyze_stock_simple.py 600519")
+        print("批量: python3 analyze_stock_simple.py 600519 000001 300750")
+        print("批量摘要: python3 analyze_stock_simple.py 600519 000001 300750 --quiet")
+        print("忽略本地K线缓存重新下载: python3 analyze_stock_simple.py 600519 --no-cache")
+        print("从标准输入逐行读取代码（常驻进程）: cat codes.txt | python3 analyze_stock_simple.py - --quiet")
         sys.exit(1)
 
-    stock_code = sys.argv[1]
+    if stock_codes == ['-']:
+        if not main_stream(sys.stdin, quiet=quiet):
+            sys.exit(1)
+        return
+
+    if len(stock_codes) > 1 or quiet:
+        if not main_batch(stock_codes, quiet=quiet):
+            sys.exit(1)
+        return
+
+    stock_code = stock_codes[0]
     analyzer = SimpleStockAnalyzer(stock_code)
 
     if analyzer.fetch_data():
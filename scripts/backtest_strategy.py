@@ -19,6 +19,8 @@ import warnings
 import sys
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 warnings.filterwarnings('ignore')
 
@@ -30,7 +32,7 @@ try:
 except ModuleNotFoundError as exc:
     DataSource = None
     DATA_SOURCE_IMPORT_ERROR = exc
-from technical import calculate_ma, calculate_macd, calculate_kdj, calculate_rsi, calculate_volume_ma
+from technical import njit, calculate_all_indicators_fused
 
 # ============================================================
 # 常量
@@ -64,6 +66,10 @@ PRESET_STOCKS = {
 # 数据获取与指标计算
 # ============================================================
 
+# 回测只用到日期与 OHLCV，其余列（成交额/换手率/涨跌幅等）在取数后即丢弃
+_BACKTEST_COLUMNS = ['日期', '开盘', '最高', '最低', '收盘', '成交量']
+
+
 def fetch_stock_data(stock_code, days=BACKTEST_DAYS):
     """获取历史日K线数据（使用统一 DataSource）"""
     if DataSource is None:
@@ -80,347 +86,428 @@ def fetch_stock_data(stock_code, days=BACKTEST_DAYS):
         adjust='qfq',
         period='daily'
     )
-    return df if df is not None and not df.empty else None
+    if df is None or df.empty:
+        return None
+    return df[[c for c in _BACKTEST_COLUMNS if c in df.columns]]
 
 
+@lru_cache(maxsize=1024)
 def get_stock_name(stock_code):
     """尝试获取股票名称"""
-    if stock_code in PRESET_STOCKS:
-        return PRESET_STOCKS[stock_code]
-    return stock_code
+    return PRESET_STOCKS.get(stock_code, stock_code)
 
 
 def calculate_indicators(df):
     """计算全部技术指标（使用公共模块）"""
-    calculate_ma(df, windows=[5, 10, 20, 60, 120])
-    calculate_macd(df)
-    calculate_kdj(df)
-    calculate_rsi(df)
-    calculate_volume_ma(df, windows=[5])
-
-    # MACD 背离（逐日滚动检测，回测专用）
-    df['MACD_divergence'] = 'none'
-    for idx in range(30, len(df)):
-        window = df.iloc[idx - 30:idx + 1].copy()
-        df.iloc[idx, df.columns.get_loc('MACD_divergence')] = _detect_divergence(window)
+    return calculate_all_indicators_fused(df, ma_windows=[5, 10, 20, 60, 120], volume_windows=[5], bollinger=False)
+
+
+def calculate_divergence(df):
+    """
+    MACD 背离列（逐日滚动检测，回测专用）
+
+    只有策略 B 的评分用到背离，calculate_indicators 不再默认计算；
+    strategy_b_signals 在缺少该列时会自行检测，需要展示整列时再调用本函数。
 
+    返回:
+        df（原地修改），新增 MACD_divergence 列（'none' / 'bottom' / 'top'）
+    """
+    df['MACD_divergence'] = _detect_divergence(
+        df['收盘'].to_numpy(dtype=np.float64), df['DIF'].to_numpy(dtype=np.float64),
+    )
     return df
 
 
-def _detect_divergence(window):
-    """在给定窗口中检测 MACD 背离"""
-    if len(window) < 7:
-        return 'none'
+def _pivot_mask(close, sign):
+    """
+    局部低点（sign=1）/高点（sign=-1）掩码：严格低于（高于）前两日、不高于（不低于）后两日。
+    首尾各 2 根无法判定，恒为 False；NaN 参与比较为 False。
+    """
+    mask = np.zeros(len(close), dtype=bool)
+    if len(close) < 5:
+        return mask
+    c = close * sign
+    mid = c[2:-2]
+    mask[2:-2] = (mid < c[1:-3]) & (mid < c[:-4]) & (mid <= c[3:-1]) & (mid <= c[4:])
+    return mask
+
+
+def _last_two_pivots(pivots, idx, lookback):
+    """每个 idx 在 [idx-lookback+2, idx-2] 内的最后两个拐点位置（不足两个时 valid=False）"""
+    if len(pivots) < 2:
+        return np.zeros(len(idx), dtype=bool), idx, idx
+    count = np.searchsorted(pivots, idx - 2, side='right')
+    last = pivots[np.maximum(count - 1, 0)]
+    prev = pivots[np.maximum(count - 2, 0)]
+    valid = (count >= 2) & (prev >= idx - lookback + 2)
+    return valid, last, prev
+
+
+def _detect_divergence(close, dif, lookback=30):
+    """
+    全序列 MACD 背离检测：第 idx 根K线看 [idx-lookback, idx] 窗口内的最后两个收盘价拐点
 
-    divergence = 'none'
+    - 底背离 'bottom'：后一个低点更低，DIF 却更高
+    - 顶背离 'top'：后一个高点更高，DIF 却更低（同时出现时取顶背离）
+    拐点只依赖前后各两根K线，与窗口无关，因此全序列只需判定一次，
+    每个窗口再用 searchsorted 取窗口内最后两个拐点。前 lookback 根为 'none'。
 
-    # 底背离
-    price_lows = []
-    for i in range(2, len(window) - 2):
-        if (window.iloc[i]['收盘'] < window.iloc[i - 1]['收盘'] and
-                window.iloc[i]['收盘'] < window.iloc[i - 2]['收盘'] and
-                window.iloc[i]['收盘'] <= window.iloc[i + 1]['收盘'] and
-                window.iloc[i]['收盘'] <= window.iloc[i + 2]['收盘']):
-            price_lows.append((i, window.iloc[i]['收盘'], window.iloc[i]['DIF']))
+    返回: object 数组（'none' / 'bottom' / 'top'）
+    """
+    n = len(close)
+    result = np.full(n, 'none', dtype=object)
+    if n <= lookback:
+        return result
+
+    idx = np.arange(lookback, n)
+    lows = np.flatnonzero(_pivot_mask(close, 1))
+    highs = np.flatnonzero(_pivot_mask(close, -1))
+
+    valid, last, prev = _last_two_pivots(lows, idx, lookback)
+    bottom = valid & (close[last] < close[prev]) & (dif[last] > dif[prev])
+    valid, last, prev = _last_two_pivots(highs, idx, lookback)
+    top = valid & (close[last] > close[prev]) & (dif[last] < dif[prev])
+
+    result[lookback:][bottom] = 'bottom'
+    result[lookback:][top] = 'top'
+    return result
 
-    if len(price_lows) >= 2:
-        last_low = price_lows[-1]
-        prev_low = price_lows[-2]
-        if last_low[1] < prev_low[1] and last_low[2] > prev_low[2]:
-            divergence = 'bottom'
 
-    # 顶背离
-    price_highs = []
-    for i in range(2, len(window) - 2):
-        if (window.iloc[i]['收盘'] > window.iloc[i - 1]['收盘'] and
-                window.iloc[i]['收盘'] > window.iloc[i - 2]['收盘'] and
-                window.iloc[i]['收盘'] >= window.iloc[i + 1]['收盘'] and
-                window.iloc[i]['收盘'] >= window.iloc[i + 2]['收盘']):
-            price_highs.append((i, window.iloc[i]['收盘'], window.iloc[i]['DIF']))
+# ============================================================
+# 策略共用：列数组与交叉掩码
+# ============================================================
+
+# 顺序与 _score_all 的前 13 个参数一致
+_MASK_COLUMNS = ('DIF', 'DEA', 'MACD', 'K', 'D', 'J', 'RSI', '收盘',
+                 'MA5', 'MA10', 'MA20', '成交量', 'VOL_MA5')
+
+
+def _cross_up(a, b):
+    """a 上穿 b（当日 a>b 且前一日 a<=b）的布尔数组，首根恒为 False"""
+    mask = np.zeros(len(a), dtype=bool)
+    mask[1:] = (a[1:] > b[1:]) & (a[:-1] <= b[:-1])
+    return mask
+
+
+def _cross_down(a, b):
+    """a 下穿 b（当日 a<b 且前一日 a>=b）的布尔数组，首根恒为 False"""
+    mask = np.zeros(len(a), dtype=bool)
+    mask[1:] = (a[1:] < b[1:]) & (a[:-1] >= b[:-1])
+    return mask
 
-    if len(price_highs) >= 2:
-        last_high = price_highs[-1]
-        prev_high = price_highs[-2]
-        if last_high[1] > prev_high[1] and last_high[2] < prev_high[2]:
-            divergence = 'top'
 
-    return divergence
+def _precompute_masks(df):
+    """
+    策略 A/B 共用的列数组与交叉掩码（run_backtest 中只算一次，分别传给两个策略）
+
+    返回 dict：_MASK_COLUMNS 各列的 float64 数组，以及
+        macd_golden/macd_death/kdj_golden/kdj_death: 当日交叉
+        ma20_down: MA20 低于 5 日前（前 5 根为 False）
+    背离编码 div_code 只有策略 B 用到，由 strategy_b_signals 首次用到时补入
+    """
+    masks = {c: df[c].to_numpy(dtype=np.float64) for c in _MASK_COLUMNS}
+    masks['macd_golden'] = _cross_up(masks['DIF'], masks['DEA'])
+    masks['macd_death'] = _cross_down(masks['DIF'], masks['DEA'])
+    masks['kdj_golden'] = _cross_up(masks['K'], masks['D'])
+    masks['kdj_death'] = _cross_down(masks['K'], masks['D'])
+
+    ma20 = masks['MA20']
+    ma20_down = np.zeros(len(ma20), dtype=bool)
+    ma20_down[5:] = ma20[5:] < ma20[:-5]
+    masks['ma20_down'] = ma20_down
+    return masks
+
+
+def _divergence_codes(df):
+    """MACD 背离编码（0 无 / 1 底背离 / 2 顶背离）；df 未含 MACD_divergence 列时现场检测"""
+    if 'MACD_divergence' in df.columns:
+        div = df['MACD_divergence'].to_numpy()
+    else:
+        div = _detect_divergence(df['收盘'].to_numpy(dtype=np.float64), df['DIF'].to_numpy(dtype=np.float64))
+    return np.where(div == 'bottom', 1, np.where(div == 'top', 2, 0)).astype(np.int64)
 
 
 # ============================================================
 # 策略 A：核心信号（MACD / KDJ 交叉）
 # ============================================================
 
-def strategy_a_signals(df):
+def strategy_a_signals(df, masks=None):
     """
     Strategy A: MACD / KDJ 核心交叉信号
     返回 DataFrame，包含 signal 列 ('buy' / 'sell' / None) 及 reason 列
+
+    各类交叉均为整列布尔掩码，只对最终产生信号的少数K线拼接理由文本。
+    masks: _precompute_masks(df) 的结果（不传则现算）
     """
-    signals = pd.DataFrame(index=df.index, columns=['signal', 'reason'])
-    signals['signal'] = None
-    signals['reason'] = ''
+    if masks is None:
+        masks = _precompute_masks(df)
+    j, close, ma20 = masks['J'], masks['收盘'], masks['MA20']
+
+    macd_golden = masks['macd_golden']    # MACD 金叉
+    macd_death = masks['macd_death']      # MACD 死叉
+    kdj_golden = masks['kdj_golden']
+    kdj_death = masks['kdj_death']
+    kdj_low_golden = kdj_golden & (j < 30)   # KDJ 低位金叉 (J < 30)
+    kdj_high_death = kdj_death & (j > 70)    # KDJ 高位死叉 (J > 70)
+    double_golden = macd_golden & kdj_golden  # 双金叉共振
+    double_death = macd_death & kdj_death     # 双死叉共振
+
+    # MA20 趋势守卫：价格低于MA20时阻止买入信号（MA20 缺失时不设限）
+    # 下跌趋势中双金叉共振除外，但标记为趋势偏弱
+    with np.errstate(invalid='ignore'):
+        price_above_ma20 = np.where(ma20 > 0, close > ma20, True)
+    has_buy = macd_golden | kdj_low_golden
+    weak = has_buy & ~price_above_ma20
+    has_buy &= price_above_ma20 | double_golden
+    has_sell = macd_death | kdj_high_death
+
+    # 优先级：买入/卖出信号同时出现时，双金叉/双死叉优先，否则忽略矛盾信号
+    buy = has_buy & (~has_sell | double_golden)
+    sell = has_sell & (~has_buy | (~double_golden & double_death))
+
+    signal = np.full(len(df), None, dtype=object)
+    reason = np.full(len(df), '', dtype=object)
+    for i in np.flatnonzero(buy):
+        reasons = []
+        if macd_golden[i]:
+            reasons.append('MACD金叉')
+        if kdj_low_golden[i]:
+            reasons.append(f'KDJ低位金叉(J={j[i]:.0f})')
+        if double_golden[i]:
+            reasons.append('MACD+KDJ双金叉共振')
+        if weak[i]:
+            reasons.append('⚠️趋势偏弱')
+        signal[i] = 'buy'
+        reason[i] = '+'.join(reasons)
+    for i in np.flatnonzero(sell):
+        reasons = []
+        if macd_death[i]:
+            reasons.append('MACD死叉')
+        if kdj_high_death[i]:
+            reasons.append(f'KDJ高位死叉(J={j[i]:.0f})')
+        if double_death[i]:
+            reasons.append('MACD+KDJ双死叉共振')
+        signal[i] = 'sell'
+        reason[i] = '+'.join(reasons)
 
-    for i in range(1, len(df)):
-        cur = df.iloc[i]
-        prev = df.iloc[i - 1]
-
-        buy_reasons = []
-        sell_reasons = []
-
-        # MACD 金叉
-        if cur['DIF'] > cur['DEA'] and prev['DIF'] <= prev['DEA']:
-            buy_reasons.append('MACD金叉')
-        # MACD 死叉
-        if cur['DIF'] < cur['DEA'] and prev['DIF'] >= prev['DEA']:
-            sell_reasons.append('MACD死叉')
-
-        # KDJ 低位金叉 (J < 30)
-        if cur['K'] > cur['D'] and prev['K'] <= prev['D'] and cur['J'] < 30:
-            buy_reasons.append(f'KDJ低位金叉(J={cur["J"]:.0f})')
-        # KDJ 高位死叉 (J > 70)
-        if cur['K'] < cur['D'] and prev['K'] >= prev['D'] and cur['J'] > 70:
-            sell_reasons.append(f'KDJ高位死叉(J={cur["J"]:.0f})')
-
-        # 双金叉共振
-        macd_golden = cur['DIF'] > cur['DEA'] and prev['DIF'] <= prev['DEA']
-        kdj_golden = cur['K'] > cur['D'] and prev['K'] <= prev['D']
-        if macd_golden and kdj_golden:
-            buy_reasons.append('MACD+KDJ双金叉共振')
-
-        # 双死叉共振
-        macd_death = cur['DIF'] < cur['DEA'] and prev['DIF'] >= prev['DEA']
-        kdj_death = cur['K'] < cur['D'] and prev['K'] >= prev['D']
-        if macd_death and kdj_death:
-            sell_reasons.append('MACD+KDJ双死叉共振')
-
-        # MA20 趋势守卫：价格低于MA20时阻止买入信号
-        ma20 = cur['MA20'] if not np.isnan(cur['MA20']) else 0
-        price_above_ma20 = cur['收盘'] > ma20 if ma20 > 0 else True
-
-        if buy_reasons and not price_above_ma20:
-            # 下跌趋势中阻止买入（双金叉共振除外，但降级为观望）
-            if 'MACD+KDJ双金叉共振' not in buy_reasons:
-                buy_reasons = []  # 清除买入信号
-            else:
-                buy_reasons.append('⚠️趋势偏弱')  # 保留但标记
-
-        # 优先级：买入/卖出信号同时出现时取较强一侧
-        if buy_reasons and not sell_reasons:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'buy'
-            signals.iloc[i, signals.columns.get_loc('reason')] = '+'.join(buy_reasons)
-        elif sell_reasons and not buy_reasons:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'sell'
-            signals.iloc[i, signals.columns.get_loc('reason')] = '+'.join(sell_reasons)
-        elif buy_reasons and sell_reasons:
-            # 双金叉/双死叉优先，否则忽略矛盾信号
-            if '双金叉共振' in ' '.join(buy_reasons):
-                signals.iloc[i, signals.columns.get_loc('signal')] = 'buy'
-                signals.iloc[i, signals.columns.get_loc('reason')] = '+'.join(buy_reasons)
-            elif '双死叉共振' in ' '.join(sell_reasons):
-                signals.iloc[i, signals.columns.get_loc('signal')] = 'sell'
-                signals.iloc[i, signals.columns.get_loc('reason')] = '+'.join(sell_reasons)
-
-    return signals
+    return pd.DataFrame({'signal': signal, 'reason': reason}, index=df.index)
 
 
 # ============================================================
 # 策略 B：完整评分体系（复用 analyze_stock_simple.py 评分逻辑）
 # ============================================================
 
-def _score_day(df, idx):
+# 评分理由按位编码（位序即原 analyze() 中理由的追加顺序，解码时按位从低到高拼接）
+_SCORE_REASONS = (
+    'MACD金叉', 'MACD金叉确认', 'MACD死叉', 'MACD死叉确认',
+    'MACD底背离', 'MACD顶背离',
+    'KDJ金叉', 'KDJ死叉',
+    'KDJ超卖J={j:.0f}', 'KDJ超买J={j:.0f}',
+    'KDJ低位金叉', 'KDJ高位死叉',
+    '双金叉共振', '双死叉共振',
+    '价格<MA20', 'MA20下行',
+)
+
+
+@njit(cache=True, error_model='numpy')
+def _score_all(dif, dea, macd, k, d, j, rsi, close, ma5, ma10, ma20, vol, vol_ma5, div_code,
+               macd_golden, macd_death, kdj_golden, kdj_death, ma20_down):
     """
-    对第 idx 行计算买入/卖出评分（复用 analyze_stock_simple.py 的 analyze() 逻辑）
-    返回 (buy_score, sell_score, reason)
-    """
-    if idx < 2:
-        return 0, 0, ''
+    逐日计算买入/卖出评分（复用 analyze_stock_simple.py 的 analyze() 逻辑）
 
-    cur = df.iloc[idx]
-    prev = df.iloc[idx - 1]
-    prev2 = df.iloc[idx - 2]
+    参数为 _precompute_masks 中的等长列数组与交叉掩码，
+    div_code 为 MACD 背离编码（0 无 / 1 底背离 / 2 顶背离）。
+    返回 (buy_score, sell_score, reason_bits)，前两根K线为 0。
+    NaN 比较一律为 False，与逐行标量比较的分支走向一致。
+    """
+    n = len(close)
+    buy_scores = np.zeros(n, dtype=np.int64)
+    sell_scores = np.zeros(n, dtype=np.int64)
+    reason_bits = np.zeros(n, dtype=np.int64)
+
+    for i in range(2, n):
+        buy = 0
+        sell = 0
+        bits = 0
+
+        # ── MACD (max 7) ──
+        macd_buy = 0
+        macd_sell = 0
+        if dif[i] > dea[i]:
+            if macd_golden[i]:
+                macd_buy += 5
+                bits |= 1 << 0
+            elif macd_golden[i - 1]:
+                macd_buy += 4
+                bits |= 1 << 1
+            else:
+                macd_buy += 2
+        else:
+            if dif[i - 1] >= dea[i - 1]:
+                macd_sell += 5
+                bits |= 1 << 2
+            elif dif[i - 1] < dea[i - 1] and dif[i - 2] >= dea[i - 2]:
+                macd_sell += 4
+                bits |= 1 << 3
+            else:
+                macd_sell += 2
 
-    buy = 0
-    sell = 0
-    reasons = []
+        if dif[i] > 0:
+            macd_buy += 1
+        elif dif[i] < 0:
+            if macd_golden[i]:
+                macd_buy += 2
+            else:
+                macd_sell += 1
 
-    # ── MACD (max 7) ──
-    macd_buy = 0
-    macd_sell = 0
+        if macd[i] > macd[i - 1]:
+            macd_buy += 1
+        else:
+            macd_sell += 1
 
-    if cur['DIF'] > cur['DEA']:
-        if prev['DIF'] <= prev['DEA']:
-            macd_buy += 5
-            reasons.append('MACD金叉')
-        elif prev['DIF'] > prev['DEA'] and prev2['DIF'] <= prev2['DEA']:
-            macd_buy += 4
-            reasons.append('MACD金叉确认')
+        if div_code[i] == 1:
+            macd_buy += 3
+            bits |= 1 << 4
+        elif div_code[i] == 2:
+            macd_sell += 3
+            bits |= 1 << 5
+
+        buy += min(7, macd_buy)
+        sell += min(7, macd_sell)
+
+        # ── KDJ (max 7) ──
+        kdj_buy = 0
+        kdj_sell = 0
+        j_val = j[i]
+
+        if kdj_golden[i]:
+            kdj_buy += 4
+            bits |= 1 << 6
+        elif kdj_death[i]:
+            kdj_sell += 4
+            bits |= 1 << 7
+        elif k[i] > d[i]:
+            kdj_buy += 1
         else:
-            macd_buy += 2
-    else:
-        if prev['DIF'] >= prev['DEA']:
-            macd_sell += 5
-            reasons.append('MACD死叉')
-        elif prev['DIF'] < prev['DEA'] and prev2['DIF'] >= prev2['DEA']:
-            macd_sell += 4
-            reasons.append('MACD死叉确认')
+            kdj_sell += 1
+
+        if j_val < 0:
+            kdj_buy += 3
+        elif j_val < 20:
+            kdj_buy += 3
+            bits |= 1 << 8
+        elif j_val > 100:
+            kdj_sell += 3
+        elif j_val > 80:
+            kdj_sell += 3
+            bits |= 1 << 9
+        elif j_val < 50:
+            kdj_buy += 1
         else:
-            macd_sell += 2
+            kdj_sell += 1
 
-    if cur['DIF'] > 0:
-        macd_buy += 1
-    elif cur['DIF'] < 0:
-        if cur['DIF'] > cur['DEA'] and prev['DIF'] <= prev['DEA']:
-            macd_buy += 2
-        else:
-            macd_sell += 1
+        if j_val < 30 and kdj_golden[i]:
+            kdj_buy += 2
+            bits |= 1 << 10
+        elif j_val > 70 and kdj_death[i]:
+            kdj_sell += 2
+            bits |= 1 << 11
 
-    if cur['MACD'] > prev['MACD']:
-        macd_buy += 1
-    else:
-        macd_sell += 1
-
-    divergence = cur.get('MACD_divergence', 'none')
-    if divergence == 'bottom':
-        macd_buy += 3
-        reasons.append('MACD底背离')
-    elif divergence == 'top':
-        macd_sell += 3
-        reasons.append('MACD顶背离')
-
-    buy += min(7, macd_buy)
-    sell += min(7, macd_sell)
-
-    # ── KDJ (max 7) ──
-    kdj_buy = 0
-    kdj_sell = 0
-    j_val = cur['J']
-    k_val = cur['K']
-    d_val = cur['D']
-    prev_k = prev['K']
-    prev_d = prev['D']
-
-    if k_val > d_val and prev_k <= prev_d:
-        kdj_buy += 4
-        reasons.append('KDJ金叉')
-    elif k_val < d_val and prev_k >= prev_d:
-        kdj_sell += 4
-        reasons.append('KDJ死叉')
-    elif k_val > d_val:
-        kdj_buy += 1
-    else:
-        kdj_sell += 1
-
-    if j_val < 0:
-        kdj_buy += 3
-    elif j_val < 20:
-        kdj_buy += 3
-        reasons.append(f'KDJ超卖J={j_val:.0f}')
-    elif j_val > 100:
-        kdj_sell += 3
-    elif j_val > 80:
-        kdj_sell += 3
-        reasons.append(f'KDJ超买J={j_val:.0f}')
-    elif j_val < 50:
-        kdj_buy += 1
-    else:
-        kdj_sell += 1
-
-    if j_val < 30 and k_val > d_val and prev_k <= prev_d:
-        kdj_buy += 2
-        reasons.append('KDJ低位金叉')
-    elif j_val > 70 and k_val < d_val and prev_k >= prev_d:
-        kdj_sell += 2
-        reasons.append('KDJ高位死叉')
-
-    buy += min(7, kdj_buy)
-    sell += min(7, kdj_sell)
-
-    # ── RSI (max 2) ──
-    rsi = cur['RSI']
-    if rsi < 30:
-        buy += 2
-    elif rsi > 70:
-        sell += 2
-    elif rsi < 45:
-        buy += 1
-    elif rsi > 55:
-        sell += 1
-
-    # ── MA (max 2) ──
-    price = cur['收盘']
-    if not np.isnan(cur['MA5']) and not np.isnan(cur['MA10']):
-        if price > cur['MA5'] > cur['MA10']:
+        buy += min(7, kdj_buy)
+        sell += min(7, kdj_sell)
+
+        # ── RSI (max 2) ──
+        if rsi[i] < 30:
             buy += 2
-        elif price < cur['MA5'] < cur['MA10']:
+        elif rsi[i] > 70:
             sell += 2
-
-    # ── Volume (max 2) ──
-    vol_ma5 = cur['VOL_MA5']
-    if vol_ma5 and vol_ma5 > 0:
-        vol_ratio = cur['成交量'] / vol_ma5
-        change_pct = ((cur['收盘'] - prev['收盘']) / prev['收盘']) * 100
-        if vol_ratio > 1.5:
-            if change_pct > 0:
+        elif rsi[i] < 45:
+            buy += 1
+        elif rsi[i] > 55:
+            sell += 1
+
+        # ── MA (max 2) ──
+        price = close[i]
+        if ma5[i] == ma5[i] and ma10[i] == ma10[i]:
+            if price > ma5[i] and ma5[i] > ma10[i]:
                 buy += 2
-            else:
+            elif price < ma5[i] and ma5[i] < ma10[i]:
                 sell += 2
 
-    # ── MACD + KDJ 共振 (max 3) ──
-    macd_golden = cur['DIF'] > cur['DEA'] and prev['DIF'] <= prev['DEA']
-    macd_death = cur['DIF'] < cur['DEA'] and prev['DIF'] >= prev['DEA']
-    kdj_golden = k_val > d_val and prev_k <= prev_d
-    kdj_death = k_val < d_val and prev_k >= prev_d
-
-    if macd_golden and kdj_golden:
-        buy += 3
-        reasons.append('双金叉共振')
-    elif macd_death and kdj_death:
-        sell += 3
-        reasons.append('双死叉共振')
-    elif cur['DIF'] > cur['DEA'] and kdj_golden and j_val < 30:
-        buy += 2
-    elif cur['DIF'] < cur['DEA'] and kdj_death and j_val > 70:
-        sell += 2
-
-    # ── MA20 趋势守卫（惩罚下跌趋势中的买入信号）──
-    ma20 = cur['MA20']
-    if not np.isnan(ma20):
-        if price < ma20:
+        # ── Volume (max 2) ──
+        if vol_ma5[i] > 0:
+            vol_ratio = vol[i] / vol_ma5[i]
+            change_pct = (close[i] - close[i - 1]) / close[i - 1] * 100
+            if vol_ratio > 1.5:
+                if change_pct > 0:
+                    buy += 2
+                else:
+                    sell += 2
+
+        # ── MACD + KDJ 共振 (max 3) ──
+        if macd_golden[i] and kdj_golden[i]:
+            buy += 3
+            bits |= 1 << 12
+        elif macd_death[i] and kdj_death[i]:
+            sell += 3
+            bits |= 1 << 13
+        elif dif[i] > dea[i] and kdj_golden[i] and j_val < 30:
+            buy += 2
+        elif dif[i] < dea[i] and kdj_death[i] and j_val > 70:
             sell += 2
-            reasons.append('价格<MA20')
-        # MA20 斜率检测（5日变化）
-        if idx >= 5:
-            ma20_prev5 = df.iloc[idx - 5]['MA20']
-            if not np.isnan(ma20_prev5) and ma20 < ma20_prev5:
+
+        # ── MA20 趋势守卫（惩罚下跌趋势中的买入信号）──
+        if ma20[i] == ma20[i]:
+            if price < ma20[i]:
+                sell += 2
+                bits |= 1 << 14
+            # MA20 斜率检测（5日变化）
+            if ma20_down[i]:
                 sell += 1  # MA20 下行额外惩罚
-                if price < ma20:
-                    reasons.append('MA20下行')
+                if price < ma20[i]:
+                    bits |= 1 << 15
 
-    buy_score = min(20, buy)
-    sell_score = min(20, sell)
+        buy_scores[i] = min(20, buy)
+        sell_scores[i] = min(20, sell)
+        reason_bits[i] = bits
 
-    return buy_score, sell_score, '+'.join(reasons)
+    return buy_scores, sell_scores, reason_bits
+
+
+def _score_reason(bits, j_val):
+    """把 _score_all 的理由位还原为 '+' 连接的文本"""
+    return '+'.join(
+        label.format(j=j_val) for pos, label in enumerate(_SCORE_REASONS) if bits >> pos & 1
+    )
 
 
-def strategy_b_signals(df):
+def strategy_b_signals(df, masks=None):
     """
     Strategy B: 完整评分体系
     buy_score >= 10 → buy, sell_score >= 10 → sell
+    masks: _precompute_masks(df) 的结果（不传则现算）
     """
-    signals = pd.DataFrame(index=df.index, columns=['signal', 'reason'])
-    signals['signal'] = None
-    signals['reason'] = ''
+    if masks is None:
+        masks = _precompute_masks(df)
+    if 'div_code' not in masks:
+        masks['div_code'] = _divergence_codes(df)
+    buy_scores, sell_scores, reason_bits = _score_all(
+        *(masks[c] for c in _MASK_COLUMNS), masks['div_code'],
+        masks['macd_golden'], masks['macd_death'], masks['kdj_golden'], masks['kdj_death'],
+        masks['ma20_down'],
+    )
 
-    for i in range(2, len(df)):
-        buy_s, sell_s, reason = _score_day(df, i)
-        if buy_s >= 10 and buy_s > sell_s:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'buy'
-            signals.iloc[i, signals.columns.get_loc('reason')] = f'评分B{buy_s}/S{sell_s} {reason}'
-        elif sell_s >= 10 and sell_s > buy_s:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'sell'
-            signals.iloc[i, signals.columns.get_loc('reason')] = f'评分B{buy_s}/S{sell_s} {reason}'
+    signal = np.full(len(df), None, dtype=object)
+    reason = np.full(len(df), '', dtype=object)
+    buy = (buy_scores >= 10) & (buy_scores > sell_scores)
+    sell = (sell_scores >= 10) & (sell_scores > buy_scores)
+    signal[buy] = 'buy'
+    signal[sell] = 'sell'
+    for i in np.flatnonzero(buy | sell):
+        reason[i] = (f'评分B{buy_scores[i]}/S{sell_scores[i]} '
+                     f'{_score_reason(reason_bits[i], masks["J"][i])}')
 
-    return signals
+    return pd.DataFrame({'signal': signal, 'reason': reason}, index=df.index)
 
 
 # ============================================================
@@ -436,51 +523,168 @@ def strategy_c_signals(df):
     - 只在价格站上 MA60 且 MA60 斜率为正时参与。
     - 跌破 MA60 两日确认后退出，尽量保留强趋势。
     """
-    signals = pd.DataFrame(index=df.index, columns=['signal', 'reason'])
-    signals['signal'] = None
-    signals['reason'] = ''
-
-    for i in range(80, len(df)):
-        cur = df.iloc[i]
-        prev = df.iloc[i - 1]
-        price = cur['收盘']
-        ma60 = cur.get('MA60', np.nan)
-        prev_ma60 = prev.get('MA60', np.nan)
+    signal = np.full(len(df), None, dtype=object)
+    reason = np.full(len(df), '', dtype=object)
+    if 'MA60' in df.columns and len(df) > 80:
+        close = df['收盘'].to_numpy(dtype=np.float64)
+        ma60_col = df['MA60'].to_numpy(dtype=np.float64)
+        # 逐日需要当日/前一日/20日前的值：错位切片后 zip 成普通元组迭代，不再逐行构造 Series
+        rows = zip(range(80, len(df)), close[80:], ma60_col[80:],
+                   close[79:-1], ma60_col[79:-1], ma60_col[60:-20])
+        for i, price, ma60, prev_close, prev_ma60, ma60_prev20 in rows:
+            if np.isnan(ma60) or np.isnan(prev_ma60):
+                continue
 
-        if np.isnan(ma60) or np.isnan(prev_ma60):
-            continue
+            ma60_slope = 0
+            if not np.isnan(ma60_prev20) and ma60_prev20 > 0:
+                ma60_slope = (ma60 - ma60_prev20) / ma60_prev20 * 100
 
-        ma60_prev20 = df.iloc[i - 20].get('MA60', np.nan) if i >= 20 else np.nan
-        ma60_slope = 0
-        if not np.isnan(ma60_prev20) and ma60_prev20 > 0:
-            ma60_slope = (ma60 - ma60_prev20) / ma60_prev20 * 100
+            dev_ma60 = (price - ma60) / ma60 * 100 if ma60 > 0 else 0
 
-        dev_ma60 = (price - ma60) / ma60 * 100 if ma60 > 0 else 0
+            enter = (
+                price > ma60 and
+                ma60_slope > 0 and
+                dev_ma60 < 35
+            )
+            exit_trend = (
+                price < ma60 and
+                prev_close < prev_ma60
+            )
 
-        enter = (
-            price > ma60 and
-            ma60_slope > 0 and
-            dev_ma60 < 35
-        )
-        exit_trend = (
-            price < ma60 and
-            prev['收盘'] < prev_ma60
-        )
+            if enter:
+                signal[i] = 'buy'
+                reason[i] = f'MA60趋势持有(MA60斜率{ma60_slope:+.1f}%, 偏离{dev_ma60:+.1f}%)'
+            elif exit_trend:
+                signal[i] = 'sell'
+                reason[i] = '连续跌破MA60，趋势破坏'
 
-        if enter:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'buy'
-            signals.iloc[i, signals.columns.get_loc('reason')] = f'MA60趋势持有(MA60斜率{ma60_slope:+.1f}%, 偏离{dev_ma60:+.1f}%)'
-        elif exit_trend:
-            signals.iloc[i, signals.columns.get_loc('signal')] = 'sell'
-            signals.iloc[i, signals.columns.get_loc('reason')] = '连续跌破MA60，趋势破坏'
-
-    return signals
+    return pd.DataFrame({'signal': signal, 'reason': reason}, index=df.index)
 
 
 # ============================================================
 # 交易模拟引擎
 # ============================================================
 
+# 平仓原因编码（_simulate_loop 输出）
+_EXIT_STOP_LOSS = 1
+_EXIT_TRAILING = 2
+_EXIT_TIMEOUT = 3
+_EXIT_SIGNAL = 4
+
+
+@njit(cache=True, error_model='numpy')
+def _simulate_loop(opens, highs, lows, closes, sigs, start_idx, end_idx, cash,
+                   buy_fee_rate, sell_fee_rate, slippage_rate, position_pct,
+                   stop_loss_pct, trailing_activate_pct, trailing_stop_pct, max_holding_days):
+    """
+    交易状态机内核：信号在 day i 产生（sigs: 1 买 / -1 卖 / 0 无），在 day i+1 的开盘价执行。
+    风控（止损、移动止盈、最大持仓天数）优先于信号处理。
+
+    返回 (equity, exposure, trade_rows, trade_prices, trade_shares, exit_codes, n_trades,
+          cash, shares, open_row, open_price, open_cost, peak_price, holding_days)
+        equity/exposure: 每个执行日的权益与是否持仓
+        trade_rows[t] = (买入执行行, 卖出执行行)
+        trade_prices[t] = (买入价, 买入费用, 卖出价, 卖出费用, 峰值涨幅%)
+        open_*: 期末未平仓的买入执行行/价格/费用（无持仓时行号为 -1）
+    """
+    steps = max(end_idx - start_idx, 0)
+    equity = np.empty(steps)
+    exposure = np.zeros(steps, dtype=np.bool_)
+    trade_rows = np.empty((steps, 2), dtype=np.int64)
+    trade_prices = np.empty((steps, 5))
+    trade_shares = np.empty(steps, dtype=np.int64)
+    exit_codes = np.empty(steps, dtype=np.int64)
+    n_trades = 0
+
+    shares = 0
+    open_row = -1
+    open_price = 0.0
+    open_cost = 0.0
+    peak_price = 0.0
+    holding_days = 0
+
+    for step in range(steps):
+        row = start_idx + step + 1
+        exec_price = opens[row]
+        day_low = lows[row]
+        day_high = highs[row]
+
+        exit_code = 0
+        exit_price = 0.0
+        peak_pnl = 0.0
+        # ── 风控检查（持仓中时，优先于信号处理）──
+        if shares > 0:
+            holding_days += 1
+            if day_high > peak_price:
+                peak_price = day_high
+
+            # 1) 止损：日内最低价触及止损线；缺口低开时按开盘价成交更保守
+            stop_loss_price = open_price * (1 + stop_loss_pct / 100)
+            if day_low <= stop_loss_price:
+                exit_code = _EXIT_STOP_LOSS
+                exit_price = exec_price if exec_price < stop_loss_price else stop_loss_price
+            else:
+                # 2) 移动止盈：曾涨到激活线后回落到保底线
+                peak_pnl = (peak_price - open_price) / open_price * 100
+                trailing_price = open_price * (1 + trailing_stop_pct / 100)
+                if peak_pnl >= trailing_activate_pct and day_low <= trailing_price:
+                    exit_code = _EXIT_TRAILING
+                    exit_price = exec_price if exec_price < trailing_price else trailing_price
+                # 3) 最大持仓天数
+                elif holding_days >= max_holding_days:
+                    exit_code = _EXIT_TIMEOUT
+                    exit_price = exec_price
+
+        # ── 信号处理 ──
+        if exit_code == 0:
+            if sigs[row - 1] == 1 and shares == 0:
+                buy_price = exec_price * (1 + slippage_rate)
+                target_cash = cash * position_pct
+                max_shares = int(target_cash / (buy_price * (1 + buy_fee_rate)))
+                max_shares = (max_shares // 100) * 100
+                if max_shares <= 0:
+                    equity[step] = cash
+                    continue
+                cost = buy_price * max_shares * buy_fee_rate
+                cash -= buy_price * max_shares + cost
+                shares = max_shares
+                open_row = row
+                open_price = buy_price
+                open_cost = cost
+                peak_price = max(day_high, buy_price)
+                holding_days = 0
+            elif sigs[row - 1] == -1 and shares > 0:
+                exit_code = _EXIT_SIGNAL
+                exit_price = exec_price
+
+        # ── 平仓 ──
+        if exit_code != 0:
+            sell_price = exit_price * (1 - slippage_rate)
+            sell_cost = sell_price * shares * sell_fee_rate
+            cash += sell_price * shares - sell_cost
+            trade_rows[n_trades, 0] = open_row
+            trade_rows[n_trades, 1] = row
+            trade_prices[n_trades, 0] = open_price
+            trade_prices[n_trades, 1] = open_cost
+            trade_prices[n_trades, 2] = sell_price
+            trade_prices[n_trades, 3] = sell_cost
+            trade_prices[n_trades, 4] = peak_pnl
+            trade_shares[n_trades] = shares
+            exit_codes[n_trades] = exit_code
+            n_trades += 1
+            shares = 0
+            open_row = -1
+            peak_price = 0.0
+            holding_days = 0
+
+        # 记录每日权益
+        equity[step] = cash + shares * closes[row]
+        exposure[step] = shares > 0
+
+    return (equity, exposure, trade_rows, trade_prices, trade_shares, exit_codes, n_trades,
+            cash, shares, open_row, open_price, open_cost, peak_price, holding_days)
+
+
 class TradeSimulator:
     """模拟交易执行器"""
 
@@ -510,58 +714,34 @@ class TradeSimulator:
         self.trailing_stop_pct = trailing_stop_pct
         self.max_holding_days = max_holding_days
         self.trades = []        # 已完成的完整交易 (买+卖)
+        # 与 trades 一一对应的列数组（SoA），供 get_metrics 向量化汇总
+        self.trade_pnl_pcts = np.empty(0)
+        self.trade_net_pnls = np.empty(0)
+        self.trade_holding_days = np.empty(0, dtype=np.int64)  # 持仓自然日数
         self.pending_buy = None  # 未平仓的买入记录
-        self.equity_curve = []   # (date, equity)
-        self.exposure_curve = [] # 每个权益记录点是否持仓
-
-    def _buy_cost(self, price, shares):
-        return price * shares * (self.commission_rate + self.transfer_fee_rate)
-
-    def _sell_cost(self, price, shares):
-        return price * shares * (self.commission_rate + self.stamp_tax_rate + self.transfer_fee_rate)
-
-    def _buy_price(self, raw_price):
-        return raw_price * (1 + self.slippage_rate)
-
-    def _sell_price(self, raw_price):
-        return raw_price * (1 - self.slippage_rate)
-
-    def _append_equity(self, date, equity):
-        self.equity_curve.append((date, equity))
-        self.exposure_curve.append(self.shares > 0)
-
-    def _close_position(self, raw_sell_price, sell_date, sell_reason):
-        """平仓辅助函数"""
-        sell_price = self._sell_price(raw_sell_price)
-        shares = self.shares
-        proceeds = sell_price * self.shares
-        sell_cost = self._sell_cost(sell_price, self.shares)
-        self.cash += proceeds - sell_cost
-
-        buy_price = self.pending_buy['buy_price']
-        buy_cost = self.pending_buy['buy_cost']
-        entry_value = buy_price * shares
-        gross_pnl = proceeds - entry_value
-        net_pnl = proceeds - sell_cost - entry_value - buy_cost
-        invested = entry_value + buy_cost
-        pnl = net_pnl / invested * 100 if invested > 0 else 0.0
-        gross_pnl_pct = gross_pnl / entry_value * 100 if entry_value > 0 else 0.0
-
-        self.trades.append({
-            'buy_date': self.pending_buy['buy_date'],
-            'buy_price': buy_price,
-            'sell_date': sell_date,
-            'sell_price': sell_price,
-            'shares': shares,
-            'pnl_pct': pnl,
-            'gross_pnl_pct': gross_pnl_pct,
-            'net_pnl': net_pnl,
-            'cost': buy_cost + sell_cost,
-            'buy_reason': self.pending_buy['reason'],
-            'sell_reason': sell_reason,
-        })
-        self.shares = 0
-        self.pending_buy = None
+        # 权益曲线按执行日数一次分配（日期 / 权益 / 是否持仓 三个等长数组）
+        self.equity_dates = np.empty(0, dtype=object)
+        self.equity_values = np.empty(0)
+        self.exposure_flags = np.empty(0, dtype=np.bool_)
+
+    @property
+    def equity_curve(self):
+        """[(date, equity), ...]"""
+        return list(zip(self.equity_dates, self.equity_values))
+
+    @property
+    def exposure_curve(self):
+        """每个权益记录点是否持仓"""
+        return list(self.exposure_flags)
+
+    def _exit_reason(self, exit_code, peak_pnl, signal_reason):
+        if exit_code == _EXIT_STOP_LOSS:
+            return f'止损{self.stop_loss_pct}%'
+        if exit_code == _EXIT_TRAILING:
+            return f'移动止盈(峰值+{peak_pnl:.1f}%)'
+        if exit_code == _EXIT_TIMEOUT:
+            return f'超时{self.max_holding_days}天'
+        return signal_reason
 
     def execute_signals(self, df, signals, start_idx, end_idx=None):
         """
@@ -569,163 +749,144 @@ class TradeSimulator:
         包含止损、移动止盈、最大持仓天数等风控机制。
         start_idx: 信号开始有效的位置（跳过预热期）
         end_idx: 最后一个信号位置（不含），用于样本内/样本外分段验证
+
+        逐日状态机在 _simulate_loop 内核中运行（只处理数值），
+        日期与理由文本在内核返回后按成交行号一次性拼回交易记录。
         """
-        self._peak_price = 0  # 持仓期间最高价（用于移动止盈）
-        self._holding_days = 0  # 持仓天数
         if end_idx is None:
             end_idx = len(df) - 1
         end_idx = min(end_idx, len(df) - 1)
 
-        for i in range(start_idx, end_idx):
-            exec_day = df.iloc[i + 1]
-            exec_price = exec_day['开盘']
-            exec_date = exec_day['日期']
-            day_low = exec_day['最低']
-            day_high = exec_day['最高']
-            day_close = exec_day['收盘']
-
-            # ── 风控检查（持仓中时，优先于信号处理）──
-            if self.shares > 0 and self.pending_buy is not None:
-                buy_price = self.pending_buy['buy_price']
-                self._holding_days += 1
-
-                # 更新持仓最高价
-                if day_high > self._peak_price:
-                    self._peak_price = day_high
-
-                # 1) 止损检查：日内最低价触及-3%
-                stop_loss_price = buy_price * (1 + self.stop_loss_pct / 100)
-                if day_low <= stop_loss_price:
-                    # 缺口低开时不能假设能按止损价成交，按开盘价更保守。
-                    sell_at = exec_price if exec_price < stop_loss_price else stop_loss_price
-                    self._close_position(sell_at, exec_date, f'止损{self.stop_loss_pct}%')
-                    self._peak_price = 0
-                    self._holding_days = 0
-                    equity = self.cash + self.shares * day_close
-                    self._append_equity(exec_date, equity)
-                    continue
-
-                # 2) 移动止盈：曾涨+2%后回落到仅+1%
-                pnl_from_peak = (self._peak_price - buy_price) / buy_price * 100
-                if pnl_from_peak >= self.trailing_activate_pct:
-                    trailing_price = buy_price * (1 + self.trailing_stop_pct / 100)
-                    if day_low <= trailing_price:
-                        sell_at = exec_price if exec_price < trailing_price else trailing_price
-                        self._close_position(sell_at, exec_date, f'移动止盈(峰值+{pnl_from_peak:.1f}%)')
-                        self._peak_price = 0
-                        self._holding_days = 0
-                        equity = self.cash + self.shares * day_close
-                        self._append_equity(exec_date, equity)
-                        continue
-
-                # 3) 最大持仓天数
-                if self._holding_days >= self.max_holding_days:
-                    self._close_position(exec_price, exec_date, f'超时{self.max_holding_days}天')
-                    self._peak_price = 0
-                    self._holding_days = 0
-                    equity = self.cash + self.shares * day_close
-                    self._append_equity(exec_date, equity)
-                    continue
-
-            # ── 信号处理 ──
-            sig = signals.iloc[i]['signal']
-            reason = signals.iloc[i]['reason']
+        closes = df['收盘'].to_numpy(dtype=np.float64)
+        dates = df['日期'].to_numpy()
+        sig_col = signals['signal'].to_numpy(dtype=object)
+        sigs = (sig_col == 'buy').astype(np.int8) - (sig_col == 'sell').astype(np.int8)
+        reasons = signals['reason'].to_numpy(dtype=object)
+
+        (equity, exposure, trade_rows, trade_prices, trade_shares, exit_codes, n_trades,
+         cash, shares, open_row, open_price, open_cost,
+         self._peak_price, self._holding_days) = _simulate_loop(
+            df['开盘'].to_numpy(dtype=np.float64), df['最高'].to_numpy(dtype=np.float64),
+            df['最低'].to_numpy(dtype=np.float64), closes, sigs, start_idx, end_idx,
+            float(self.cash),
+            self.commission_rate + self.transfer_fee_rate,
+            self.commission_rate + self.stamp_tax_rate + self.transfer_fee_rate,
+            self.slippage_rate, self.position_pct, self.stop_loss_pct,
+            self.trailing_activate_pct, self.trailing_stop_pct, self.max_holding_days,
+        )
 
-            if sig == 'buy' and self.shares == 0:
-                buy_price = self._buy_price(exec_price)
-                target_cash = self.cash * self.position_pct
-                buy_fee_rate = self.commission_rate + self.transfer_fee_rate
-                max_shares = int(target_cash / (buy_price * (1 + buy_fee_rate)))
-                max_shares = (max_shares // 100) * 100
-                if max_shares <= 0:
-                    equity = self.cash
-                    self._append_equity(exec_date, equity)
-                    continue
-                cost = self._buy_cost(buy_price, max_shares)
-                self.cash -= buy_price * max_shares + cost
-                self.shares = max_shares
-                self.pending_buy = {
-                    'buy_date': exec_date,
-                    'buy_price': buy_price,
-                    'buy_cost': cost,
-                    'shares': max_shares,
-                    'reason': reason,
-                }
-                self._peak_price = max(day_high, buy_price)
-                self._holding_days = 0
-
-            elif sig == 'sell' and self.shares > 0 and self.pending_buy is not None:
-                self._close_position(exec_price, exec_date, reason)
-                self._peak_price = 0
-                self._holding_days = 0
-
-            # 记录每日权益
-            equity = self.cash + self.shares * day_close
-            self._append_equity(exec_date, equity)
-
-        # 补上最后一天的权益
-        if len(df) > 0:
-            last_pos = min(end_idx, len(df) - 1)
-            last = df.iloc[last_pos]
-            equity = self.cash + self.shares * last['收盘']
-            if not self.equity_curve or self.equity_curve[-1][0] != last['日期']:
-                self._append_equity(last['日期'], equity)
+        # 各笔交易的盈亏按列一次算出（与逐笔标量计算逐位一致）
+        trade_rows = trade_rows[:n_trades]
+        buy_price, buy_cost, sell_price, sell_cost, peak_pnl = trade_prices[:n_trades].T
+        shares_arr = trade_shares[:n_trades].astype(np.int64)
+        proceeds = sell_price * shares_arr
+        entry_value = buy_price * shares_arr
+        net_pnl = proceeds - sell_cost - entry_value - buy_cost
+        invested = entry_value + buy_cost
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(invested > 0, net_pnl / invested * 100, 0.0)
+            gross_pnl_pct = np.where(entry_value > 0, (proceeds - entry_value) / entry_value * 100, 0.0)
+
+        # 持仓天数：成交日期一次向量化解析，不在 get_metrics 里逐笔 pd.to_datetime
+        stamps = np.asarray(pd.to_datetime(dates[trade_rows.ravel()]), dtype='datetime64[ns]')
+        holding_days = (stamps[1::2] - stamps[::2]) // np.timedelta64(1, 'D')
+
+        self.trade_pnl_pcts = np.concatenate([self.trade_pnl_pcts, pnl_pct])
+        self.trade_net_pnls = np.concatenate([self.trade_net_pnls, net_pnl])
+        self.trade_holding_days = np.concatenate([self.trade_holding_days, holding_days])
+
+        for t, (buy_row, sell_row) in enumerate(trade_rows):
+            self.trades.append({
+                'buy_date': dates[buy_row],
+                'buy_price': buy_price[t],
+                'sell_date': dates[sell_row],
+                'sell_price': sell_price[t],
+                'shares': int(shares_arr[t]),
+                'pnl_pct': pnl_pct[t],
+                'gross_pnl_pct': gross_pnl_pct[t],
+                'net_pnl': net_pnl[t],
+                'cost': buy_cost[t] + sell_cost[t],
+                'buy_reason': reasons[buy_row - 1],
+                'sell_reason': self._exit_reason(exit_codes[t], peak_pnl[t], reasons[sell_row - 1]),
+            })
+
+        self.cash = cash
+        self.shares = int(shares)
+        if self.shares > 0:
+            self.pending_buy = {
+                'buy_date': dates[open_row],
+                'buy_price': open_price,
+                'buy_cost': open_cost,
+                'shares': self.shares,
+                'reason': reasons[open_row - 1],
+            }
+        # 补上最后一天的权益（内核已覆盖到 end_idx 时无需补）
+        n_prev, steps = len(self.equity_values), len(equity)
+        last_date = dates[end_idx] if len(df) > 0 else None
+        append_last = len(df) > 0 and not steps and (not n_prev or self.equity_dates[-1] != last_date)
+
+        # 已知总长度，一次分配后按段写入
+        total = n_prev + steps + append_last
+        equity_dates = np.empty(total, dtype=object)
+        equity_values = np.empty(total)
+        exposure_flags = np.empty(total, dtype=np.bool_)
+        equity_dates[:n_prev] = self.equity_dates
+        equity_values[:n_prev] = self.equity_values
+        exposure_flags[:n_prev] = self.exposure_flags
+        equity_dates[n_prev:n_prev + steps] = dates[start_idx + 1:end_idx + 1]
+        equity_values[n_prev:n_prev + steps] = equity
+        exposure_flags[n_prev:n_prev + steps] = exposure
+        if append_last:
+            equity_dates[-1] = last_date
+            equity_values[-1] = self.cash + self.shares * closes[end_idx]
+            exposure_flags[-1] = self.shares > 0
+        self.equity_dates, self.equity_values, self.exposure_flags = equity_dates, equity_values, exposure_flags
 
     def get_metrics(self, df, start_idx, end_idx=None):
         """计算回测绩效指标"""
-        if not self.equity_curve:
+        if not len(self.equity_values):
             return {}
         if end_idx is None:
             end_idx = len(df) - 1
         end_idx = min(end_idx, len(df) - 1)
 
-        equities = [e for _, e in self.equity_curve]
+        equities = self.equity_values
         final_equity = equities[-1]
         total_return = (final_equity / self.initial_capital - 1) * 100
 
         # 年化收益
-        first_date = pd.to_datetime(df.iloc[start_idx]['日期'])
-        last_date = pd.to_datetime(df.iloc[end_idx]['日期'])
+        first_date = pd.to_datetime(df['日期'].iat[start_idx])
+        last_date = pd.to_datetime(df['日期'].iat[end_idx])
         days = (last_date - first_date).days
         if days > 0:
             annual_return = ((final_equity / self.initial_capital) ** (365 / days) - 1) * 100
         else:
             annual_return = 0
 
-        # 最大回撤
-        peak = equities[0]
-        max_dd = 0
-        for e in equities:
-            if e > peak:
-                peak = e
-            dd = (peak - e) / peak * 100
-            if dd > max_dd:
-                max_dd = dd
+        # 最大回撤：累计最高点一次求出，逐日回撤取最大
+        peaks = np.maximum.accumulate(equities)
+        max_dd = max(0, ((peaks - equities) / peaks * 100).max())
 
         # 胜率 / 盈亏比（用扣费后净收益计算）
-        wins = [t for t in self.trades if t['pnl_pct'] > 0]
-        losses = [t for t in self.trades if t['pnl_pct'] <= 0]
-        win_rate = len(wins) / len(self.trades) * 100 if self.trades else 0
-
-        total_profit = sum(t['net_pnl'] for t in wins) if wins else 0
-        total_loss = abs(sum(t['net_pnl'] for t in losses)) if losses else 0
+        pnl_pcts = self.trade_pnl_pcts
+        win_mask = pnl_pcts > 0
+        loss_mask = pnl_pcts <= 0
+        n_trades, n_wins, n_losses = len(pnl_pcts), int(win_mask.sum()), int(loss_mask.sum())
+        win_rate = n_wins / n_trades * 100 if n_trades else 0
+
+        total_profit = self.trade_net_pnls[win_mask].sum() if n_wins else 0
+        total_loss = abs(self.trade_net_pnls[loss_mask].sum()) if n_losses else 0
         profit_factor = total_profit / total_loss if total_loss > 0 else float('inf') if total_profit > 0 else 0
-        trade_pcts = [t['pnl_pct'] for t in self.trades]
-        avg_trade_pct = float(np.mean(trade_pcts)) if trade_pcts else 0.0
-        avg_win_pct = float(np.mean([t['pnl_pct'] for t in wins])) if wins else 0.0
-        avg_loss_pct = float(np.mean([t['pnl_pct'] for t in losses])) if losses else 0.0
+        avg_trade_pct = float(np.mean(pnl_pcts)) if n_trades else 0.0
+        avg_win_pct = float(np.mean(pnl_pcts[win_mask])) if n_wins else 0.0
+        avg_loss_pct = float(np.mean(pnl_pcts[loss_mask])) if n_losses else 0.0
 
         # 平均持仓天数
-        holding_days = []
-        for t in self.trades:
-            d1 = pd.to_datetime(t['buy_date'])
-            d2 = pd.to_datetime(t['sell_date'])
-            holding_days.append((d2 - d1).days)
-        avg_holding = np.mean(holding_days) if holding_days else 0
+        avg_holding = np.mean(self.trade_holding_days) if n_trades else 0
 
         # 买入持有收益
-        start_price = df.iloc[start_idx]['收盘']
-        end_price = df.iloc[end_idx]['收盘']
+        start_price = df['收盘'].iat[start_idx]
+        end_price = df['收盘'].iat[end_idx]
         buy_hold_return = (end_price / start_price - 1) * 100
         alpha_vs_buy_hold = total_return - buy_hold_return
 
@@ -737,16 +898,16 @@ class TradeSimulator:
         else:
             sharpe = 0.0
 
-        exposure_pct = np.mean(self.exposure_curve) * 100 if self.exposure_curve else 0.0
+        exposure_pct = np.mean(self.exposure_flags) * 100
 
         return {
             'total_return': total_return,
             'annual_return': annual_return,
             'max_drawdown': max_dd,
             'win_rate': win_rate,
-            'wins': len(wins),
-            'losses': len(losses),
-            'total_trades': len(self.trades),
+            'wins': n_wins,
+            'losses': n_losses,
+            'total_trades': n_trades,
             'profit_factor': profit_factor,
             'avg_trade_pct': avg_trade_pct,
             'avg_win_pct': avg_win_pct,
@@ -854,26 +1015,29 @@ def run_backtest(
 
     if verbose:
         print(f"✅ 获取到 {len(df)} 条日线数据")
-        print(f"   日期范围: {df.iloc[0]['日期']} ~ {df.iloc[-1]['日期']}")
+        print(f"   日期范围: {df['日期'].iat[0]} ~ {df['日期'].iat[-1]}")
         print("⏳ 正在计算技术指标...")
 
     df = calculate_indicators(df)
 
     # 确定信号起始位置（跳过预热期，同时确保至少有 6 个月的回测区间）
     start_idx = min(SIGNAL_START_OFFSET, max(0, len(df) - 130))
-    backtest_start_date = df.iloc[start_idx]['日期']
-    backtest_end_date = df.iloc[-1]['日期']
+    backtest_start_date = df['日期'].iat[start_idx]
+    backtest_end_date = df['日期'].iat[-1]
 
     if verbose:
         print(f"📅 回测区间: {backtest_start_date} ~ {backtest_end_date}")
         print("⏳ 正在生成交易信号...")
 
+    # 策略 A / B 共用同一份列数组与交叉掩码
+    masks = _precompute_masks(df)
+
     # 策略 A
-    sig_a = strategy_a_signals(df)
+    sig_a = strategy_a_signals(df, masks)
     metrics_a, trades_a = _simulate_strategy(df, sig_a, start_idx, simulator_kwargs)
 
     # 策略 B
-    sig_b = strategy_b_signals(df)
+    sig_b = strategy_b_signals(df, masks)
     metrics_b, trades_b = _simulate_strategy(df, sig_b, start_idx, simulator_kwargs)
 
     # 策略 C
@@ -896,7 +1060,7 @@ def run_backtest(
         metrics_b_oos, trades_b_oos = _simulate_strategy(df, sig_b, split_idx, simulator_kwargs)
         metrics_c_oos, trades_c_oos = _simulate_strategy(df, sig_c, split_idx, trend_kwargs)
         oos = {
-            'split_date': df.iloc[split_idx]['日期'],
+            'split_date': df['日期'].iat[split_idx],
             'metrics_a_is': metrics_a_is,
             'metrics_b_is': metrics_b_is,
             'metrics_c_is': metrics_c_is,
@@ -938,6 +1102,25 @@ def run_backtest(
     return result
 
 
+def run_backtests(codes, max_workers=4, **kwargs):
+    """
+    多只股票并发回测，按输入顺序逐个打印报告
+
+    各股票回测互相独立，耗时主要在行情获取（网络 I/O），线程池即可重叠等待；
+    同进程内共享 DataSource 缓存，baostock 会话由 DataSource 内部加锁保护。
+    kwargs 透传给 run_backtest（verbose 固定为 False，报告统一在此打印以保持输出有序）。
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_backtest, code, verbose=False, **kwargs) for code in codes]
+        for future in futures:
+            result = future.result()
+            if result is not None:
+                print_single_report(result)
+            results.append(result)
+    return results
+
+
 def print_single_report(result):
     """打印单只股票的回测报告"""
     name = result['name']
@@ -1193,6 +1376,7 @@ def main():
     parser.add_argument('--max-drawdown', type=float, default=15.0, help='赚钱闸门最大回撤上限')
     parser.add_argument('--min-profit-factor', type=float, default=1.2, help='赚钱闸门最低盈亏比')
     parser.add_argument('--min-alpha', type=float, default=0.0, help='赚钱闸门最低相对买入持有超额收益')
+    parser.add_argument('--workers', type=int, default=4, help='多只股票回测的并发线程数')
     parser.add_argument('--self-test', action='store_true', help='运行离线自检，不访问行情源')
     args = parser.parse_args()
 
@@ -1230,12 +1414,9 @@ def main():
         run_backtest(codes[0], verbose=True, days=args.days,
                      simulator_kwargs=simulator_kwargs, gate_kwargs=gate_kwargs)
     else:
-        # 多只股票模式：逐个回测 + 汇总
-        results = []
-        for code in codes:
-            r = run_backtest(code, verbose=True, days=args.days,
-                             simulator_kwargs=simulator_kwargs, gate_kwargs=gate_kwargs)
-            results.append(r)
+        # 多只股票模式：并发回测 + 汇总
+        results = run_backtests(codes, max_workers=args.workers, days=args.days,
+                                simulator_kwargs=simulator_kwargs, gate_kwargs=gate_kwargs)
         print_multi_summary(results)
 
 
@@ -12,57 +12,156 @@
 缓存策略（增量更新）：
 - 历史K线：持久化存储，每次仅从上次最后日期补全新数据
 - 指数成分股：当日有效
-- 实时行情：内存缓存 30s~5min TTL
+- 内存缓存：按类型设有效期（实时行情 15~60s，K线 5~10min，股票列表/成分股 1天），见 _ttl_by_kind
 - 缓存命中统计：每次运行输出缓存效率
 """
 
-import baostock as bs
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import asyncio
+import heapq
+import itertools
 import warnings
 import time
-import hashlib
 import json
 import os
 import pickle
+import re
 import shutil
 import subprocess
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache, lru_cache, partial
 
-warnings.filterwarnings('ignore')
+# 只屏蔽第三方数据源库内部产生的告警（akshare/adata 依赖的 pandas 旧用法、urllib3 证书提示等），
+# 按告警归属的模块匹配；本项目代码触发的告警照常显示
+warnings.filterwarnings('ignore', module=r'(akshare|adata|baostock|urllib3|requests)(\.|$)')
+
+# Copy-on-Write：缓存命中只返回浅拷贝（新对象、共享数据），调用方修改时 pandas 才真正复制，
+# 只读使用（打印、算指标）不再为每次命中整表深拷贝
+pd.set_option('mode.copy_on_write', True)
 
 _DISK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
 os.makedirs(_DISK_CACHE_DIR, exist_ok=True)
 
-# 延迟导入 adata（可选依赖）
-_adata = None
-_adata_available = None  # None=未检测, True=可用, False=不可用
+@lru_cache(maxsize=1024)
+def _norm_date(value, compact=False):
+    """
+    日期参数统一为 'YYYY-MM-DD'（compact=True 时为 'YYYYMMDD'）
+
+    接受 datetime / 'YYYYMMDD' / 'YYYY-MM-DD'；空值原样返回，由调用方补默认日期
+    """
+    if not value:
+        return value
+    if isinstance(value, datetime):
+        return value.strftime('%Y%m%d' if compact else '%Y-%m-%d')
+    s = str(value)
+    if compact:
+        return s.replace('-', '')
+    if len(s) == 8:
+        return f'{s[:4]}-{s[4:6]}-{s[6:]}'
+    return s
+
+
+_today_cache = {}  # fmt -> (今日日期字符串, 生成时间戳)
+
+
+def _today(fmt='%Y-%m-%d'):
+    """今日日期字符串（按格式缓存 1 秒，批量获取时不必每次调用都格式化当前时间）"""
+    now = time.time()
+    cached = _today_cache.get(fmt)
+    if cached is None or now - cached[1] > 1:
+        cached = _today_cache[fmt] = (datetime.now().strftime(fmt), now)
+    return cached[0]
+
+
+# DataSource.cache_info() 返回值
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'currsize', 'hit_rate'])
+
+
+# 股票列表过滤：ST / 退市 / 带 * 的名称
+_EXCLUDED_NAME_RE = re.compile(r'ST|退市|\*')
+
+
+# 代码首位 → 交易所（0/3 开头为深市，其余按沪市处理）
+_MARKET_BY_LEADING = {'0': 'sz', '3': 'sz'}
 
 
+# 延迟导入 baostock：首次 login() 时才加载，只用 stock-api / adata / 缓存的调用不必付出导入开销
+bs = None
+
+
+def _import_baostock():
+    """延迟导入 baostock"""
+    global bs
+    if bs is None:
+        import baostock
+        bs = baostock
+    return bs
+
+
+# 延迟导入可选依赖：首次调用时尝试导入，结果（模块或 None）由 cache 记住，之后每次只是一次查表
+
+
+@cache
 def _get_adata():
-    """延迟导入 adata"""
-    global _adata, _adata_available
-    if _adata_available is False:
+    """延迟导入 adata（资金流向、分时、5档盘口等补充数据源），未安装返回 None"""
+    try:
+        import adata
+        return adata
+    except ImportError:
+        return None
+
+
+@cache
+def _get_akshare():
+    """延迟导入 akshare（K线备用数据源），未安装返回 None"""
+    try:
+        import akshare
+        return akshare
+    except ImportError:
         return None
-    if _adata is None:
-        try:
-            import adata
-            _adata = adata
-            _adata_available = True
-        except ImportError:
-            _adata_available = False
-            return None
-    return _adata
 
 
 class DataSource:
     """统一数据源接口 — 多数据源自动切换，增量缓存"""
     
     _logged_in = False
-    _cache = {}
-    _cache_ttl = 300
-    _cache_write_count = 0
-    _akshare_available = None
+    _bs_lock = threading.RLock()  # baostock 共用一个 socket 会话，查询需串行
+    _cache = OrderedDict()  # key -> (data, expires_at)，按最近访问排序
+    _expiry_heap = []  # (expires_at, seq, key) 小顶堆，清理过期条目时只弹出已到期的部分
+    _expiry_seq = itertools.count()  # 堆记录的写入序号：到期时间相同时按序号比较，不比较键
+    _cache_lock = threading.RLock()  # 批量并发获取时各线程共用内存缓存
+    _cache_ttl = 300  # 未在 _ttl_by_kind 中列出的缓存类型
+    # 各类缓存的有效期（秒），按缓存键第一个参数区分：实时行情只缓存几秒，股票列表等当日基本不变
+    # 日K请求区间含今天时交易时段会补当日实时行情，仍用 5 分钟
+    _ttl_by_kind = {
+        'hist': 300,
+        'minute': 600,
+        'realtime': 15,
+        'intraday_min': 60,
+        'index_realtime': 15,
+        'capital_flow': 1800,
+        'stock_list': 86400,
+        'index_stocks': 86400,
+        'concepts': 86400,
+        'trade_dates': 86400,
+    }
+    _hist_past_ttl = 86400 * 30  # 结束日期在今天之前的日K请求：历史K线不再变化
+    _intraday_final_ttl = 86400  # 收盘后的当日分时（缓存键含日期，次日自然不再命中）
+    _hist_recheck_interval = 600  # 收盘后数据源尚未发布当日K线时，两次增量请求的最短间隔（秒）
+    _cache_maxsize = 1024  # 超出后淘汰最久未访问的条目，防止长时间运行内存持续增长
+    _cache_hits = 0
+    _cache_misses = 0
+    _inflight = {}  # 正在获取中的请求 cache_key -> Future，并发相同请求只获取一次
+    _inflight_lock = threading.Lock()
+    _disk_cache_read = True  # False 时忽略已有磁盘缓存（仍写入），见 disable_disk_cache()
+    # K线数据源，按顺序尝试；新增数据源只需实现同签名的 _get_stock_hist_<name> 并加入此表
+    _hist_sources = ('stock_api', 'baostock', 'akshare')
+    _ak_failures = 0  # akshare 连续失败次数
+    _ak_next_probe = 0.0  # akshare 失败退避：此时间之前跳过 akshare（20s 起翻倍，最长 5 分钟）
     _stock_api_cli = None
     _stock_api_cli_checked = False
 
@@ -72,18 +171,23 @@ class DataSource:
     
     @classmethod
     def login(cls):
-        if not cls._logged_in:
-            lg = bs.login()
-            if lg.error_code == '0':
-                cls._logged_in = True
-            else:
-                raise Exception(f"baostock 登录失败: {lg.error_msg}")
+        # 已登录时直接返回：整个进程共用一个会话，批量并发时各线程不必为检查登录状态等待 _bs_lock
+        if cls._logged_in:
+            return
+        with cls._bs_lock:
+            if not cls._logged_in:
+                lg = _import_baostock().login()
+                if lg.error_code == '0':
+                    cls._logged_in = True
+                else:
+                    raise Exception(f"baostock 登录失败: {lg.error_msg}")
     
     @classmethod
     def logout(cls):
-        if cls._logged_in:
-            bs.logout()
-            cls._logged_in = False
+        with cls._bs_lock:
+            if cls._logged_in:
+                bs.logout()
+                cls._logged_in = False
 
     @classmethod
     def print_cache_stats(cls):
@@ -105,44 +209,77 @@ class DataSource:
     def reset_stats(cls):
         for k in cls._stats:
             cls._stats[k] = 0
+        with cls._cache_lock:
+            cls._cache_hits = cls._cache_misses = 0
     
     @classmethod
     def _get_cache_key(cls, *args, **kwargs):
-        key_str = str(args) + str(sorted(kwargs.items()))
-        return hashlib.md5(key_str.encode()).hexdigest()
+        # 进程内字典缓存，直接用可哈希的元组作键，无需计算 MD5
+        return (args, tuple(sorted(kwargs.items())))
     
     @classmethod
     def _get_cache(cls, key):
-        if key in cls._cache:
-            data, timestamp = cls._cache[key]
-            if time.time() - timestamp < cls._cache_ttl:
-                return data
-            else:
-                del cls._cache[key]
-        return None
+        with cls._cache_lock:
+            if key in cls._cache:
+                data, expires_at = cls._cache[key]
+                if time.time() < expires_at:
+                    cls._cache.move_to_end(key)
+                    cls._cache_hits += 1
+                    return data
+                else:
+                    del cls._cache[key]
+            cls._cache_misses += 1
+            return None
     
     @classmethod
-    def _set_cache(cls, key, data):
-        cls._cache[key] = (data, time.time())
-        cls._cache_write_count += 1
-        if cls._cache_write_count >= 100:
+    def _set_cache(cls, key, data, ttl=None):
+        """写入内存缓存；ttl 为空时按缓存类型取 _ttl_by_kind"""
+        if ttl is None:
+            ttl = cls._ttl_by_kind.get(key[0][0] if key[0] else None, cls._cache_ttl)
+        with cls._cache_lock:
+            expires_at = time.time() + ttl
+            cls._cache[key] = (data, expires_at)
+            cls._cache.move_to_end(key)
+            heapq.heappush(cls._expiry_heap, (expires_at, next(cls._expiry_seq), key))
             cls._cleanup_cache()
-            cls._cache_write_count = 0
+            while len(cls._cache) > cls._cache_maxsize:
+                cls._cache.popitem(last=False)
+            # 被覆盖或按 LRU 淘汰的键在堆中留有旧记录，要到期才弹出；
+            # 长有效期（如历史K线）下会越积越多，超过上限两倍时按现存条目重建
+            if len(cls._expiry_heap) > 2 * cls._cache_maxsize:
+                cls._expiry_heap = [(exp, next(cls._expiry_seq), k) for k, (_, exp) in cls._cache.items()]
+                heapq.heapify(cls._expiry_heap)
+
+    @classmethod
+    def cache_info(cls):
+        """内存缓存统计：命中次数、未命中次数、当前条目数、命中率（%）"""
+        with cls._cache_lock:
+            hits, misses = cls._cache_hits, cls._cache_misses
+            total = hits + misses
+            return CacheInfo(hits, misses, len(cls._cache), hits / total * 100 if total else 0.0)
 
     @classmethod
     def _cleanup_cache(cls):
-        now = time.time()
-        expired_keys = [
-            k for k, (_, ts) in cls._cache.items()
-            if now - ts >= cls._cache_ttl
-        ]
-        for k in expired_keys:
-            del cls._cache[k]
+        """删除已过期条目：只弹出堆顶已到期的记录，不扫描整个缓存"""
+        with cls._cache_lock:
+            now = time.time()
+            heap = cls._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, _, k = heapq.heappop(heap)
+                stored = cls._cache.get(k)
+                # 键被重新写入过时堆中是旧记录，以缓存中的到期时间为准
+                if stored is not None and stored[1] <= now:
+                    del cls._cache[k]
     
     # ============================================================
     # 磁盘缓存：持久化K线 + 当日有效的临时缓存
     # ============================================================
 
+    @classmethod
+    def disable_disk_cache(cls):
+        """本次运行忽略已有磁盘缓存，强制从网络获取（获取结果仍会写回缓存）"""
+        cls._disk_cache_read = False
+
     @classmethod
     def _hist_cache_path(cls, stock_code, adjust, period):
         """K线持久化缓存路径（不按日期分目录，长期有效）"""
@@ -154,7 +291,7 @@ class DataSource:
     def _get_hist_cache(cls, stock_code, adjust, period):
         """读取持久化K线缓存，返回 (DataFrame, last_date_str) 或 (None, None)"""
         path = cls._hist_cache_path(stock_code, adjust, period)
-        if os.path.exists(path):
+        if cls._disk_cache_read and os.path.exists(path):
             try:
                 with open(path, 'rb') as f:
                     df = pickle.load(f)
@@ -167,19 +304,105 @@ class DataSource:
         return None, None
 
     @classmethod
-    def _save_hist_cache(cls, stock_code, adjust, period, df):
-        """保存K线持久化缓存"""
-        path = cls._hist_cache_path(stock_code, adjust, period)
+    def _dump_pickle(cls, path, data):
+        """先写临时文件再原子替换：并发读到的要么是旧文件要么是完整的新文件，不会读到半截"""
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
         try:
-            with open(path, 'wb') as f:
-                pickle.dump(df, f)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
         except Exception:
-            pass
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def _save_hist_cache(cls, stock_code, adjust, period, df):
+        """保存K线持久化缓存"""
+        cls._dump_pickle(cls._hist_cache_path(stock_code, adjust, period), df)
     
+    @classmethod
+    def _trade_dates(cls):
+        """
+        近 30 天的交易日集合（baostock 交易日历，当日缓存）
+        获取失败时返回 None，调用方按周一至周五判断（不含节假日）
+        """
+        today = _today()
+        cache_key = cls._get_cache_key('trade_dates', today)
+        cached = cls._get_cache(cache_key)
+        if cached is not None:
+            return cached or None  # 空集合表示近期获取失败
+
+        dates = cls._get_disk_cache('trade_dates', today)
+        if dates is None:
+            start = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            try:
+                cls.login()
+                with cls._bs_lock:
+                    rs = bs.query_trade_dates(start_date=start, end_date=today)
+                    if rs.error_code != '0':
+                        raise Exception(f"baostock 查询失败: {rs.error_msg}")
+                    rows = cls._drain(rs)
+                dates = frozenset(row[0] for row in rows if row[1] == '1')
+            except Exception:
+                dates = None
+            if dates:
+                cls._set_disk_cache('trade_dates', today, dates)
+        # 失败也缓存 5 分钟，避免每次判断都重试网络
+        cls._set_cache(cache_key, dates or frozenset(), None if dates else cls._cache_ttl)
+        return dates or None
+
+    @classmethod
+    def _is_trade_day(cls, day):
+        """day（date）是否为交易日：优先查交易日历，日历不可用或超出范围时按工作日判断"""
+        dates = cls._trade_dates()
+        day_str = day.strftime('%Y-%m-%d')
+        if dates is not None and day_str >= min(dates):
+            return day_str in dates
+        return day.weekday() < 5
+
+    @classmethod
+    def _last_close_time(cls):
+        """最近一次收盘时刻（最近一个交易日的15:00，节假日按交易日历跳过）"""
+        now = datetime.now()
+        close = now.replace(hour=15, minute=0, second=0, microsecond=0)
+        if now < close:
+            close -= timedelta(days=1)
+        while not cls._is_trade_day(close.date()):
+            close -= timedelta(days=1)
+        return close
+
+    @classmethod
+    def _is_today_closed(cls):
+        """今天是交易日且已收盘（15:05 之后），当日分时数据不会再变"""
+        return not cls._is_trading_hours() and cls._last_close_time().date() == datetime.now().date()
+
+    @classmethod
+    def _is_hist_cache_fresh(cls, stock_code, adjust, period, last_cached_date, end_date):
+        """
+        持久化K线已含最近一个交易日的K线 → 无需增量请求（盘中今日K线由实时行情补齐）
+
+        以缓存数据的最后日期判断，而不是文件写入时间：收盘后数据源往往还要一段时间
+        才发布当日K线，这期间写入的缓存仍缺最后一根。缺的正是这一根时，
+        仅在文件刚写入/检查过（_hist_recheck_interval 内）时暂不重复请求。
+        """
+        last_close = cls._last_close_time()
+        last_close_date = last_close.strftime('%Y-%m-%d')
+        if end_date < last_close_date:
+            return False  # 缺的K线早已发布
+        if str(last_cached_date)[:10] >= last_close_date:
+            return True
+        try:
+            mtime = os.path.getmtime(cls._hist_cache_path(stock_code, adjust, period))
+        except OSError:
+            return False
+        return mtime >= last_close.timestamp() and time.time() - mtime < cls._hist_recheck_interval
+
     @classmethod
     def _disk_cache_path(cls, category, key):
         """临时磁盘缓存路径（按日期分目录，当日有效）"""
-        today = datetime.now().strftime('%Y%m%d')
+        today = _today('%Y%m%d')
         day_dir = os.path.join(_DISK_CACHE_DIR, today)
         os.makedirs(day_dir, exist_ok=True)
         safe_key = key.replace('/', '_').replace('.', '_')
@@ -188,7 +411,7 @@ class DataSource:
     @classmethod
     def _get_disk_cache(cls, category, key):
         path = cls._disk_cache_path(category, key)
-        if os.path.exists(path):
+        if cls._disk_cache_read and os.path.exists(path):
             try:
                 with open(path, 'rb') as f:
                     return pickle.load(f)
@@ -198,12 +421,7 @@ class DataSource:
     
     @classmethod
     def _set_disk_cache(cls, category, key, data):
-        path = cls._disk_cache_path(category, key)
-        try:
-            with open(path, 'wb') as f:
-                pickle.dump(data, f)
-        except Exception:
-            pass
+        cls._dump_pickle(cls._disk_cache_path(category, key), data)
     
     @classmethod
     def cleanup_old_disk_cache(cls, keep_days=7):
@@ -220,28 +438,66 @@ class DataSource:
                 import shutil
                 shutil.rmtree(full, ignore_errors=True)
     
-    @classmethod
-    def _convert_code(cls, stock_code):
-        """转换股票代码为 baostock 格式"""
-        if stock_code.startswith('6'):
-            return f'sh.{stock_code}'
-        elif stock_code.startswith(('0', '3')):
-            return f'sz.{stock_code}'
-        else:
-            return f'sh.{stock_code}'
+    @staticmethod
+    def _drain(rs):
+        """读出 baostock 结果集的全部行（需在 _bs_lock 内调用；方法绑定为局部变量，省去每行的属性查找）"""
+        rows = []
+        append = rows.append
+        next_row = rs.next
+        get_row = rs.get_row_data
+        while next_row():
+            append(get_row())
+        return rows
+
+    @staticmethod
+    def _rows_to_frame(rows, fields, numeric=()):
+        """
+        baostock 结果行（字符串列表）转为 DataFrame：先按列转置，各列一次生成最终类型的数组
 
-    @classmethod
-    def _convert_code_stock_api(cls, stock_code):
-        """转换股票代码为 stock-api 格式，如 SH600519 / SZ000651"""
+        numeric 中的列直接解析为 float64，不再经过 object 列 + 逐列 pd.to_numeric；
+        含空串等无法解析的值时该列退回 pd.to_numeric(errors='coerce')（记为 NaN）。
+        无数据行时返回只有列名的空 DataFrame。
+        """
+        if not rows:
+            return pd.DataFrame(columns=list(fields))
+        data = {}
+        for name, values in zip(fields, zip(*rows)):
+            if name in numeric:
+                try:
+                    data[name] = np.array(values, dtype=np.float64)
+                except ValueError:
+                    data[name] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                data[name] = np.array(values, dtype=object)
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def _to_float_columns(df, cols):
+        """
+        多列一次转为 float64（原地）：JSON 数值/数字字符串整块 astype，
+        含无法解析的值时退回逐列 pd.to_numeric(errors='coerce')
+        """
+        try:
+            df[cols] = df[cols].astype(np.float64)
+        except (ValueError, TypeError):
+            df[cols] = df[cols].apply(pd.to_numeric, errors='coerce')
+        return df
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _convert_code(stock_code):
+        """转换股票代码为 baostock 格式（A股代码总共几千个，结果全部缓存）"""
+        return f"{_MARKET_BY_LEADING.get(stock_code[:1], 'sh')}.{stock_code}"
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _convert_code_stock_api(stock_code):
+        """转换股票代码为 stock-api 格式，如 SH600519 / SZ000651（结果缓存）"""
         code = str(stock_code).strip().upper()
         if code.startswith(('SH', 'SZ', 'HK', 'US')):
             return code
         code = code.replace('SH.', '').replace('SZ.', '').replace('.', '')
-        if code.startswith('6'):
-            return f'SH{code}'
-        if code.startswith(('0', '3')):
-            return f'SZ{code}'
-        return f'SH{code}'
+        return f"{_MARKET_BY_LEADING.get(code[:1], 'sh').upper()}{code}"
 
     @classmethod
     def _normalize_stock_api_code(cls, stock_api_code):
@@ -326,7 +582,8 @@ class DataSource:
         return max(120, min(2000, int(calendar_days * 1.6) + 20))
     
     @classmethod
-    def get_stock_hist_minute(cls, stock_code, start_date=None, end_date=None, adjust='qfq', period='5'):
+    def get_stock_hist_minute(cls, stock_code, start_date=None, end_date=None, adjust='qfq', period='5',
+                              as_str=False):
         """
         获取股票分钟K线数据（带缓存）
         
@@ -336,32 +593,26 @@ class DataSource:
             end_date: 结束日期，格式 'YYYYMMDD' 或 datetime
             adjust: 复权类型，'qfq'=前复权, 'hfq'=后复权, ''=不复权
             period: 周期，'5'=5分钟, '15'=15分钟, '30'=30分钟, '60'=60分钟
+            as_str: True 时 时间 列返回 'YYYY-MM-DD HH:MM:SS' 字符串（旧格式），默认 datetime64
         
         返回:
-            DataFrame，列名与 akshare 兼容：时间、开盘、最高、最低、收盘、成交量
+            DataFrame，列名与 akshare 兼容：时间、开盘、最高、最低、收盘、成交量、成交额
         """
-        # 检查缓存
+        # 检查缓存（缓存中 时间 列为 datetime64，as_str 只在返回时格式化）
         cache_key = cls._get_cache_key('minute', stock_code, start_date, end_date, adjust, period)
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cls._minute_time_as_str(cached) if as_str else cached.copy(deep=False)
         
         cls.login()
         
         # 处理日期格式
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%Y-%m-%d')
-        elif start_date and len(start_date) == 8:
-            start_date = f'{start_date[:4]}-{start_date[4:6]}-{start_date[6:]}'
-        
-        if isinstance(end_date, datetime):
-            end_date = end_date.strftime('%Y-%m-%d')
-        elif end_date and len(end_date) == 8:
-            end_date = f'{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}'
+        start_date = _norm_date(start_date)
+        end_date = _norm_date(end_date)
         
         # 默认日期（今天）
         if not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
+            end_date = _today()
         if not start_date:
             start_date = end_date
         
@@ -372,31 +623,29 @@ class DataSource:
         adjust_map = {'qfq': '2', 'hfq': '1', '': '3'}
         adjustflag = adjust_map.get(adjust, '2')
         
-        # 查询数据
-        rs = bs.query_history_k_data_plus(
-            bs_code,
-            'date,time,code,open,high,low,close,volume',
-            start_date=start_date,
-            end_date=end_date,
-            frequency=period,
-            adjustflag=adjustflag
-        )
-        
-        if rs.error_code != '0':
-            raise Exception(f"baostock 查询失败: {rs.error_msg}")
-        
-        # 转换为 DataFrame
-        data_list = []
-        while rs.next():
-            data_list.append(rs.get_row_data())
+        # 查询数据（baostock 会话非线程安全，查询+读取结果需持锁）
+        with cls._bs_lock:
+            rs = bs.query_history_k_data_plus(
+                bs_code,
+                'date,time,code,open,high,low,close,volume,amount',
+                start_date=start_date,
+                end_date=end_date,
+                frequency=period,
+                adjustflag=adjustflag
+            )
+            
+            if rs.error_code != '0':
+                raise Exception(f"baostock 查询失败: {rs.error_msg}")
+            
+            data_list = cls._drain(rs)
         
         if not data_list:
             return pd.DataFrame()
         
-        df = pd.DataFrame(data_list, columns=rs.fields)
+        df = cls._rows_to_frame(data_list, rs.fields, numeric=('open', 'high', 'low', 'close', 'volume', 'amount'))
         
-        # 时间格式转换（baostock 返回如 '20260206093500000'）
-        df['时间'] = pd.to_datetime(df['time'], format='%Y%m%d%H%M%S%f').dt.strftime('%Y-%m-%d %H:%M:%S')
+        # 时间解析（baostock 返回如 '20260206093500000'），保留 datetime64 便于 resample / between_time
+        df['时间'] = pd.to_datetime(df['time'], format='%Y%m%d%H%M%S%f', cache=True)
         
         # 列名映射（兼容 akshare）
         df = df.rename(columns={
@@ -405,17 +654,26 @@ class DataSource:
             'low': '最低',
             'close': '收盘',
             'volume': '成交量',
+            'amount': '成交额',
         })
         
-        # 数据类型转换
-        for col in ['开盘', '最高', '最低', '收盘']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        df['成交量'] = pd.to_numeric(df['成交量'], errors='coerce').fillna(0).astype(np.int64)
+        # 数值列已在 _rows_to_frame 中解析为 float64
+        df['成交量'] = df['成交量'].fillna(0).astype(np.int64)
+        df['成交额'] = df['成交额'].fillna(0)
         
-        result = df[['时间', '开盘', '最高', '最低', '收盘', '成交量']]
+        result = df[['时间', '开盘', '最高', '最低', '收盘', '成交量', '成交额']]
         cls._set_cache(cache_key, result)
-        return result
+        return cls._minute_time_as_str(result) if as_str else result.copy(deep=False)
+
+    @staticmethod
+    def _minute_time_as_str(df):
+        """
+        分钟K线 时间 列格式化为 'YYYY-MM-DD HH:MM:SS'（兼容旧调用方）
+
+        numpy 按秒整列格式化（'YYYY-MM-DDTHH:MM:SS'）后替换分隔符，比逐个 strftime 快约 2.5 倍
+        """
+        iso = np.datetime_as_string(df['时间'].to_numpy(dtype='datetime64[s]'), unit='s')
+        return df.assign(时间=np.char.replace(iso, 'T', ' ').astype(object))
     
     @classmethod
     def _is_trading_hours(cls):
@@ -436,7 +694,7 @@ class DataSource:
         if df is None or df.empty:
             return df
 
-        today_str = datetime.now().strftime('%Y-%m-%d')
+        today_str = _today()
         last_date = str(df.iloc[-1]['日期'])
 
         # 如果已经包含今天数据，无需补充
@@ -533,44 +791,67 @@ class DataSource:
 
         增量缓存策略：
         1. 内存缓存命中 → 直接返回（5分钟TTL）
-        2. 持久化缓存命中 → 仅从缓存最后日期补全新数据（增量更新）
+        2. 持久化缓存命中 → 仅从缓存最后日期补全新数据（增量更新）；
+           若缓存已含最近一个交易日的K线，则直接返回，不再请求网络
         3. 无缓存 → 全量获取后存入持久化缓存
         """
+        # 规范化日期（先于缓存键计算：datetime.now() 之类带时分秒的参数也能命中同一天的缓存）
+        end_date = _norm_date(end_date)
+        if not end_date:
+            end_date = _today()
+
+        start_date = _norm_date(start_date)
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+
         # 1) 内存缓存
         cache_key = cls._get_cache_key('hist', stock_code, start_date, end_date, adjust, period)
         cached = cls._get_cache(cache_key)
         if cached is not None:
             cls._stats['hist_mem_hit'] += 1
-            return cached.copy()
-
-        # 规范化日期
-        if isinstance(end_date, datetime):
-            end_date = end_date.strftime('%Y-%m-%d')
-        elif end_date and len(str(end_date)) == 8:
-            end_date = f'{str(end_date)[:4]}-{str(end_date)[4:6]}-{str(end_date)[6:]}'
-        if not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
+            return cached.copy(deep=False)
+
+        # 同一请求已有线程在获取时等待其结果，避免并发批量获取时重复请求网络
+        with cls._inflight_lock:
+            future = cls._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = cls._inflight[cache_key] = Future()
+        if not owner:
+            result = future.result()
+            cls._stats['hist_mem_hit'] += 1
+            return result.copy(deep=False)
 
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%Y-%m-%d')
-        elif start_date and len(str(start_date)) == 8:
-            start_date = f'{str(start_date)[:4]}-{str(start_date)[4:6]}-{str(start_date)[6:]}'
-        if not start_date:
-            start_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+        try:
+            result = cls._load_stock_hist(stock_code, start_date, end_date, adjust, period, cache_key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with cls._inflight_lock:
+                cls._inflight.pop(cache_key, None)
 
-        # 2) 持久化K线缓存 + 增量更新
+    @classmethod
+    def _load_stock_hist(cls, stock_code, start_date, end_date, adjust, period, cache_key):
+        """get_stock_hist 内存缓存未命中时的获取流程（持久化缓存 → 增量更新 → 全量获取）"""
+        # 2) 持久化K线缓存 + 增量更新（缓存是该代码的全部已获取K线，按请求区间切片，只补缺口）
         cached_df, last_cached_date = cls._get_hist_cache(stock_code, adjust, period)
 
         if cached_df is not None and last_cached_date:
-            today_str = datetime.now().strftime('%Y-%m-%d')
+            cached_df = cls._fill_hist_head(cached_df, stock_code, start_date, adjust, period)
 
-            if last_cached_date >= end_date:
+            # 已覆盖 end_date，或已含最近一个交易日的K线
+            if last_cached_date >= end_date or cls._is_hist_cache_fresh(
+                    stock_code, adjust, period, last_cached_date, end_date):
                 cls._stats['hist_disk_hit'] += 1
-                result = cached_df[cached_df['日期'] >= start_date].copy()
+                result = cached_df[cached_df['日期'] >= start_date]
                 if period == 'daily':
                     result = cls._append_today_realtime(result, stock_code)
-                cls._set_cache(cache_key, result)
-                return result.copy()
+                cls._set_cache(cache_key, result, cls._hist_ttl(result, end_date))
+                return result.copy(deep=False)
 
             try:
                 last_dt = datetime.strptime(str(last_cached_date)[:10], '%Y-%m-%d')
@@ -591,60 +872,106 @@ class DataSource:
                     merged = merged.drop_duplicates(subset=['日期'], keep='last').sort_values('日期').reset_index(drop=True)
                     if '收盘' in merged.columns:
                         merged['涨跌幅'] = pd.to_numeric(merged['收盘'], errors='coerce').pct_change().fillna(0) * 100
+                    merged.attrs['covered_from'] = cls._hist_covered_from(cached_df)
                     cls._save_hist_cache(stock_code, adjust, period, merged)
                     cls._stats['hist_incremental'] += 1
-                    result = merged[merged['日期'] >= start_date].copy()
+                    result = merged[merged['日期'] >= start_date]
                     if period == 'daily':
                         result = cls._append_today_realtime(result, stock_code)
-                    cls._set_cache(cache_key, result)
-                    return result.copy()
+                    cls._set_cache(cache_key, result, cls._hist_ttl(result, end_date))
+                    return result.copy(deep=False)
                 else:
+                    # 数据源尚无新K线：刷新文件时间记下本次检查，_hist_recheck_interval 内不再重复请求
+                    try:
+                        os.utime(cls._hist_cache_path(stock_code, adjust, period))
+                    except OSError:
+                        pass
                     cls._stats['hist_disk_hit'] += 1
-                    result = cached_df[cached_df['日期'] >= start_date].copy()
+                    result = cached_df[cached_df['日期'] >= start_date]
                     if period == 'daily':
                         result = cls._append_today_realtime(result, stock_code)
-                    cls._set_cache(cache_key, result)
-                    return result.copy()
+                    cls._set_cache(cache_key, result, cls._hist_ttl(result, end_date))
+                    return result.copy(deep=False)
 
         # 3) 无缓存，全量获取
         df = cls._fetch_hist_from_network(stock_code, start_date, end_date, adjust, period)
         if df is not None and not df.empty:
+            df.attrs['covered_from'] = start_date
             cls._save_hist_cache(stock_code, adjust, period, df)
             cls._stats['hist_full_fetch'] += 1
             if period == 'daily':
                 df = cls._append_today_realtime(df, stock_code)
-            cls._set_cache(cache_key, df)
-            return df
+            cls._set_cache(cache_key, df, cls._hist_ttl(df, end_date))
+            return df.copy(deep=False)
 
         return pd.DataFrame()
 
     @classmethod
-    def _fetch_hist_from_network(cls, stock_code, start_date, end_date, adjust, period):
-        """从网络获取K线数据（stock-api → baostock → akshare 降级）"""
-        try:
-            df = cls._get_stock_hist_stock_api(stock_code, start_date, end_date, adjust, period)
-            if df is not None and not df.empty:
-                return df
-        except Exception:
-            pass
+    def _hist_ttl(cls, df, end_date):
+        """
+        日K内存缓存有效期：请求区间在今天之前、且结果不含当日K线时，数据不会再变，
+        用 _hist_past_ttl 长期缓存；否则（可能含盘中实时补的当日K线）按 _ttl_by_kind['hist']
+        """
+        today = _today()
+        if end_date < today and (df.empty or str(df['日期'].iat[-1])[:10] < today):
+            return cls._hist_past_ttl
+        return None
+
+    @classmethod
+    def _hist_covered_from(cls, cached_df):
+        """持久化K线已覆盖的请求起点（旧缓存无记录时取首根K线日期）"""
+        return cached_df.attrs.get('covered_from', cached_df['日期'].iat[0])
 
+    @classmethod
+    def _fill_hist_head(cls, cached_df, stock_code, start_date, adjust, period):
+        """
+        请求起点早于缓存覆盖范围时，只获取 [start_date, 缓存首日前一天] 的缺口并拼到缓存前面
+
+        缺口取不到数据时（起点落在节假日、或早于上市日），短缺口（30天内）也记为已覆盖，
+        避免之后每次请求都重复获取；长缺口可能是网络失败，下次再试。
+        返回补齐后的缓存 DataFrame。
+        """
+        covered_from = cls._hist_covered_from(cached_df)
+        if covered_from <= start_date:
+            return cached_df
+
+        first_date = cached_df['日期'].iat[0]
         try:
-            df = cls._get_stock_hist_baostock(stock_code, start_date, end_date, adjust, period)
-            if df is not None and not df.empty:
-                return df
-        except Exception:
-            pass
+            first_dt = datetime.strptime(first_date, '%Y-%m-%d')
+            gap_days = (first_dt - datetime.strptime(start_date, '%Y-%m-%d')).days
+        except ValueError:
+            return cached_df
+        gap_end = (first_dt - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        head_df = None
+        if start_date <= gap_end:
+            head_df = cls._fetch_hist_from_network(stock_code, start_date, gap_end, adjust, period)
+        if head_df is not None and not head_df.empty:
+            head_df['日期'] = head_df['日期'].astype(str).str[:10]
+            merged = pd.concat([head_df, cached_df], ignore_index=True)
+            merged = merged.drop_duplicates(subset=['日期'], keep='last').sort_values('日期').reset_index(drop=True)
+            if '收盘' in merged.columns:
+                merged['涨跌幅'] = pd.to_numeric(merged['收盘'], errors='coerce').pct_change().fillna(0) * 100
+            cls._stats['hist_incremental'] += 1
+        elif gap_days > 30:
+            return cached_df
+        else:
+            merged = cached_df
+        merged.attrs['covered_from'] = start_date
+        cls._save_hist_cache(stock_code, adjust, period, merged)
+        return merged
 
-        if cls._akshare_available is not False:
+    @classmethod
+    def _fetch_hist_from_network(cls, stock_code, start_date, end_date, adjust, period):
+        """从网络获取K线数据（按 _hist_sources 顺序降级：stock-api → baostock → akshare）"""
+        for name in cls._hist_sources:
+            fetch = getattr(cls, f'_get_stock_hist_{name}')
             try:
-                import akshare as ak
-                df = cls._get_stock_hist_akshare(ak, stock_code, start_date, end_date, adjust, period)
-                if df is not None and not df.empty:
-                    cls._akshare_available = True
-                    return df
+                df = fetch(stock_code, start_date, end_date, adjust, period)
             except Exception:
-                cls._akshare_available = False
-
+                continue
+            if df is not None and not df.empty:
+                return df
         return None
 
     @classmethod
@@ -696,8 +1023,7 @@ class DataSource:
 
         df = df.sort_values('日期').drop_duplicates(subset=['日期'], keep='last').reset_index(drop=True)
 
-        for col in ['开盘', '最高', '最低', '收盘']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        cls._to_float_columns(df, ['开盘', '最高', '最低', '收盘'])
 
         if '成交量' not in df.columns:
             df['成交量'] = 0
@@ -718,20 +1044,11 @@ class DataSource:
         cls.login()
         
         # 日期格式保证为 YYYY-MM-DD（上层已规范化，此处兜底）
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%Y-%m-%d')
-        elif start_date and len(str(start_date)) == 8:
-            s = str(start_date)
-            start_date = f'{s[:4]}-{s[4:6]}-{s[6:]}'
-        
-        if isinstance(end_date, datetime):
-            end_date = end_date.strftime('%Y-%m-%d')
-        elif end_date and len(str(end_date)) == 8:
-            s = str(end_date)
-            end_date = f'{s[:4]}-{s[4:6]}-{s[6:]}'
+        start_date = _norm_date(start_date)
+        end_date = _norm_date(end_date)
         
         if not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
+            end_date = _today()
         if not start_date:
             start_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
         
@@ -746,28 +1063,28 @@ class DataSource:
         freq_map = {'daily': 'd', 'weekly': 'w', 'monthly': 'm'}
         frequency = freq_map.get(period, 'd')
         
-        # 查询数据
-        rs = bs.query_history_k_data_plus(
-            bs_code,
-            'date,code,open,high,low,close,volume,amount,turn,pctChg',
-            start_date=start_date,
-            end_date=end_date,
-            frequency=frequency,
-            adjustflag=adjustflag
-        )
-        
-        if rs.error_code != '0':
-            raise Exception(f"baostock 查询失败: {rs.error_msg}")
-        
-        # 转换为 DataFrame
-        data_list = []
-        while rs.next():
-            data_list.append(rs.get_row_data())
+        # 查询数据（baostock 会话非线程安全，查询+读取结果需持锁）
+        with cls._bs_lock:
+            rs = bs.query_history_k_data_plus(
+                bs_code,
+                'date,code,open,high,low,close,volume,amount,turn,pctChg',
+                start_date=start_date,
+                end_date=end_date,
+                frequency=frequency,
+                adjustflag=adjustflag
+            )
+            
+            if rs.error_code != '0':
+                raise Exception(f"baostock 查询失败: {rs.error_msg}")
+            
+            data_list = cls._drain(rs)
         
         if not data_list:
             return pd.DataFrame()
         
-        df = pd.DataFrame(data_list, columns=rs.fields)
+        df = cls._rows_to_frame(
+            data_list, rs.fields, numeric=('open', 'high', 'low', 'close', 'volume', 'amount', 'turn', 'pctChg'),
+        )
         
         # 列名映射（兼容 akshare）
         df = df.rename(columns={
@@ -782,44 +1099,46 @@ class DataSource:
             'pctChg': '涨跌幅',
         })
         
-        # 数据类型转换
-        for col in ['开盘', '最高', '最低', '收盘', '换手率', '涨跌幅']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        # 成交量和成交额（baostock 返回的是字符串，需要转换）
-        df['成交量'] = pd.to_numeric(df['成交量'], errors='coerce').fillna(0).astype(np.int64)
-        df['成交额'] = pd.to_numeric(df['成交额'], errors='coerce').fillna(0).astype(np.float64)
+        # 数值列已在 _rows_to_frame 中解析为 float64（baostock 返回的都是字符串）
+        df['成交量'] = df['成交量'].fillna(0).astype(np.int64)
+        df['成交额'] = df['成交额'].fillna(0)
         
         return df
     
     @classmethod
-    def _get_stock_hist_akshare(cls, ak, stock_code, start_date, end_date, adjust, period):
+    def _get_stock_hist_akshare(cls, stock_code, start_date, end_date, adjust, period):
         """从 akshare 获取历史数据（备用）"""
+        # 出错后按连续失败次数退避一段时间再试，而不是整个进程内都不再使用
+        if cls._ak_next_probe > time.time():
+            return None
+        ak = _get_akshare()
+        if ak is None:
+            return None
+
         # 处理日期格式
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%Y%m%d')
-        elif start_date and '-' in str(start_date):
-            start_date = str(start_date).replace('-', '')
-        
-        if isinstance(end_date, datetime):
-            end_date = end_date.strftime('%Y%m%d')
-        elif end_date and '-' in str(end_date):
-            end_date = str(end_date).replace('-', '')
+        start_date = _norm_date(start_date, compact=True)
+        end_date = _norm_date(end_date, compact=True)
         
         # 默认日期
         if not end_date:
-            end_date = datetime.now().strftime('%Y%m%d')
+            end_date = _today('%Y%m%d')
         if not start_date:
             start_date = (datetime.now() - timedelta(days=400)).strftime('%Y%m%d')
         
         # 调用 akshare
-        df = ak.stock_zh_a_hist(
-            symbol=stock_code,
-            period=period,
-            start_date=start_date,
-            end_date=end_date,
-            adjust=adjust
-        )
+        try:
+            df = ak.stock_zh_a_hist(
+                symbol=stock_code,
+                period=period,
+                start_date=start_date,
+                end_date=end_date,
+                adjust=adjust
+            )
+        except Exception:
+            cls._ak_failures += 1
+            cls._ak_next_probe = time.time() + min(300, 10 * 2 ** cls._ak_failures)
+            raise
+        cls._ak_failures = 0
         
         return df
     
@@ -834,30 +1153,30 @@ class DataSource:
         cache_key = cls._get_cache_key('stock_list')
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cached.copy(deep=False)
         
         cls.login()
         
-        rs = bs.query_all_stock(day=datetime.now().strftime('%Y-%m-%d'))
-        
-        if rs.error_code != '0':
-            raise Exception(f"获取股票列表失败: {rs.error_msg}")
+        with cls._bs_lock:
+            rs = bs.query_all_stock(day=_today())
+            
+            if rs.error_code != '0':
+                raise Exception(f"获取股票列表失败: {rs.error_msg}")
+            
+            data_list = cls._drain(rs)
         
-        data_list = []
-        while rs.next():
-            data_list.append(rs.get_row_data())
-        
-        df = pd.DataFrame(data_list, columns=rs.fields)
+        df = cls._rows_to_frame(data_list, rs.fields)
         
         # 过滤A股（sh/sz开头）
         df = df[df['code'].str.startswith(('sh.', 'sz.'))]
         
-        # 提取6位代码
-        df['stock_code'] = df['code'].str.replace('sh.', '').str.replace('sz.', '')
+        # 提取6位代码（'sh.' / 'sz.' 前缀均为3个字符）
+        df['stock_code'] = df['code'].str.slice(3)
         
-        # 过滤ST股、退市股、北交所
-        df = df[~df['code_name'].str.contains('ST|退市|\\*', na=False, regex=True)]
-        df = df[~df['stock_code'].str.startswith(('8', '9', '4'))]
+        # 过滤ST股、退市股、北交所（两个条件合成一个掩码，只筛选一次）
+        excluded = (df['code_name'].str.contains(_EXCLUDED_NAME_RE, na=False)
+                    | df['stock_code'].str.startswith(('8', '9', '4')))
+        df = df[~excluded]
         
         result = df[['stock_code', 'code_name']].rename(columns={
             'stock_code': '代码',
@@ -865,7 +1184,7 @@ class DataSource:
         })
         
         cls._set_cache(cache_key, result)
-        return result
+        return result.copy(deep=False)
     
     @classmethod
     def get_index_stocks(cls, index_code):
@@ -883,13 +1202,13 @@ class DataSource:
         cached = cls._get_cache(cache_key)
         if cached is not None:
             cls._stats['other_cache_hit'] += 1
-            return cached.copy()
+            return cached.copy(deep=False)
         
         disk_cached = cls._get_disk_cache('index', index_code)
         if disk_cached is not None:
             cls._stats['other_cache_hit'] += 1
             cls._set_cache(cache_key, disk_cached)
-            return disk_cached.copy()
+            return disk_cached.copy(deep=False)
         
         cls.login()
         
@@ -903,25 +1222,24 @@ class DataSource:
         if query_fn is None:
             raise Exception(f"不支持的指数: {index_code}，支持: sh.000300(沪深300), sh.000905(中证500), sh.000016(上证50)")
         
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        rs = query_fn(date=date_str)
-        
-        if rs.error_code != '0':
-            # 如果失败，尝试前一个交易日
-            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            rs = query_fn(date=yesterday)
-        
-        if rs.error_code != '0':
-            raise Exception(f"获取指数成分股失败: {rs.error_msg}")
-        
-        data_list = []
-        while rs.next():
-            data_list.append(rs.get_row_data())
-        
-        df = pd.DataFrame(data_list, columns=rs.fields)
-        
-        # 提取6位代码
-        df['stock_code'] = df['code'].str.replace('sh.', '').str.replace('sz.', '')
+        date_str = _today()
+        with cls._bs_lock:
+            rs = query_fn(date=date_str)
+            
+            if rs.error_code != '0':
+                # 如果失败，尝试前一个交易日
+                yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+                rs = query_fn(date=yesterday)
+            
+            if rs.error_code != '0':
+                raise Exception(f"获取指数成分股失败: {rs.error_msg}")
+            
+            data_list = cls._drain(rs)
+        
+        df = cls._rows_to_frame(data_list, rs.fields)
+        
+        # 提取6位代码（'sh.' / 'sz.' 前缀均为3个字符）
+        df['stock_code'] = df['code'].str.slice(3)
         
         result = df[['stock_code', 'code_name']].rename(columns={
             'stock_code': '代码',
@@ -931,7 +1249,7 @@ class DataSource:
         cls._stats['other_fetch'] += 1
         cls._set_cache(cache_key, result)
         cls._set_disk_cache('index', index_code, result)
-        return result
+        return result.copy(deep=False)
     
     # 批量实时行情缓存（供选股等批量场景使用）
     _realtime_cache = {}   # code -> {price, volume, amount, change_pct}
@@ -1045,7 +1363,7 @@ class DataSource:
         if df is None or df.empty:
             return df
 
-        today_str = datetime.now().strftime('%Y-%m-%d')
+        today_str = _today()
         last_date = str(df.iloc[-1]['日期'])
 
         # 如果已经包含今天数据，无需补充
@@ -1183,27 +1501,53 @@ class DataSource:
         return df
 
     @classmethod
-    def batch_get_stock_hist(cls, stock_codes, start_date=None, end_date=None, adjust='qfq', period='daily'):
+    def batch_get_stock_hist(cls, stock_codes, start_date=None, end_date=None, adjust='qfq', period='daily',
+                             max_workers=8):
         """
-        批量获取股票历史数据（优化版，减少查询次数）
+        批量获取股票历史数据（线程池并发，网络等待相互重叠）
+
+        baostock 查询仍由 _bs_lock 串行（所有线程共用进程内唯一的登录会话），
+        stock-api / akshare 请求与缓存读写可并行。
+        日K在交易时段需补当日行情，先按每批100只一次性预加载实时价格，
+        避免每只股票各调用一次实时行情接口。
         
         参数:
             stock_codes: 股票代码列表
+            max_workers: 并发线程数（默认8）
             其他参数同 get_stock_hist
         
         返回:
-            dict: {stock_code: DataFrame}
+            dict: {stock_code: DataFrame}（按 stock_codes 顺序，获取失败或无数据的代码不含在内）
         """
+        codes = list(dict.fromkeys(stock_codes))
         results = {}
-        for code in stock_codes:
-            try:
-                df = cls.get_stock_hist(code, start_date, end_date, adjust, period)
+        if period == 'daily' and len(codes) > 1:
+            cls.preload_realtime_prices(codes)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(codes) or 1))) as executor:
+            futures = {code: executor.submit(cls.get_stock_hist, code, start_date, end_date, adjust, period)
+                       for code in codes}
+            for code, future in futures.items():
+                try:
+                    df = future.result()
+                except Exception as e:
+                    print(f"   ⚠ {code} 历史数据获取失败: {e}")
+                    continue
                 if df is not None and not df.empty:
                     results[code] = df
-            except Exception:
-                continue
         return results
 
+    @classmethod
+    async def batch_get_stock_hist_async(cls, stock_codes, start_date=None, end_date=None, adjust='qfq',
+                                         period='daily', max_workers=8):
+        """
+        batch_get_stock_hist 的协程版本：在线程中完成批量获取，不阻塞调用方的事件循环
+
+        参数与返回值同 batch_get_stock_hist
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(
+            cls.batch_get_stock_hist, stock_codes, start_date, end_date, adjust, period, max_workers))
+
     # ============================================================
     # adata 补充数据源：实时行情 / 资金流向 / 分时 / 5档盘口
     # ============================================================
@@ -1223,12 +1567,12 @@ class DataSource:
         cache_key = cls._get_cache_key('realtime', tuple(sorted(stock_codes)))
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cached.copy(deep=False)
 
         stock_api_df = cls._get_realtime_quotes_stock_api(stock_codes, allow_npx=True)
         if stock_api_df is not None and not stock_api_df.empty:
-            cls._cache[cache_key] = (stock_api_df, time.time())
-            return stock_api_df.copy()
+            cls._set_cache(cache_key, stock_api_df)
+            return stock_api_df.copy(deep=False)
 
         ad = _get_adata()
         if ad is None:
@@ -1236,9 +1580,8 @@ class DataSource:
         try:
             df = ad.stock.market.list_market_current(code_list=stock_codes)
             if df is not None and not df.empty:
-                # 短缓存（30秒）
-                cls._cache[cache_key] = (df, time.time())
-                return df
+                cls._set_cache(cache_key, df)
+                return df.copy(deep=False)
         except Exception:
             pass
         return None
@@ -1260,7 +1603,7 @@ class DataSource:
         cache_key = cls._get_cache_key('capital_flow', stock_code)
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.tail(days).copy()
+            return cached.tail(days).copy(deep=False)
 
         ad = _get_adata()
         if ad is None:
@@ -1269,7 +1612,7 @@ class DataSource:
             df = ad.stock.market.get_capital_flow(stock_code=stock_code)
             if df is not None and not df.empty:
                 cls._set_cache(cache_key, df)
-                return df.tail(days).copy()
+                return df.tail(days).copy(deep=False)
         except Exception:
             pass
         return None
@@ -1286,11 +1629,21 @@ class DataSource:
             DataFrame: stock_code, trade_time, price, change, change_pct,
                        volume, avg_price, amount
             失败返回 None
+
+        今日收盘后分时数据已定型，同时写入当日磁盘缓存并在内存中保留到当天结束，
+        收盘后重复分析或重启进程都不必重新获取。
         """
-        cache_key = cls._get_cache_key('intraday_min', stock_code, datetime.now().strftime('%Y%m%d'))
+        cache_key = cls._get_cache_key('intraday_min', stock_code, _today('%Y%m%d'))
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cached.copy(deep=False)
+
+        closed = cls._is_today_closed()
+        if closed:
+            disk_cached = cls._get_disk_cache('intraday_min', stock_code)
+            if disk_cached is not None:
+                cls._set_cache(cache_key, disk_cached, cls._intraday_final_ttl)
+                return disk_cached.copy(deep=False)
 
         ad = _get_adata()
         if ad is None:
@@ -1298,9 +1651,12 @@ class DataSource:
         try:
             df = ad.stock.market.get_market_min(stock_code=stock_code)
             if df is not None and not df.empty:
-                # 短缓存（60秒）
-                cls._cache[cache_key] = (df, time.time())
-                return df
+                if closed:
+                    cls._set_cache(cache_key, df, cls._intraday_final_ttl)
+                    cls._set_disk_cache('intraday_min', stock_code, df)
+                else:
+                    cls._set_cache(cache_key, df)
+                return df.copy(deep=False)
         except Exception:
             pass
         return None
@@ -1343,7 +1699,7 @@ class DataSource:
         cache_key = cls._get_cache_key('concepts', stock_code)
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cached.copy(deep=False)
 
         ad = _get_adata()
         if ad is None:
@@ -1352,7 +1708,7 @@ class DataSource:
             df = ad.stock.info.get_concept_east(stock_code=stock_code)
             if df is not None and not df.empty:
                 cls._set_cache(cache_key, df)
-                return df
+                return df.copy(deep=False)
         except Exception:
             pass
         return None
@@ -1369,7 +1725,7 @@ class DataSource:
         cache_key = cls._get_cache_key('index_realtime')
         cached = cls._get_cache(cache_key)
         if cached is not None:
-            return cached.copy()
+            return cached.copy(deep=False)
 
         ad = _get_adata()
         if ad is None:
@@ -1377,8 +1733,8 @@ class DataSource:
         try:
             df = ad.stock.market.get_market_index_current()
             if df is not None and not df.empty:
-                cls._cache[cache_key] = (df, time.time())
-                return df
+                cls._set_cache(cache_key, df)
+                return df.copy(deep=False)
         except Exception:
             pass
         return None
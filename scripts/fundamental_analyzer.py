@@ -26,7 +26,6 @@ import numpy as np
 from datetime import datetime, timedelta
 import warnings
 import time
-import hashlib
 import os
 import pickle
 
@@ -46,8 +45,8 @@ _VALUATION_FULL_TTL = 1800  # 全市场数据30分钟有效
 
 
 def _get_cache_key(*args, **kwargs):
-    key_str = str(args) + str(sorted(kwargs.items()))
-    return hashlib.md5(key_str.encode()).hexdigest()
+    # 进程内字典缓存，直接用可哈希的元组作键，无需计算 MD5
+    return (args, tuple(sorted(kwargs.items())))
 
 
 def _get_cache(key):
@@ -29,7 +29,7 @@ warnings.filterwarnings('ignore')
 # 导入统一数据源和公共技术指标
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from data_source import DataSource
-from technical import calculate_all_indicators
+from technical import calculate_all_indicators_fused
 
 
 STOCK_NAME_PRESET = {
@@ -65,7 +65,7 @@ def get_stock_name(stock_code):
 
 def calc_indicators(df):
     """计算全部技术指标（使用公共模块）"""
-    return calculate_all_indicators(df)
+    return calculate_all_indicators_fused(df)
 
 
 # ============================================================
@@ -4,6 +4,7 @@
 
 提供统一的技术指标计算函数，避免各脚本重复实现。
 所有函数均接收 DataFrame 并原地添加列，返回 DataFrame。
+高低点/见顶/分析快照等只读分析函数也接受 {列名: ndarray} 形式的列数组 dict。
 
 包含：
 - 均线（MA）+ 斜率
@@ -11,51 +12,220 @@
 - KDJ(6,3,3)
 - RSI(14)
 - 成交量均线
-- 高低点递增/递减检测
+- 布林带
+- 全部指标一次拼接（calculate_all_indicators_fused）
+- 最后一根K线变化后的局部高低点增量标记（update_swing_points）
+- 高低点递增/递减检测（含全历史局部高低点标记）
 - 均线排列分析
 - 钟摆位置分析（均线偏离度）
 - 趋势强度评分
+- 日线分析快照（最新均线/偏离度/量能/MACD/KDJ 标量）
 """
 
+import os
+import sys
+from types import SimpleNamespace
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# numba 为可选加速依赖：未安装时 njit 退化为原样返回函数的装饰器。
+# 编译产物（cache=True）统一落在 scripts/.cache/numba，后续运行直接加载，不再重复 JIT
+os.environ.setdefault(
+    'NUMBA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'numba'),
+)
+try:
+    from numba import njit
+    _numba_available = True
+except ImportError:
+    _numba_available = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# 默认指标参数：批量计算与 technical_stream 的逐根推送共用，修改时两边同步生效
+MA_WINDOWS = (5, 10, 20, 60, 120, 250)
+MA_SLOPE_PERIOD = 5  # 斜率为相对 N 根前均线的变化率
+MACD_PARAMS = (8, 17, 9)  # fast, slow, signal
+KDJ_PARAMS = (6, 3, 3)  # n, m1, m2
+RSI_PERIOD = 14
+VOLUME_MA_WINDOWS = (5, 20)
+BOLLINGER_PARAMS = (20, 2)  # 中轨周期, 标准差倍数
 
 
 # ============================================================
 # 技术指标计算
 # ============================================================
 
-def calculate_ma(df, windows=None, slope_period=5):
+def _ma_columns(df, windows, slope_period):
+    """均线及斜率列数组 {列名: ndarray}（按 MA 列、斜率列的顺序）"""
+    n = len(df)
+    out = {}
+    # 均线用 pandas rolling（带补偿的滑动求和）：前缀和相减会累积 1e-13 级误差，
+    # 两位小数价格下收盘价与均线恰好相等的情形很常见，误差会翻转比较结果
+    for w in windows:
+        if n < w:
+            continue  # 长期均线数据不足时不创建列
+        out[f'MA{w}'] = df['收盘'].rolling(window=w).mean().to_numpy()
+
+    if not slope_period:
+        return out
+
+    # 斜率（仅对短中期均线计算）：与 shift(slope_period) 后的均线做变化率
+    for w in [w for w in windows if w <= 60 and f'MA{w}' in out]:
+        ma = out[f'MA{w}']
+        prev = np.full(n, np.nan)
+        if n > slope_period:
+            prev[slope_period:] = ma[:-slope_period]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[f'MA{w}_slope'] = (ma - prev) / prev * 100
+    return out
+
+
+def _assign_columns(df, columns):
+    """逐列原地写入 df"""
+    for col, values in columns.items():
+        df[col] = values
+    return df
+
+
+def calculate_ma(df, windows=None, slope_period=MA_SLOPE_PERIOD):
     """
     计算多级别均线 + 斜率
 
     参数:
         df: DataFrame，需包含 '收盘' 列
         windows: 均线窗口列表，默认 [5,10,20,60,120,250]
-        slope_period: 斜率计算周期（默认5日变化率）
+        slope_period: 斜率计算周期（默认5日变化率；传 None 则不生成斜率列）
 
     返回:
         df（原地修改），新增 MA5/MA10/... 及 MA5_slope/MA10_slope/... 列
     """
     if windows is None:
-        windows = [5, 10, 20, 60, 120, 250]
+        windows = list(MA_WINDOWS)
+    return _assign_columns(df, _ma_columns(df, windows, slope_period))
 
-    for w in windows:
-        col = f'MA{w}'
-        if len(df) >= w:
-            df[col] = df['收盘'].rolling(window=w).mean()
-        # 长期均线数据不足时不创建列
 
-    # 斜率（仅对短中期均线计算）
-    slope_windows = [w for w in windows if w <= 60 and f'MA{w}' in df.columns]
-    for w in slope_windows:
-        col = f'MA{w}'
-        df[f'{col}_slope'] = (df[col] - df[col].shift(slope_period)) / df[col].shift(slope_period) * 100
+def _ewm_alpha(span=None, com=None):
+    """与 pandas 相同的换算路径得到 EWM 平滑系数（span 先换算为 com），保证结果逐位一致"""
+    if span is not None:
+        com = (span - 1) / 2.0
+    return 1.0 / (1.0 + com)
 
-    return df
 
+@njit(cache=True)
+def _ewm_step(weighted, old_wt, cur, alpha):
+    """
+    EWM(adjust=False) 单步递推，返回新的 (weighted, old_wt)
 
-def calculate_macd(df, fast=8, slow=17, signal=9):
+    批量 _ewm_mean 与 technical_stream 的逐根推送共用此递推，保证结果逐位一致
+    """
+    is_obs = cur == cur
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if is_obs:
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+    elif is_obs:
+        weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _ewm_mean(values, alpha):
+    """等价于 pandas ewm(adjust=False).mean() 的逐点递推（NaN 处理方式相同）"""
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    weighted = values[0]
+    old_wt = 1.0
+    out[0] = weighted
+    for i in range(1, n):
+        weighted, old_wt = _ewm_step(weighted, old_wt, values[i], alpha)
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True)
+def _ewm_last_state(values, alpha):
+    """与 _ewm_mean 相同的递推，只返回最后的 (weighted, old_wt)"""
+    weighted = values[0]
+    old_wt = 1.0
+    for i in range(1, len(values)):
+        weighted, old_wt = _ewm_step(weighted, old_wt, values[i], alpha)
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _macd_loop(close, fast_alpha, slow_alpha, signal_alpha):
+    """MACD 内核，返回 (DIF, DEA, MACD)"""
+    dif = _ewm_mean(close, fast_alpha) - _ewm_mean(close, slow_alpha)
+    dea = _ewm_mean(dif, signal_alpha)
+    return dif, dea, 2 * (dif - dea)
+
+
+@njit(cache=True, error_model='numpy')
+def _kdj_loop(close, high, low, n, k_alpha, d_alpha):
+    """KDJ 内核（n 日最高/最低 → RSV → K/D 递推），返回 (RSV, K, D, J)"""
+    size = len(close)
+    rsv = np.full(size, np.nan)
+    for i in range(n - 1, size):
+        low_n = np.inf
+        high_n = -np.inf
+        valid = True
+        for j in range(i - n + 1, i + 1):
+            lo = low[j]
+            hi = high[j]
+            if lo != lo or hi != hi:
+                valid = False
+                break
+            if lo < low_n:
+                low_n = lo
+            if hi > high_n:
+                high_n = hi
+        if valid:
+            rsv[i] = (close[i] - low_n) / (high_n - low_n) * 100
+    k = _ewm_mean(rsv, k_alpha)
+    d = _ewm_mean(k, d_alpha)
+    return rsv, k, d, 3 * k - 2 * d
+
+
+@njit(cache=True, error_model='numpy')
+def _calc_loop(close, high, low, fast_alpha, slow_alpha, signal_alpha, n, k_alpha, d_alpha):
+    """MACD + KDJ 一次性计算，返回 (DIF, DEA, MACD, RSV, K, D, J)"""
+    dif, dea, macd = _macd_loop(close, fast_alpha, slow_alpha, signal_alpha)
+    rsv, k, d, j = _kdj_loop(close, high, low, n, k_alpha, d_alpha)
+    return dif, dea, macd, rsv, k, d, j
+
+
+def _float_array(series):
+    """列转为连续 float64 数组（numba 内核输入）"""
+    return np.ascontiguousarray(series.to_numpy(dtype=np.float64, copy=False))
+
+
+def _macd_columns(df, fast, slow, signal):
+    """DIF/DEA/MACD 列数组"""
+    if _numba_available:
+        dif, dea, macd = _macd_loop(
+            _float_array(df['收盘']), _ewm_alpha(span=fast), _ewm_alpha(span=slow), _ewm_alpha(span=signal),
+        )
+        return {'DIF': dif, 'DEA': dea, 'MACD': macd}
+
+    exp_fast = df['收盘'].ewm(span=fast, adjust=False).mean()
+    exp_slow = df['收盘'].ewm(span=slow, adjust=False).mean()
+    dif = exp_fast - exp_slow
+    dea = dif.ewm(span=signal, adjust=False).mean()
+    return {'DIF': dif.to_numpy(), 'DEA': dea.to_numpy(), 'MACD': (2 * (dif - dea)).to_numpy()}
+
+
+def calculate_macd(df, fast=MACD_PARAMS[0], slow=MACD_PARAMS[1], signal=MACD_PARAMS[2]):
     """
     计算 MACD
 
@@ -66,15 +236,27 @@ def calculate_macd(df, fast=8, slow=17, signal=9):
     返回:
         df（原地修改），新增 DIF/DEA/MACD 列
     """
-    exp_fast = df['收盘'].ewm(span=fast, adjust=False).mean()
-    exp_slow = df['收盘'].ewm(span=slow, adjust=False).mean()
-    df['DIF'] = exp_fast - exp_slow
-    df['DEA'] = df['DIF'].ewm(span=signal, adjust=False).mean()
-    df['MACD'] = 2 * (df['DIF'] - df['DEA'])
-    return df
+    return _assign_columns(df, _macd_columns(df, fast, slow, signal))
+
 
+def _kdj_columns(df, n, m1, m2):
+    """RSV/K/D/J 列数组"""
+    if _numba_available:
+        rsv, k, d, j = _kdj_loop(
+            _float_array(df['收盘']), _float_array(df['最高']), _float_array(df['最低']),
+            n, _ewm_alpha(com=m1 - 1), _ewm_alpha(com=m2 - 1),
+        )
+        return {'RSV': rsv, 'K': k, 'D': d, 'J': j}
 
-def calculate_kdj(df, n=6, m1=3, m2=3):
+    low_n = df['最低'].rolling(window=n).min()
+    high_n = df['最高'].rolling(window=n).max()
+    rsv = (df['收盘'] - low_n) / (high_n - low_n) * 100
+    k = rsv.ewm(com=m1 - 1, adjust=False).mean()
+    d = k.ewm(com=m2 - 1, adjust=False).mean()
+    return {'RSV': rsv.to_numpy(), 'K': k.to_numpy(), 'D': d.to_numpy(), 'J': (3 * k - 2 * d).to_numpy()}
+
+
+def calculate_kdj(df, n=KDJ_PARAMS[0], m1=KDJ_PARAMS[1], m2=KDJ_PARAMS[2]):
     """
     计算 KDJ
 
@@ -85,16 +267,19 @@ def calculate_kdj(df, n=6, m1=3, m2=3):
     返回:
         df（原地修改），新增 RSV/K/D/J 列
     """
-    low_n = df['最低'].rolling(window=n).min()
-    high_n = df['最高'].rolling(window=n).max()
-    df['RSV'] = (df['收盘'] - low_n) / (high_n - low_n) * 100
-    df['K'] = df['RSV'].ewm(com=m1 - 1, adjust=False).mean()
-    df['D'] = df['K'].ewm(com=m2 - 1, adjust=False).mean()
-    df['J'] = 3 * df['K'] - 2 * df['D']
-    return df
+    return _assign_columns(df, _kdj_columns(df, n, m1, m2))
+
+
+def _rsi_columns(df, period):
+    """RSI 列数组"""
+    delta = df['收盘'].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return {'RSI': (100 - (100 / (1 + rs))).to_numpy()}
 
 
-def calculate_rsi(df, period=14):
+def calculate_rsi(df, period=RSI_PERIOD):
     """
     计算 RSI
 
@@ -105,12 +290,12 @@ def calculate_rsi(df, period=14):
     返回:
         df（原地修改），新增 RSI 列
     """
-    delta = df['收盘'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    return df
+    return _assign_columns(df, _rsi_columns(df, period))
+
+
+def _volume_ma_columns(df, windows):
+    """VOL_MA 列数组"""
+    return {f'VOL_MA{w}': df['成交量'].rolling(window=w).mean().to_numpy() for w in windows}
 
 
 def calculate_volume_ma(df, windows=None):
@@ -125,15 +310,24 @@ def calculate_volume_ma(df, windows=None):
         df（原地修改），新增 VOL_MA5/VOL_MA20 列
     """
     if windows is None:
-        windows = [5, 20]
+        windows = list(VOLUME_MA_WINDOWS)
+    return _assign_columns(df, _volume_ma_columns(df, windows))
 
-    for w in windows:
-        df[f'VOL_MA{w}'] = df['成交量'].rolling(window=w).mean()
 
-    return df
+def _bollinger_columns(df, window, num_std):
+    """BOLL_MID/BOLL_UPPER/BOLL_LOWER 列数组（数据不足 window 根时为空）"""
+    if len(df) < window:
+        return {}
+    mid = df['收盘'].rolling(window=window).mean()
+    rolling_std = df['收盘'].rolling(window=window).std()
+    return {
+        'BOLL_MID': mid.to_numpy(),
+        'BOLL_UPPER': (mid + num_std * rolling_std).to_numpy(),
+        'BOLL_LOWER': (mid - num_std * rolling_std).to_numpy(),
+    }
 
 
-def calculate_bollinger(df, window=20, num_std=2):
+def calculate_bollinger(df, window=BOLLINGER_PARAMS[0], num_std=BOLLINGER_PARAMS[1]):
     """
     计算布林带
 
@@ -145,15 +339,87 @@ def calculate_bollinger(df, window=20, num_std=2):
     返回:
         df（原地修改），新增 BOLL_MID/BOLL_UPPER/BOLL_LOWER 列
     """
-    if len(df) < window:
-        return df
-    df['BOLL_MID'] = df['收盘'].rolling(window=window).mean()
-    rolling_std = df['收盘'].rolling(window=window).std()
-    df['BOLL_UPPER'] = df['BOLL_MID'] + num_std * rolling_std
-    df['BOLL_LOWER'] = df['BOLL_MID'] - num_std * rolling_std
+    return _assign_columns(df, _bollinger_columns(df, window, num_std))
+
+
+def calculate_swing_points(df):
+    """
+    标记全历史局部高/低点（前后各2根K线内的极值）
+
+    用 sliding_window_view 对每个5根K线窗口一次性比较（零拷贝视图），
+    供 detect_highs_lows / detect_topping_signals 直接截取，不再逐段重复扫描。
+
+    参数:
+        df: DataFrame，需包含 '最高'/'最低' 列
+
+    返回:
+        df（原地修改），新增 SWING_HIGH/SWING_LOW 布尔列（首尾各2根K线为 False）
+    """
+    high = df['最高'].to_numpy(dtype=np.float64)
+    low = df['最低'].to_numpy(dtype=np.float64)
+    high_mask = np.zeros(len(df), dtype=bool)
+    low_mask = np.zeros(len(df), dtype=bool)
+    if len(df) >= 5:
+        high_win = sliding_window_view(high, 5)
+        low_win = sliding_window_view(low, 5)
+        high_mask[2:-2] = (high_win[:, 2:3] >= high_win).all(axis=1)
+        low_mask[2:-2] = (low_win[:, 2:3] <= low_win).all(axis=1)
+    df['SWING_HIGH'] = high_mask
+    df['SWING_LOW'] = low_mask
+    return df
+
+
+def update_swing_points(df):
+    """
+    最后一根K线变化（修改或新增）后更新 SWING_HIGH/SWING_LOW，只重新比较受影响的位置：
+    倒数第3根（其后2根含最后一根）；最后2根按 calculate_swing_points 的口径恒为 False。
+    df 需已由 calculate_swing_points 标记过。
+    """
+    n = len(df)
+    if n < 5:
+        return calculate_swing_points(df)
+    i = n - 3
+    high = df['最高'].to_numpy(dtype=np.float64)[i - 2:i + 3]
+    low = df['最低'].to_numpy(dtype=np.float64)[i - 2:i + 3]
+    columns = df.columns
+    df.iat[i, columns.get_loc('SWING_HIGH')] = bool((high[2] >= high).all())
+    df.iat[i, columns.get_loc('SWING_LOW')] = bool((low[2] <= low).all())
+    for row in (n - 2, n - 1):
+        df.iat[row, columns.get_loc('SWING_HIGH')] = False
+        df.iat[row, columns.get_loc('SWING_LOW')] = False
     return df
 
 
+def _recent_swing_mask(cols, col, window):
+    """截取近 window 根K线的局部极值标记；窗口前2根的极值依赖窗口外K线，按窗口内检测口径置 False"""
+    mask = cols[col][-window:].copy()
+    mask[:2] = False
+    return mask
+
+
+def _indicator_columns(df, ma_windows=None, volume_windows=None, bollinger=True):
+    """全部指标的列数组（列顺序与依次调用各 calculate_* 相同）"""
+    fast, slow, signal = MACD_PARAMS
+    n, m1, m2 = KDJ_PARAMS
+    if _numba_available:
+        # MACD/KDJ 的递推部分合并为一次 numba 调用
+        dif, dea, macd, rsv, k, d, j = _calc_loop(
+            _float_array(df['收盘']), _float_array(df['最高']), _float_array(df['最低']),
+            _ewm_alpha(span=fast), _ewm_alpha(span=slow), _ewm_alpha(span=signal),
+            n, _ewm_alpha(com=m1 - 1), _ewm_alpha(com=m2 - 1),
+        )
+        macd_kdj = {'DIF': dif, 'DEA': dea, 'MACD': macd, 'RSV': rsv, 'K': k, 'D': d, 'J': j}
+    else:
+        macd_kdj = {**_macd_columns(df, fast, slow, signal), **_kdj_columns(df, n, m1, m2)}
+    return {
+        **_ma_columns(df, ma_windows or list(MA_WINDOWS), MA_SLOPE_PERIOD),
+        **macd_kdj,
+        **_rsi_columns(df, RSI_PERIOD),
+        **_volume_ma_columns(df, volume_windows or list(VOLUME_MA_WINDOWS)),
+        **(_bollinger_columns(df, *BOLLINGER_PARAMS) if bollinger else {}),
+    }
+
+
 def calculate_all_indicators(df):
     """
     一次性计算所有技术指标（便捷函数）
@@ -164,25 +430,94 @@ def calculate_all_indicators(df):
     返回:
         df（原地修改）
     """
-    calculate_ma(df)
-    calculate_macd(df)
-    calculate_kdj(df)
-    calculate_rsi(df)
-    calculate_volume_ma(df)
-    calculate_bollinger(df)
-    return df
+    return _assign_columns(df, _indicator_columns(df))
+
+
+def calculate_all_indicators_fused(df, ma_windows=None, volume_windows=None, bollinger=True):
+    """
+    一次性计算所有技术指标，并一次拼接为新的 DataFrame
+
+    各指标先算成列数组（MACD/KDJ 合并为一次递推），
+    最后用一次 concat 拼接，省去逐列插入的开销（二十余列时约为原来的 1/10）。
+    结果与 calculate_all_indicators 逐位一致。
+
+    参数:
+        df: DataFrame，需包含 '收盘'/'最高'/'最低'/'成交量' 列
+        ma_windows: 均线窗口，默认 [5,10,20,60,120,250]
+        volume_windows: 成交量均线窗口，默认 [5, 20]
+        bollinger: 是否计算布林带
+
+    返回:
+        新的 DataFrame（不修改 df，调用方需使用返回值；df 已含同名指标列时退回原地写入）
+    """
+    columns = _indicator_columns(df, ma_windows, volume_windows, bollinger)
+    if df.columns.isin(list(columns)).any():
+        return _assign_columns(df, columns)
+    return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
 
 
 # ============================================================
 # 分析函数
 # ============================================================
 
+def _columns(data, names=None):
+    """
+    取列数组：DataFrame 按需转为 {列名: ndarray}；已是列数组 dict 时原样返回
+
+    分析函数同时接受两种输入，调用方可一次性转换后复用，避免逐行 Series 访问开销。
+    """
+    if isinstance(data, dict):
+        return data
+    if names is None:
+        names = data.columns
+    return {c: data[c].to_numpy() for c in names if c in data.columns}
+
+
+def _nanmean(arr):
+    """同 Series.mean()：忽略 NaN，全为 NaN 时返回 NaN"""
+    valid = arr[~np.isnan(arr)]
+    return valid.mean() if len(valid) else np.nan
+
+
+def _nanmax(arr):
+    """同 Series.max()：忽略 NaN，全为 NaN 时返回 NaN"""
+    valid = arr[~np.isnan(arr)]
+    return valid.max() if len(valid) else np.nan
+
+
+def _safe_col(cols, col, i=-1):
+    """按下标安全取列值，列缺失或 NaN 返回 None（列数组版 _safe_ma）"""
+    arr = cols.get(col)
+    if arr is None:
+        return None
+    val = arr[i]
+    if np.isnan(val):
+        return None
+    return val
+
+
+@njit(cache=True)
+def _swing_points(high, low):
+    """标记局部高/低点（前后各2根K线内的极值），返回 (高点mask, 低点mask)"""
+    n = len(high)
+    high_mask = np.zeros(n, dtype=np.bool_)
+    low_mask = np.zeros(n, dtype=np.bool_)
+    for i in range(2, n - 2):
+        h = high[i]
+        if h >= high[i - 1] and h >= high[i - 2] and h >= high[i + 1] and h >= high[i + 2]:
+            high_mask[i] = True
+        lo = low[i]
+        if lo <= low[i - 1] and lo <= low[i - 2] and lo <= low[i + 1] and lo <= low[i + 2]:
+            low_mask[i] = True
+    return high_mask, low_mask
+
+
 def detect_highs_lows(df, window=20):
     """
     检测近期高低点递增/递减
 
     参数:
-        df: DataFrame，需包含 '最高'/'最低' 列
+        df: DataFrame 或列数组 dict，需包含 '最高'/'最低' 列
         window: 检测窗口（默认近20根K线）
 
     返回:
@@ -195,24 +530,20 @@ def detect_highs_lows(df, window=20):
             'lows_falling': bool,   # 低点是否递减
         }
     """
-    recent = df.tail(window)
-    highs = []
-    lows = []
-
-    for i in range(2, len(recent) - 2):
-        row = recent.iloc[i]
-        prev1 = recent.iloc[i - 1]
-        prev2 = recent.iloc[i - 2]
-        next1 = recent.iloc[i + 1]
-        next2 = recent.iloc[i + 2]
-
-        if (row['最高'] >= prev1['最高'] and row['最高'] >= prev2['最高'] and
-                row['最高'] >= next1['最高'] and row['最高'] >= next2['最高']):
-            highs.append(row['最高'])
-
-        if (row['最低'] <= prev1['最低'] and row['最低'] <= prev2['最低'] and
-                row['最低'] <= next1['最低'] and row['最低'] <= next2['最低']):
-            lows.append(row['最低'])
+    cols = _columns(df, ('最高', '最低', 'SWING_HIGH', 'SWING_LOW'))
+    high = cols['最高'][-window:]
+    low = cols['最低'][-window:]
+    if 'SWING_HIGH' in cols:
+        # 已由 calculate_swing_points 预先标记，直接截取
+        high_mask = _recent_swing_mask(cols, 'SWING_HIGH', window)
+        low_mask = _recent_swing_mask(cols, 'SWING_LOW', window)
+    else:
+        # numba 内核需要连续 float64 缓冲区（已满足时不复制）
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        low = np.ascontiguousarray(low, dtype=np.float64)
+        high_mask, low_mask = _swing_points(high, low)
+    highs = high[high_mask].tolist()
+    lows = low[low_mask].tolist()
 
     highs_rising = len(highs) >= 2 and highs[-1] > highs[0]
     lows_rising = len(lows) >= 2 and lows[-1] > lows[0]
@@ -296,6 +627,56 @@ def analyze_ma_alignment(latest, price):
     return {'desc': desc, 'score': score, 'ma_values': ma_values}
 
 
+_PENDULUM_MAS = ('MA5', 'MA10', 'MA20', 'MA60', 'MA120', 'MA250')
+# (略高, 偏高, 极度)：短期均线用更小的阈值，中长期均线用标准阈值
+_PENDULUM_THRESHOLDS = np.array([
+    (3, 5, 8), (4, 6, 10),
+    (5, 8, 12), (8, 15, 20), (10, 15, 25), (15, 20, 30),
+], dtype=np.float64)
+_PENDULUM_PHASES = (
+    '极度偏高（绳子极紧，回归压力大）',
+    '偏高（注意回归压力）',
+    '略高',
+    '中枢附近（适合做T）',
+    '略低',
+    '偏低（回归动力增强）',
+    '极度偏低（绳子极紧，反弹动力大）',
+)
+
+
+@njit(cache=True)
+def _pendulum_levels(price, ma_arr, thresholds):
+    """各均线偏离度及档位（0=极度偏高 … 6=极度偏低，-1=数据不足）"""
+    n = len(ma_arr)
+    devs = np.full(n, np.nan)
+    levels = np.full(n, -1, dtype=np.int64)
+    for i in range(n):
+        ma_val = ma_arr[i]
+        if np.isnan(ma_val) or ma_val == 0:
+            continue
+        dev = (price - ma_val) / ma_val * 100
+        t_high = thresholds[i, 0]
+        t_very_high = thresholds[i, 1]
+        t_extreme = thresholds[i, 2]
+        if dev > t_extreme:
+            level = 0
+        elif dev > t_very_high:
+            level = 1
+        elif dev > t_high:
+            level = 2
+        elif dev > -2:
+            level = 3
+        elif dev > -t_high:
+            level = 4
+        elif dev > -t_very_high:
+            level = 5
+        else:
+            level = 6
+        devs[i] = dev
+        levels[i] = level
+    return devs, levels
+
+
 def calculate_pendulum(price, ma_values):
     """
     多级别钟摆位置分析（均线偏离度）
@@ -318,38 +699,16 @@ def calculate_pendulum(price, ma_values):
     """
     result = {}
 
-    # 短期均线用更小的阈值
-    short_thresholds = {'MA5': (3, 5, 8), 'MA10': (4, 6, 10)}  # (略高, 偏高, 极度)
-    # 中长期均线用标准阈值
-    long_thresholds = {'MA20': (5, 8, 12), 'MA60': (8, 15, 20), 'MA120': (10, 15, 25), 'MA250': (15, 20, 30)}
+    ma_vals = [ma_values.get(name) for name in _PENDULUM_MAS]
+    ma_arr = np.array([np.nan if v is None else v for v in ma_vals], dtype=np.float64)
+    devs, levels = _pendulum_levels(float(price), ma_arr, _PENDULUM_THRESHOLDS)
 
-    all_thresholds = {**short_thresholds, **long_thresholds}
-
-    for ma_name in ['MA5', 'MA10', 'MA20', 'MA60', 'MA120', 'MA250']:
-        ma_val = ma_values.get(ma_name)
-        if ma_val is None or ma_val == 0:
+    for i, ma_name in enumerate(_PENDULUM_MAS):
+        if levels[i] < 0:
             result[ma_name] = {'value': None, 'deviation': None, 'phase': '数据不足'}
-            continue
-
-        dev = (price - ma_val) / ma_val * 100
-        t_high, t_very_high, t_extreme = all_thresholds.get(ma_name, (5, 10, 15))
-
-        if dev > t_extreme:
-            phase = '极度偏高（绳子极紧，回归压力大）'
-        elif dev > t_very_high:
-            phase = '偏高（注意回归压力）'
-        elif dev > t_high:
-            phase = '略高'
-        elif dev > -2:
-            phase = '中枢附近（适合做T）'
-        elif dev > -t_high:
-            phase = '略低'
-        elif dev > -t_very_high:
-            phase = '偏低（回归动力增强）'
         else:
-            phase = '极度偏低（绳子极紧，反弹动力大）'
-
-        result[ma_name] = {'value': ma_val, 'deviation': dev, 'phase': phase}
+            result[ma_name] = {'value': ma_vals[i], 'deviation': float(devs[i]),
+                               'phase': _PENDULUM_PHASES[levels[i]]}
 
     # 短期钟摆判断（MA5/MA10联合）
     dev_ma5 = result.get('MA5', {}).get('deviation')
@@ -481,6 +840,66 @@ def calculate_trend_strength(latest, df, price):
     return {'score': strength, 'details': details}
 
 
+_SNAPSHOT_COLUMNS = (
+    '收盘', '成交量', 'MA5', 'MA10', 'MA20', 'MA60', 'MA120', 'MA20_slope',
+    'VOL_MA5', 'VOL_MA20', 'DIF', 'DEA', 'K', 'D', 'J',
+)
+_SNAPSHOT_MAS = ('MA5', 'MA10', 'MA20', 'MA60', 'MA120')
+
+
+def compute_analysis_snapshot(df, price=None):
+    """
+    一次性提取日线分析所需的标量（按列数组下标取值，不构造行 Series）
+
+    参数:
+        df: 已计算指标的 DataFrame 或列数组 dict
+        price: 当前价格（默认最新收盘价）
+
+    返回:
+        SimpleNamespace（均为 Python float，缺失列为 NaN）:
+            close, volume, ma5/ma10/ma20/ma60/ma120, ma20_slope（NaN→0）,
+            vol_ma5, vol_ma20, dif/dea/k/d/j 及 prev_dif/prev_dea/prev_k/prev_d,
+            dev_ma5 … dev_ma120（相对 price 的偏离度%，均线缺失为 0）,
+            price_20d_ago（不足20根时为 price）, change_20d
+    """
+    cols = _columns(df, _SNAPSHOT_COLUMNS)
+    size = len(cols['收盘'])
+
+    def row_values(i):
+        return {c: (cols[c][i] if c in cols else np.nan) for c in _SNAPSHOT_COLUMNS}
+
+    last = row_values(-1)
+    prev = row_values(-2) if size >= 2 else last
+    if price is None:
+        price = last['收盘']
+
+    mas = np.array([last[c] for c in _SNAPSHOT_MAS])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        devs = np.where(np.isnan(mas), 0.0, (price - mas) / mas * 100)
+
+    price_20d_ago = cols['收盘'][-20] if size >= 20 else price
+    ma20_slope = last['MA20_slope']
+
+    values = dict(
+        close=last['收盘'], volume=last['成交量'],
+        ma20_slope=0.0 if np.isnan(ma20_slope) else ma20_slope,
+        vol_ma5=last['VOL_MA5'], vol_ma20=last['VOL_MA20'],
+        dif=last['DIF'], dea=last['DEA'], k=last['K'], d=last['D'], j=last['J'],
+        prev_dif=prev['DIF'], prev_dea=prev['DEA'], prev_k=prev['K'], prev_d=prev['D'],
+        price_20d_ago=price_20d_ago,
+        change_20d=(price - price_20d_ago) / price_20d_ago * 100,
+    )
+    for name, ma_val, dev in zip(_SNAPSHOT_MAS, mas, devs):
+        values[name.lower()] = ma_val
+        values[f'dev_{name.lower()}'] = dev
+    return SimpleNamespace(**{k: float(v) for k, v in values.items()})
+
+
+_TOPPING_COLUMNS = (
+    '收盘', '开盘', '最高', '最低', '成交量', 'MA5', 'MA10', 'MA20', 'VOL_MA5', 'DIF', 'SWING_HIGH',
+)
+
+
 def detect_topping_signals(df, price=None):
     """
     检测行情见顶/主力出货信号
@@ -499,7 +918,7 @@ def detect_topping_signals(df, price=None):
     8. 高位缩量回落：从近期高点回落+成交量萎缩+连续下跌
 
     参数:
-        df: DataFrame，需包含 '收盘'/'开盘'/'最高'/'最低'/'成交量' 以及均线列
+        df: DataFrame 或列数组 dict，需包含 '收盘'/'开盘'/'最高'/'最低'/'成交量' 以及均线列
         price: 当前价格（可选，默认取最新收盘价）
 
     返回:
@@ -511,12 +930,18 @@ def detect_topping_signals(df, price=None):
             'details': dict,        # 各维度详细数据
         }
     """
-    if len(df) < 30:
+    cols = _columns(df, _TOPPING_COLUMNS)
+    n = len(cols['收盘'])
+    if n < 30:
         return {'score': 0, 'signals': [], 'level': '数据不足', 'is_topping': False, 'details': {}}
 
-    latest = df.iloc[-1]
+    close = cols['收盘']
+    open_ = cols['开盘']
+    high = cols['最高']
+    low = cols['最低']
+    volume = cols['成交量']
     if price is None:
-        price = latest['收盘']
+        price = close[-1]
 
     score = 0
     signals = []
@@ -526,7 +951,7 @@ def detect_topping_signals(df, price=None):
     # 1. 短期均线拐头下行（最大20分）
     # MA5 连续下行 = 短线资金撤离
     # ------------------------------------------------------------------
-    ma5_vals = df['MA5'].tail(5).tolist()
+    ma5_vals = cols['MA5'][-5:].tolist()
     ma5_consecutive_down = 0
     for i in range(len(ma5_vals) - 1, 0, -1):
         if not (np.isnan(ma5_vals[i]) or np.isnan(ma5_vals[i-1])):
@@ -545,12 +970,11 @@ def detect_topping_signals(df, price=None):
         signals.append(f'MA5连续{ma5_consecutive_down}日下行')
 
     # MA5下穿MA10（短线死叉）
-    ma5 = _safe_ma(latest, 'MA5')
-    ma10 = _safe_ma(latest, 'MA10')
-    prev = df.iloc[-2]
+    ma5 = _safe_col(cols, 'MA5')
+    ma10 = _safe_col(cols, 'MA10')
     if ma5 is not None and ma10 is not None:
-        prev_ma5 = _safe_ma(prev, 'MA5')
-        prev_ma10 = _safe_ma(prev, 'MA10')
+        prev_ma5 = _safe_col(cols, 'MA5', -2)
+        prev_ma10 = _safe_col(cols, 'MA10', -2)
         if prev_ma5 is not None and prev_ma10 is not None:
             if ma5 < ma10 and prev_ma5 >= prev_ma10:
                 ma5_score = min(20, ma5_score + 10)
@@ -565,14 +989,11 @@ def detect_topping_signals(df, price=None):
     # 2. 连续阴线（最大15分）
     # 近5日阴线比例高 = 卖压持续
     # ------------------------------------------------------------------
-    recent_5 = df.tail(5)
-    down_days = sum(1 for _, row in recent_5.iterrows() if row['收盘'] < row['开盘'])
-    down_pct_days = sum(1 for _, row in recent_5.iterrows()
-                        if row['收盘'] < df.iloc[max(0, df.index.get_loc(row.name) - 1)]['收盘'])
+    down_days = int(np.count_nonzero(close[-5:] < open_[-5:]))
 
     consecutive_down = 0
-    for i in range(len(df) - 1, max(len(df) - 6, 0), -1):
-        if df.iloc[i]['收盘'] < df.iloc[i]['开盘']:
+    for i in range(n - 1, max(n - 6, 0), -1):
+        if close[i] < open_[i]:
             consecutive_down += 1
         else:
             break
@@ -597,14 +1018,13 @@ def detect_topping_signals(df, price=None):
     # ------------------------------------------------------------------
     vp_score = 0
 
-    recent_20 = df.tail(20)
-    high_20d = recent_20['最高'].max()
+    high_20d = _nanmax(high[-20:])
     drawdown_from_high = (high_20d - price) / high_20d * 100
     price_near_high = drawdown_from_high < 5  # 放宽到距20日最高点5%以内
 
-    if price_near_high and len(df) >= 20:
-        vol_first_half = df.iloc[-20:-10]['成交量'].mean()
-        vol_second_half = df.iloc[-10:]['成交量'].mean()
+    if price_near_high and n >= 20:
+        vol_first_half = _nanmean(volume[-20:-10])
+        vol_second_half = _nanmean(volume[-10:])
         if vol_first_half > 0:
             vol_ratio = vol_second_half / vol_first_half
             if vol_ratio < 0.6:
@@ -616,11 +1036,11 @@ def detect_topping_signals(df, price=None):
             details['volume_divergence'] = {'vol_ratio': vol_ratio}
 
     # 缩量创新高
-    if len(df) >= 5:
-        recent_high = df.tail(5)['最高'].max()
-        prev_high = df.tail(20).head(15)['最高'].max() if len(df) >= 20 else 0
-        recent_vol = df.tail(5)['成交量'].mean()
-        prev_vol = df.tail(20).head(15)['成交量'].mean() if len(df) >= 20 else recent_vol
+    if n >= 5:
+        recent_high = _nanmax(high[-5:])
+        prev_high = _nanmax(high[-20:-5]) if n >= 20 else 0
+        recent_vol = _nanmean(volume[-5:])
+        prev_vol = _nanmean(volume[-20:-5]) if n >= 20 else recent_vol
         if recent_high > prev_high and prev_vol > 0 and recent_vol / prev_vol < 0.7:
             vp_score = min(20, vp_score + 8)
             if '量价背离' not in ' '.join(signals):
@@ -634,9 +1054,9 @@ def detect_topping_signals(df, price=None):
     # 放量但价格不涨甚至下跌 = 主力对倒出货
     # ------------------------------------------------------------------
     stagnation_score = 0
-    if 'VOL_MA5' in latest and latest['VOL_MA5'] > 0:
-        vol_ratio = latest['成交量'] / latest['VOL_MA5']
-        today_change = (latest['收盘'] - latest['开盘']) / latest['开盘'] * 100
+    if 'VOL_MA5' in cols and cols['VOL_MA5'][-1] > 0:
+        vol_ratio = volume[-1] / cols['VOL_MA5'][-1]
+        today_change = (close[-1] - open_[-1]) / open_[-1] * 100
 
         # 放量下跌
         if vol_ratio > 1.5 and today_change < -1:
@@ -647,11 +1067,10 @@ def detect_topping_signals(df, price=None):
             signals.append(f'放量阴线（量比{vol_ratio:.1f}，跌{today_change:.1f}%）')
 
         # 近3日放量滞涨
-        if stagnation_score == 0 and len(df) >= 3:
-            recent_3 = df.tail(3)
-            avg_vol_3d = recent_3['成交量'].mean()
-            avg_vol_20d = df.tail(20)['成交量'].mean() if len(df) >= 20 else avg_vol_3d
-            price_change_3d = (price - df.iloc[-4]['收盘']) / df.iloc[-4]['收盘'] * 100 if len(df) >= 4 else 0
+        if stagnation_score == 0 and n >= 3:
+            avg_vol_3d = _nanmean(volume[-3:])
+            avg_vol_20d = _nanmean(volume[-20:]) if n >= 20 else avg_vol_3d
+            price_change_3d = (price - close[-4]) / close[-4] * 100 if n >= 4 else 0
             if avg_vol_20d > 0 and avg_vol_3d / avg_vol_20d > 1.3 and abs(price_change_3d) < 1:
                 stagnation_score = 10
                 signals.append(f'近3日放量滞涨（量增价不涨，资金分歧）')
@@ -664,20 +1083,25 @@ def detect_topping_signals(df, price=None):
     # 价格创新高但DIF没有同步新高 = 动量衰减
     # ------------------------------------------------------------------
     divergence_score = 0
-    if 'DIF' in df.columns and len(df) >= 20:
+    if 'DIF' in cols and n >= 20:
         # 找近20日价格高点和DIF高点
-        recent = df.tail(20)
-        price_highs = []
-        dif_at_price_highs = []
-
-        for i in range(2, len(recent) - 2):
-            row = recent.iloc[i]
-            if (row['最高'] >= recent.iloc[i-1]['最高'] and
-                row['最高'] >= recent.iloc[i-2]['最高'] and
-                row['最高'] >= recent.iloc[i+1]['最高'] and
-                row['最高'] >= recent.iloc[i+2]['最高']):
-                price_highs.append(row['最高'])
-                dif_at_price_highs.append(row['DIF'])
+        recent_high = high[-20:]
+        recent_dif = cols['DIF'][-20:]
+        if 'SWING_HIGH' in cols:
+            swing = _recent_swing_mask(cols, 'SWING_HIGH', 20)
+            price_highs = recent_high[swing].tolist()
+            dif_at_price_highs = recent_dif[swing].tolist()
+        else:
+            price_highs = []
+            dif_at_price_highs = []
+            for i in range(2, len(recent_high) - 2):
+                h = recent_high[i]
+                if (h >= recent_high[i-1] and
+                    h >= recent_high[i-2] and
+                    h >= recent_high[i+1] and
+                    h >= recent_high[i+2]):
+                    price_highs.append(h)
+                    dif_at_price_highs.append(recent_dif[i])
 
         if len(price_highs) >= 2:
             if price_highs[-1] >= price_highs[-2] and dif_at_price_highs[-1] < dif_at_price_highs[-2]:
@@ -692,20 +1116,19 @@ def detect_topping_signals(df, price=None):
     # 上影线长说明上方抛压重，是见顶的典型K线特征
     # ------------------------------------------------------------------
     shadow_score = 0
-    upper_shadow = latest['最高'] - max(latest['收盘'], latest['开盘'])
-    body = abs(latest['收盘'] - latest['开盘'])
-    total_range = latest['最高'] - latest['最低']
+    upper_shadow = high[-1] - max(close[-1], open_[-1])
+    body = abs(close[-1] - open_[-1])
+    total_range = high[-1] - low[-1]
 
     if total_range > 0:
         shadow_ratio = upper_shadow / total_range
         # 近3日出现长上影线
         long_shadow_count = 0
         for i in range(-3, 0):
-            if abs(i) <= len(df):
-                row = df.iloc[i]
-                r_total = row['最高'] - row['最低']
+            if abs(i) <= n:
+                r_total = high[i] - low[i]
                 if r_total > 0:
-                    r_shadow = (row['最高'] - max(row['收盘'], row['开盘'])) / r_total
+                    r_shadow = (high[i] - max(close[i], open_[i])) / r_total
                     if r_shadow > 0.5:
                         long_shadow_count += 1
 
@@ -724,7 +1147,7 @@ def detect_topping_signals(df, price=None):
     # 短线已转弱但中线还在上行 = 趋势末端分歧
     # ------------------------------------------------------------------
     diverge_score = 0
-    ma20 = _safe_ma(latest, 'MA20')
+    ma20 = _safe_col(cols, 'MA20')
     if ma5 is not None and ma10 is not None and ma20 is not None and ma20 > 0:
         dev_ma20 = (price - ma20) / ma20 * 100
         if ma5 < ma10 and dev_ma20 > 5:
@@ -742,18 +1165,18 @@ def detect_topping_signals(df, price=None):
     # 这是"缩量滞涨后连跌"这类场景的关键检测维度
     # ------------------------------------------------------------------
     retreat_score = 0
-    if len(df) >= 10:
-        high_10d = df.tail(10)['最高'].max()
+    if n >= 10:
+        high_10d = _nanmax(high[-10:])
         retreat_pct = (high_10d - price) / high_10d * 100
 
         # 近3日成交量 vs 近20日均量（或近10日均量）
-        recent_3_vol = df.tail(3)['成交量'].mean()
-        ref_vol = df.tail(20)['成交量'].mean() if len(df) >= 20 else df.tail(10)['成交量'].mean()
+        recent_3_vol = _nanmean(volume[-3:])
+        ref_vol = _nanmean(volume[-20:]) if n >= 20 else _nanmean(volume[-10:])
 
         vol_shrink = (recent_3_vol / ref_vol) if ref_vol > 0 else 1.0
 
         # 近3日连续下跌（收盘价逐日下降）
-        recent_closes = df.tail(4)['收盘'].tolist()  # 取4个点看3天的趋势
+        recent_closes = close[-4:].tolist()  # 取4个点看3天的趋势
         consecutive_decline = 0
         for i in range(len(recent_closes) - 1, 0, -1):
             if recent_closes[i] < recent_closes[i-1]:
@@ -1178,3 +1601,21 @@ def detect_bottoming_signals(df, price=None):
         'is_bottoming': score >= 40,
         'details': details,
     }
+
+
+def precompile():
+    """以实际调用的参数类型触发各 numba 内核编译并写入磁盘缓存（未安装 numba 时无操作）"""
+    prices = np.linspace(10.0, 11.0, 20)
+    _swing_points(prices, prices)
+    _calc_loop(prices, prices, prices, 0.2, 0.1, 0.2, 6, 0.5, 0.5)
+    _pendulum_levels(10.0, np.full(len(_PENDULUM_MAS), 10.0), _PENDULUM_THRESHOLDS)
+
+
+if __name__ == '__main__':
+    # 预编译：python3 technical.py --precompile（安装/升级 numba 后执行一次）
+    if '--precompile' in sys.argv[1:]:
+        if not _numba_available:
+            print("⚠️ 未安装 numba，使用纯 Python 实现（pip install -r requirements-speedup.txt）")
+        else:
+            precompile()
+            print(f"✅ numba 内核已编译，缓存目录: {os.environ['NUMBA_CACHE_DIR']}")
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+增量技术指标（逐根K线推送，O(1) 更新）
+
+适用于逐日滚动回测、实时行情等"每次只新增一根K线"的场景：
+各指标对象只保存递推所需的最少状态，push() 一根K线即返回该根的指标值，
+无需对整段历史重新计算；peek() 返回"若推送该K线"的指标值而不改变状态，
+盘中反复修正同一根K线时用它。
+
+递推公式与 technical.py 的批量计算一致（EWM 单步递推共用 _ewm_step，滑动均值/标准差
+复现 pandas rolling 的补偿求和），同一序列逐根推送的结果与 calculate_* 逐位一致；
+默认参数取自 technical 的 MA_WINDOWS / MACD_PARAMS 等常量。
+from_values() 用批量内核一次性得到处理完历史序列后的状态，与逐根推送相同。
+
+包含：
+- MaStream(window)            简单移动平均
+- StdStream(window)           滑动标准差（ddof=1）
+- EmaStream(alpha)            EWM(adjust=False)，可由 span/com 构造
+- MacdStream(8, 17, 9)        DIF / DEA / MACD
+- KdjStream(6, 3, 3)          RSV / K / D / J
+- RsiStream(14)               RSI
+- IndicatorStream()           calculate_all_indicators_fused 的全部指标列
+
+示例:
+    macd = MacdStream()
+    kdj = KdjStream()
+    for close, high, low in bars:
+        dif, dea, hist = macd.push(close)
+        rsv, k, d, j = kdj.push(close, high, low)
+"""
+
+import math
+import os
+import sys
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from technical import (
+    njit, _ewm_alpha, _ewm_step, _ewm_mean, _ewm_last_state, _kdj_loop,
+    MA_WINDOWS, MA_SLOPE_PERIOD, MACD_PARAMS, KDJ_PARAMS, RSI_PERIOD, VOLUME_MA_WINDOWS, BOLLINGER_PARAMS,
+)
+
+
+# ============================================================
+# pandas rolling 的滑动求和 / 方差内核（移入、移出分别做 Kahan 补偿）
+# 状态为 float 元组，批量回放与逐根推送共用同一组单步函数
+# ============================================================
+
+# 均值状态：(sum, 移入补偿, 移出补偿, 有效个数, 负数个数, 末尾连续相同值个数, 上一个有效值)
+_MEAN_INIT = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+# 方差状态：(均值, 离差平方和, 移入补偿, 移出补偿, 有效个数, 末尾连续相同值个数, 上一个有效值)
+_VAR_INIT = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+
+
+@njit(cache=True)
+def _mean_remove(state, val):
+    """窗口移出 val"""
+    sx, comp_add, comp_remove, nobs, neg_ct, same_ct, prev = state
+    if val == val:
+        nobs -= 1.0
+        y = -val - comp_remove
+        t = sx + y
+        comp_remove = t - sx - y
+        sx = t
+        if math.copysign(1.0, val) < 0:
+            neg_ct -= 1.0
+    return sx, comp_add, comp_remove, nobs, neg_ct, same_ct, prev
+
+
+@njit(cache=True)
+def _mean_add(state, val):
+    """窗口移入 val"""
+    sx, comp_add, comp_remove, nobs, neg_ct, same_ct, prev = state
+    if val == val:
+        nobs += 1.0
+        y = val - comp_add
+        t = sx + y
+        comp_add = t - sx - y
+        sx = t
+        if math.copysign(1.0, val) < 0:
+            neg_ct += 1.0
+        same_ct = same_ct + 1.0 if val == prev else 1.0
+        prev = val
+    return sx, comp_add, comp_remove, nobs, neg_ct, same_ct, prev
+
+
+@njit(cache=True)
+def _mean_result(state, window):
+    """当前窗口均值：全同值窗口直接取该值，结果符号与窗口内数值符号不符时取 0"""
+    sx, comp_add, comp_remove, nobs, neg_ct, same_ct, prev = state
+    if nobs < window:
+        return np.nan
+    if same_ct >= nobs:
+        return prev
+    result = sx / nobs
+    if neg_ct == 0 and result < 0:
+        return 0.0
+    if neg_ct == nobs and result > 0:
+        return 0.0
+    return result
+
+
+@njit(cache=True)
+def _var_remove(state, val):
+    """窗口移出 val（Welford 递推）"""
+    mean_x, ssqdm_x, comp_add, comp_remove, nobs, same_ct, prev = state
+    if val == val:
+        nobs -= 1.0
+        if nobs:
+            prev_mean = mean_x - comp_remove
+            y = val - comp_remove
+            t = y - mean_x
+            comp_remove = t + mean_x - y
+            mean_x = mean_x - t / nobs
+            ssqdm_x = ssqdm_x - (val - prev_mean) * (val - mean_x)
+        else:
+            mean_x = 0.0
+            ssqdm_x = 0.0
+    return mean_x, ssqdm_x, comp_add, comp_remove, nobs, same_ct, prev
+
+
+@njit(cache=True)
+def _var_add(state, val):
+    """窗口移入 val（Welford 递推）"""
+    mean_x, ssqdm_x, comp_add, comp_remove, nobs, same_ct, prev = state
+    if val == val:
+        nobs += 1.0
+        same_ct = same_ct + 1.0 if val == prev else 1.0
+        prev = val
+        prev_mean = mean_x - comp_add
+        y = val - comp_add
+        t = y - mean_x
+        comp_add = t + mean_x - y
+        mean_x = mean_x + t / nobs
+        ssqdm_x = ssqdm_x + (val - prev_mean) * (val - mean_x)
+    return mean_x, ssqdm_x, comp_add, comp_remove, nobs, same_ct, prev
+
+
+@njit(cache=True)
+def _std_result(state, window):
+    """当前窗口样本标准差（ddof=1）；全同值窗口为 0，负的舍入误差按 0 处理"""
+    mean_x, ssqdm_x, comp_add, comp_remove, nobs, same_ct, prev = state
+    if nobs < window or nobs <= 1.0:
+        return np.nan
+    if same_ct >= nobs:
+        return 0.0
+    var = ssqdm_x / (nobs - 1.0)
+    return math.sqrt(var) if var > 0 else 0.0
+
+
+@njit(cache=True)
+def _mean_replay(values, window):
+    """按逐根推送的步骤处理整段 values，返回最终状态"""
+    state = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+    for i in range(len(values)):
+        if i >= window:
+            state = _mean_remove(state, values[i - window])
+        state = _mean_add(state, values[i])
+    return state
+
+
+@njit(cache=True)
+def _var_replay(values, window):
+    """按逐根推送的步骤处理整段 values，返回最终状态"""
+    state = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+    for i in range(len(values)):
+        if i >= window:
+            state = _var_remove(state, values[i - window])
+        state = _var_add(state, values[i])
+    return state
+
+
+def _float_values(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+class _RollingStream:
+    """滑动窗口统计的公共部分：保存最近 window 个值与递推状态"""
+
+    _init = None
+    _remove = _add = _result = _replay = None
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque(maxlen=window)  # 最近 window 个值（含 NaN）
+        self._state = self._init
+
+    @classmethod
+    def from_values(cls, values, window):
+        """处理完历史序列 values 后的对象（与逐个 push 相同）"""
+        values = _float_values(values)
+        stream = cls(window)
+        stream._state = cls._replay(values, window)
+        stream._values.extend(values[-window:].tolist())
+        return stream
+
+    def _step(self, value):
+        state = self._state
+        if len(self._values) == self.window:
+            state = self._remove(state, self._values[0])
+        return self._add(state, value)
+
+    def push(self, value):
+        """推送一个值，返回当前统计值（不足 window 个有效值时为 NaN）"""
+        value = float(value)
+        self._state = self._step(value)
+        self._values.append(value)
+        return self._result(self._state, self.window)
+
+    def peek(self, value):
+        """推送 value 时将返回的统计值，不改变状态"""
+        return self._result(self._step(float(value)), self.window)
+
+
+class MaStream(_RollingStream):
+    """
+    简单移动平均：逐步复现 pandas rolling(window).mean() 的滑动求和
+    （移入/移出分别做 Kahan 补偿、全同值窗口直接取该值、符号修正），
+    与 calculate_ma 逐位一致；窗口内有 NaN 时该窗口均值为 NaN
+    """
+
+    _init = _MEAN_INIT
+    _remove = staticmethod(_mean_remove)
+    _add = staticmethod(_mean_add)
+    _result = staticmethod(_mean_result)
+    _replay = staticmethod(_mean_replay)
+
+
+class StdStream(_RollingStream):
+    """滑动样本标准差：逐步复现 pandas rolling(window).std() 的 Welford 递推，与布林带计算逐位一致"""
+
+    _init = _VAR_INIT
+    _remove = staticmethod(_var_remove)
+    _add = staticmethod(_var_add)
+    _result = staticmethod(_std_result)
+    _replay = staticmethod(_var_replay)
+
+
+class EmaStream:
+    """EWM(adjust=False) 均值，NaN 处理与 pandas / technical._ewm_mean 一致"""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None  # 尚未推送任何值
+        self._old_wt = 1.0
+
+    @classmethod
+    def from_span(cls, span):
+        return cls(_ewm_alpha(span=span))
+
+    @classmethod
+    def from_com(cls, com):
+        return cls(_ewm_alpha(com=com))
+
+    @classmethod
+    def from_values(cls, values, alpha):
+        """处理完历史序列 values 后的对象（与逐个 push 相同）"""
+        stream = cls(alpha)
+        values = _float_values(values)
+        if len(values):
+            stream.value, stream._old_wt = _ewm_last_state(values, alpha)
+        return stream
+
+    def _step(self, value):
+        if self.value is None:
+            return float(value), self._old_wt
+        return _ewm_step(self.value, self._old_wt, float(value), self.alpha)
+
+    def push(self, value):
+        """推送一个值，返回最新的平滑值"""
+        self.value, self._old_wt = self._step(value)
+        return self.value
+
+    def peek(self, value):
+        """推送 value 时将返回的平滑值，不改变状态"""
+        return self._step(value)[0]
+
+
+class MacdStream:
+    """MACD（默认 8,17,9），push(close) 返回 (DIF, DEA, MACD)"""
+
+    def __init__(self, fast=MACD_PARAMS[0], slow=MACD_PARAMS[1], signal=MACD_PARAMS[2]):
+        self._fast = EmaStream.from_span(fast)
+        self._slow = EmaStream.from_span(slow)
+        self._signal = EmaStream.from_span(signal)
+
+    @classmethod
+    def from_values(cls, close, fast=MACD_PARAMS[0], slow=MACD_PARAMS[1], signal=MACD_PARAMS[2]):
+        """处理完历史收盘价后的对象（与逐根 push 相同）"""
+        stream = cls(fast, slow, signal)
+        close = _float_values(close)
+        stream._fast = EmaStream.from_values(close, stream._fast.alpha)
+        stream._slow = EmaStream.from_values(close, stream._slow.alpha)
+        if len(close):
+            dif = _ewm_mean(close, stream._fast.alpha) - _ewm_mean(close, stream._slow.alpha)
+            stream._signal = EmaStream.from_values(dif, stream._signal.alpha)
+        return stream
+
+    def push(self, close):
+        dif = self._fast.push(close) - self._slow.push(close)
+        dea = self._signal.push(dif)
+        return dif, dea, 2 * (dif - dea)
+
+    def peek(self, close):
+        dif = self._fast.peek(close) - self._slow.peek(close)
+        dea = self._signal.peek(dif)
+        return dif, dea, 2 * (dif - dea)
+
+
+class KdjStream:
+    """
+    KDJ（默认 6,3,3），push(close, high, low) 返回 (RSV, K, D, J)
+
+    只保留最近 n 根的最高/最低价；窗口不足 n 根或含 NaN 时 RSV 为 NaN，
+    K/D 沿用上一值（与批量计算相同）
+    """
+
+    def __init__(self, n=KDJ_PARAMS[0], m1=KDJ_PARAMS[1], m2=KDJ_PARAMS[2]):
+        self.n = n
+        self._highs = deque(maxlen=n)
+        self._lows = deque(maxlen=n)
+        self._k = EmaStream.from_com(m1 - 1)
+        self._d = EmaStream.from_com(m2 - 1)
+
+    @classmethod
+    def from_values(cls, close, high, low, n=KDJ_PARAMS[0], m1=KDJ_PARAMS[1], m2=KDJ_PARAMS[2]):
+        """处理完历史K线后的对象（与逐根 push 相同）"""
+        stream = cls(n, m1, m2)
+        close, high, low = _float_values(close), _float_values(high), _float_values(low)
+        if len(close):
+            with np.errstate(divide='ignore', invalid='ignore'):  # 未装 numba 时内核按 numpy 标量运算
+                rsv, k, _, _ = _kdj_loop(close, high, low, n, stream._k.alpha, stream._d.alpha)
+            stream._k = EmaStream.from_values(rsv, stream._k.alpha)
+            stream._d = EmaStream.from_values(k, stream._d.alpha)
+        stream._highs.extend(high[-n:].tolist())
+        stream._lows.extend(low[-n:].tolist())
+        return stream
+
+    def _rsv(self, close, highs, lows):
+        if len(highs) < self.n or np.isnan(highs).any() or np.isnan(lows).any():
+            return np.nan
+        low_n = np.float64(min(lows))
+        high_n = np.float64(max(highs))
+        # 最高=最低时 0/0 得 NaN，与批量计算一致
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float((close - low_n) / (high_n - low_n) * 100)
+
+    def push(self, close, high, low):
+        self._highs.append(float(high))
+        self._lows.append(float(low))
+        rsv = self._rsv(close, self._highs, self._lows)
+        k = self._k.push(rsv)
+        d = self._d.push(k)
+        return rsv, k, d, 3 * k - 2 * d
+
+    def peek(self, close, high, low):
+        """推送该K线时将返回的 (RSV, K, D, J)，不改变状态"""
+        keep = self.n - 1
+        highs = list(self._highs)[len(self._highs) - keep:] if keep else []
+        lows = list(self._lows)[len(self._lows) - keep:] if keep else []
+        rsv = self._rsv(close, highs + [float(high)], lows + [float(low)])
+        k = self._k.peek(rsv)
+        d = self._d.peek(k)
+        return rsv, k, d, 3 * k - 2 * d
+
+
+class RsiStream:
+    """RSI（默认 14）：涨幅/跌幅各用一个 MaStream，拆分口径与 calculate_rsi 相同"""
+
+    def __init__(self, period=RSI_PERIOD):
+        self._gain = MaStream(period)
+        self._loss = MaStream(period)
+        self._prev_close = np.nan
+
+    @classmethod
+    def from_values(cls, close, period=RSI_PERIOD):
+        """处理完历史收盘价后的对象（与逐根 push 相同）"""
+        stream = cls(period)
+        close = _float_values(close)
+        if len(close):
+            delta = np.diff(close, prepend=np.nan)
+            stream._gain = MaStream.from_values(np.where(delta > 0, delta, 0.0), period)
+            stream._loss = MaStream.from_values(-np.where(delta < 0, delta, 0.0), period)
+            stream._prev_close = close[-1]
+        return stream
+
+    def _split(self, close):
+        """涨幅、跌幅（非下跌处跌幅为 -0.0，与批量的 -delta.where(delta < 0, 0) 相同）"""
+        delta = float(close) - self._prev_close
+        return (delta if delta > 0 else 0.0), -(delta if delta < 0 else 0.0)
+
+    @staticmethod
+    def _rsi(gain, loss):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(100 - 100 / (1 + np.float64(gain) / loss))
+
+    def push(self, close):
+        gain, loss = self._split(close)
+        self._prev_close = float(close)
+        return self._rsi(self._gain.push(gain), self._loss.push(loss))
+
+    def peek(self, close):
+        gain, loss = self._split(close)
+        return self._rsi(self._gain.peek(gain), self._loss.peek(loss))
+
+
+class IndicatorStream:
+    """
+    calculate_all_indicators_fused 全部指标列的逐根推送版本（参数与批量默认值相同）
+
+    push/peek(close, high, low, volume) 返回 {列名: 值}，列与批量计算相同
+    （MA 及斜率、DIF/DEA/MACD、RSV/K/D/J、RSI、VOL_MA、BOLL）；
+    批量计算在数据不足窗口长度时不创建的列，这里按 NaN 返回。
+    """
+
+    def __init__(self, ma_windows=MA_WINDOWS, volume_windows=VOLUME_MA_WINDOWS, bollinger=True):
+        self._ma = {w: MaStream(w) for w in ma_windows}
+        self._slope_windows = [w for w in ma_windows if w <= 60]
+        # 斜率用的近 MA_SLOPE_PERIOD 根均线值
+        self._ma_hist = {w: deque([np.nan] * MA_SLOPE_PERIOD, maxlen=MA_SLOPE_PERIOD) for w in self._slope_windows}
+        self._macd = MacdStream()
+        self._kdj = KdjStream()
+        self._rsi = RsiStream()
+        self._vol = {w: MaStream(w) for w in volume_windows}
+        self._boll = (MaStream(BOLLINGER_PARAMS[0]), StdStream(BOLLINGER_PARAMS[0])) if bollinger else None
+
+    @classmethod
+    def from_history(cls, close, high, low, volume, **kwargs):
+        """处理完历史K线后的对象：前面部分用批量内核得到状态，最后几根逐根推送以积累斜率所需的均线值"""
+        stream = cls(**kwargs)
+        close, high, low, volume = (_float_values(a) for a in (close, high, low, volume))
+        head = max(len(close) - MA_SLOPE_PERIOD, 0)
+        stream._ma = {w: MaStream.from_values(close[:head], w) for w in stream._ma}
+        stream._macd = MacdStream.from_values(close[:head])
+        stream._kdj = KdjStream.from_values(close[:head], high[:head], low[:head])
+        stream._rsi = RsiStream.from_values(close[:head])
+        stream._vol = {w: MaStream.from_values(volume[:head], w) for w in stream._vol}
+        if stream._boll is not None:
+            window = BOLLINGER_PARAMS[0]
+            stream._boll = (MaStream.from_values(close[:head], window), StdStream.from_values(close[:head], window))
+        for i in range(head, len(close)):
+            stream.push(close[i], high[i], low[i], volume[i])
+        return stream
+
+    def _columns(self, ma, macd, kdj, rsi, vol, boll):
+        out = {f'MA{w}': v for w, v in ma.items()}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for w in self._slope_windows:
+                prev = np.float64(self._ma_hist[w][0])
+                out[f'MA{w}_slope'] = float((ma[w] - prev) / prev * 100)
+        out.update(zip(('DIF', 'DEA', 'MACD'), macd))
+        out.update(zip(('RSV', 'K', 'D', 'J'), kdj))
+        out['RSI'] = rsi
+        out.update((f'VOL_MA{w}', v) for w, v in vol.items())
+        if boll is not None:
+            mid, std = boll
+            num_std = BOLLINGER_PARAMS[1]
+            out.update({'BOLL_MID': mid, 'BOLL_UPPER': mid + num_std * std, 'BOLL_LOWER': mid - num_std * std})
+        return out
+
+    def push(self, close, high, low, volume):
+        ma = {w: s.push(close) for w, s in self._ma.items()}
+        out = self._columns(
+            ma, self._macd.push(close), self._kdj.push(close, high, low), self._rsi.push(close),
+            {w: s.push(volume) for w, s in self._vol.items()},
+            None if self._boll is None else (self._boll[0].push(close), self._boll[1].push(close)),
+        )
+        for w in self._slope_windows:
+            self._ma_hist[w].append(ma[w])
+        return out
+
+    def peek(self, close, high, low, volume):
+        """推送该K线时将返回的指标值，不改变状态（盘中反复修正最后一根K线）"""
+        return self._columns(
+            {w: s.peek(close) for w, s in self._ma.items()},
+            self._macd.peek(close), self._kdj.peek(close, high, low), self._rsi.peek(close),
+            {w: s.peek(volume) for w, s in self._vol.items()},
+            None if self._boll is None else (self._boll[0].peek(close), self._boll[1].peek(close)),
+        )